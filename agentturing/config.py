@@ -6,6 +6,8 @@ from functools import lru_cache
 
 from dotenv import load_dotenv
 
+from agentturing.constants import EMBEDDING_CACHE_PATH, LEXICAL_INDEX_PATH
+
 
 load_dotenv()
 
@@ -16,6 +18,21 @@ def _get_bool(name: str, default: bool) -> bool:
     return value.strip().lower() in {"1", "true", "yes", "on"}
 
 
+def _get_int(name: str, default: int) -> int:
+    value = os.getenv(name)
+    if value is None:
+        return default
+    try:
+        return int(value)
+    except ValueError:
+        return default
+
+
+def _get_choice(name: str, default: str, choices: tuple[str, ...]) -> str:
+    value = (os.getenv(name) or default).strip().lower()
+    return value if value in choices else default
+
+
 def _get_float(name: str, default: float) -> float:
     value = os.getenv(name)
     if value is None:
@@ -26,6 +43,19 @@ def _get_float(name: str, default: float) -> float:
         return default
 
 
+def _get_limits(name: str) -> tuple[tuple[str, int], ...]:
+    """Parse ``name=cap,name=cap`` pairs, skipping malformed entries."""
+    limits: dict[str, int] = {}
+    for item in (os.getenv(name) or "").split(","):
+        key, _, value = item.partition("=")
+        try:
+            limits[key.strip()] = max(1, int(value))
+        except ValueError:
+            continue
+    limits.pop("", None)
+    return tuple(limits.items())
+
+
 @dataclass(frozen=True)
 # pylint: disable=too-many-instance-attributes
 class Settings:
@@ -39,8 +69,80 @@ class Settings:
     solver_model: str
     research_model: str
     tavily_api_key: str | None
+    http2_enabled: bool
+    http_max_connections: int
+    http_max_keepalive_connections: int
+    http_keepalive_expiry: float
+    http_connect_timeout: float
+    http_read_timeout: float
+    http_warmup_connections: int
+    tavily_base_url: str
+    web_search_cache_size: int
+    web_search_cache_ttl: float
+    web_search_math_timeout: float
+    web_search_general_timeout: float
     agent_temperature: float
     tracing_disabled: bool
+    qdrant_url: str | None
+    kb_max_concurrency: int
+    kb_worker_threads: int
+    kb_tool_timeout: float
+    kb_sidecar_socket: str | None
+    kb_retrieval_mode: str
+    kb_lexical_index_path: str
+    kb_hybrid_candidates: int
+    kb_hybrid_budget_ms: float
+    kb_rrf_k: int
+    kb_prefetch_enabled: bool
+    kb_prefetch_top_k: int
+    kb_prefetch_similarity: float
+    kb_prefetch_min_score: float
+    kb_prefetch_wait: float
+    tool_max_concurrency: int
+    run_max_concurrency: int
+    admission_queue_size: int
+    admission_queue_timeout: float
+    model_concurrency: tuple[tuple[str, int], ...]
+    model_hedging_enabled: bool
+    model_hedge_percentile: float
+    model_hedge_initial_delay: float
+    model_hedge_min_delay: float
+    model_fallback_enabled: bool
+    model_fallback_model: str
+    model_fallback_timeout: float
+    model_breaker_window: int
+    model_breaker_min_calls: int
+    model_breaker_error_rate: float
+    model_breaker_cooldown: float
+    context_token_budget: int
+    context_dedup_similarity: float
+    qdrant_hnsw_m: int
+    qdrant_hnsw_ef_construct: int
+    qdrant_search_ef: int
+    qdrant_quantization: str
+    qdrant_quantization_rescore: bool
+    qdrant_quantization_oversampling: float
+    qdrant_on_disk_vectors: bool
+    answer_cache_enabled: bool
+    answer_cache_size: int
+    answer_cache_ttl: float
+    answer_cache_similarity: float
+    fast_router_enabled: bool
+    fast_router_threshold: float
+    fast_router_examples_path: str | None
+    warmup_enabled: bool
+    warmup_background: bool
+    embedding_cache_enabled: bool
+    embedding_cache_path: str
+    embedding_cache_max_rows: int
+    embedding_query_cache_size: int
+    embedding_backend: str
+    embedding_onnx_file: str | None
+    embedding_batch_max_size: int
+    embedding_batch_max_wait_ms: float
+    stream_coalesce_ms: float
+    stream_coalesce_bytes: int
+    event_loop_monitor_ms: float
 
     @property
     def agentic_enabled(self) -> bool:
@@ -69,6 +171,82 @@ def get_settings() -> Settings:
         solver_model=os.getenv("AGENT_SOLVER_MODEL", "deepseek-reasoner"),
         research_model=os.getenv("AGENT_RESEARCH_MODEL", "deepseek-chat"),
         tavily_api_key=os.getenv("TAVILY_API_KEY"),
+        http2_enabled=_get_bool("HTTP2_ENABLED", True),
+        http_max_connections=max(1, _get_int("HTTP_MAX_CONNECTIONS", 100)),
+        http_max_keepalive_connections=max(0, _get_int("HTTP_MAX_KEEPALIVE_CONNECTIONS", 32)),
+        http_keepalive_expiry=max(0.0, _get_float("HTTP_KEEPALIVE_EXPIRY", 90.0)),
+        http_connect_timeout=max(0.1, _get_float("HTTP_CONNECT_TIMEOUT", 5.0)),
+        http_read_timeout=max(1.0, _get_float("HTTP_READ_TIMEOUT", 120.0)),
+        http_warmup_connections=max(0, _get_int("HTTP_WARMUP_CONNECTIONS", 2)),
+        tavily_base_url=os.getenv("TAVILY_BASE_URL", "https://api.tavily.com"),
+        web_search_cache_size=max(1, _get_int("WEB_SEARCH_CACHE_SIZE", 256)),
+        web_search_cache_ttl=_get_float("WEB_SEARCH_CACHE_TTL", 600.0),
+        web_search_math_timeout=_get_float("WEB_SEARCH_MATH_TIMEOUT", 10.0),
+        web_search_general_timeout=_get_float("WEB_SEARCH_GENERAL_TIMEOUT", 20.0),
         agent_temperature=_get_float("AGENT_TEMPERATURE", 0.2),
         tracing_disabled=_get_bool("AGENT_TRACING_DISABLED", True),
+        qdrant_url=os.getenv("QDRANT_URL") or None,
+        kb_max_concurrency=max(1, _get_int("KB_MAX_CONCURRENCY", 4)),
+        kb_worker_threads=max(1, _get_int("KB_WORKER_THREADS", 2)),
+        kb_tool_timeout=max(0.1, _get_float("KB_TOOL_TIMEOUT", 8.0)),
+        kb_sidecar_socket=os.getenv("KB_SIDECAR_SOCKET") or None,
+        kb_retrieval_mode=_get_choice("KB_RETRIEVAL_MODE", "auto", ("dense", "hybrid", "auto")),
+        kb_lexical_index_path=os.getenv("KB_LEXICAL_INDEX_PATH", LEXICAL_INDEX_PATH),
+        kb_hybrid_candidates=max(1, _get_int("KB_HYBRID_CANDIDATES", 20)),
+        kb_hybrid_budget_ms=max(0.0, _get_float("KB_HYBRID_BUDGET_MS", 50.0)),
+        kb_rrf_k=max(1, _get_int("KB_RRF_K", 60)),
+        kb_prefetch_enabled=_get_bool("KB_PREFETCH_ENABLED", True),
+        kb_prefetch_top_k=min(8, max(1, _get_int("KB_PREFETCH_TOP_K", 4))),
+        kb_prefetch_similarity=_get_float("KB_PREFETCH_SIMILARITY", 0.9),
+        kb_prefetch_min_score=_get_float("KB_PREFETCH_MIN_SCORE", 0.8),
+        kb_prefetch_wait=max(0.0, _get_float("KB_PREFETCH_WAIT", 0.3)),
+        tool_max_concurrency=max(1, _get_int("TOOL_MAX_CONCURRENCY", 3)),
+        run_max_concurrency=max(1, _get_int("RUN_MAX_CONCURRENCY", 32)),
+        admission_queue_size=max(0, _get_int("ADMISSION_QUEUE_SIZE", 64)),
+        admission_queue_timeout=max(0.1, _get_float("ADMISSION_QUEUE_TIMEOUT", 15.0)),
+        model_concurrency=_get_limits("MODEL_CONCURRENCY"),
+        model_hedging_enabled=_get_bool("MODEL_HEDGING_ENABLED", False),
+        model_hedge_percentile=min(99.9, max(50.0, _get_float("MODEL_HEDGE_PERCENTILE", 95.0))),
+        model_hedge_initial_delay=max(0.0, _get_float("MODEL_HEDGE_INITIAL_DELAY", 2.0)),
+        model_hedge_min_delay=max(0.0, _get_float("MODEL_HEDGE_MIN_DELAY", 0.25)),
+        model_fallback_enabled=_get_bool("MODEL_FALLBACK_ENABLED", True),
+        model_fallback_model=os.getenv("MODEL_FALLBACK_MODEL", "deepseek-reasoner").strip(),
+        model_fallback_timeout=max(0.1, _get_float("MODEL_FALLBACK_TIMEOUT", 30.0)),
+        model_breaker_window=max(1, _get_int("MODEL_BREAKER_WINDOW", 20)),
+        model_breaker_min_calls=max(1, _get_int("MODEL_BREAKER_MIN_CALLS", 5)),
+        model_breaker_error_rate=min(1.0, max(0.01, _get_float("MODEL_BREAKER_ERROR_RATE", 0.5))),
+        model_breaker_cooldown=max(0.0, _get_float("MODEL_BREAKER_COOLDOWN", 30.0)),
+        context_token_budget=max(64, _get_int("CONTEXT_TOKEN_BUDGET", 1200)),
+        context_dedup_similarity=_get_float("CONTEXT_DEDUP_SIMILARITY", 0.95),
+        qdrant_hnsw_m=max(4, _get_int("QDRANT_HNSW_M", 16)),
+        qdrant_hnsw_ef_construct=max(4, _get_int("QDRANT_HNSW_EF_CONSTRUCT", 100)),
+        qdrant_search_ef=max(1, _get_int("QDRANT_SEARCH_EF", 128)),
+        qdrant_quantization=_get_choice(
+            "QDRANT_QUANTIZATION", "none", ("none", "scalar", "binary")
+        ),
+        qdrant_quantization_rescore=_get_bool("QDRANT_QUANTIZATION_RESCORE", True),
+        qdrant_quantization_oversampling=_get_float("QDRANT_QUANTIZATION_OVERSAMPLING", 2.0),
+        qdrant_on_disk_vectors=_get_bool("QDRANT_ON_DISK_VECTORS", False),
+        answer_cache_enabled=_get_bool("ANSWER_CACHE_ENABLED", True),
+        answer_cache_size=max(1, _get_int("ANSWER_CACHE_SIZE", 1024)),
+        answer_cache_ttl=_get_float("ANSWER_CACHE_TTL", 86400.0),
+        answer_cache_similarity=_get_float("ANSWER_CACHE_SIMILARITY", 0.95),
+        fast_router_enabled=_get_bool("FAST_ROUTER_ENABLED", True),
+        fast_router_threshold=_get_float("FAST_ROUTER_THRESHOLD", 0.85),
+        fast_router_examples_path=os.getenv("FAST_ROUTER_EXAMPLES_PATH") or None,
+        warmup_enabled=_get_bool("WARMUP_ENABLED", True),
+        warmup_background=_get_bool("WARMUP_BACKGROUND", False),
+        embedding_cache_enabled=_get_bool("EMBEDDING_CACHE_ENABLED", True),
+        embedding_cache_path=os.getenv("EMBEDDING_CACHE_PATH", EMBEDDING_CACHE_PATH),
+        embedding_cache_max_rows=max(1, _get_int("EMBEDDING_CACHE_MAX_ROWS", 200_000)),
+        embedding_query_cache_size=max(1, _get_int("EMBEDDING_QUERY_CACHE_SIZE", 4096)),
+        embedding_backend=_get_choice(
+            "EMBEDDING_BACKEND", "torch", ("torch", "onnx", "onnx-int8")
+        ),
+        embedding_onnx_file=os.getenv("EMBEDDING_ONNX_FILE") or None,
+        embedding_batch_max_size=max(1, _get_int("EMBEDDING_BATCH_MAX_SIZE", 32)),
+        embedding_batch_max_wait_ms=max(0.0, _get_float("EMBEDDING_BATCH_MAX_WAIT_MS", 2.0)),
+        stream_coalesce_ms=max(0.0, _get_float("STREAM_COALESCE_MS", 30.0)),
+        stream_coalesce_bytes=max(1, _get_int("STREAM_COALESCE_BYTES", 2048)),
+        event_loop_monitor_ms=max(0.0, _get_float("EVENT_LOOP_MONITOR_MS", 100.0)),
     )
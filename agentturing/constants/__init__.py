@@ -3,6 +3,10 @@
 EMBEDDING_MODEL_NAME = "all-MiniLM-L6-v2"
 COLLECTION_NAME = "math_combined"
 QDRANT_PATH = "agentturing/database/qdrantdb"
+INGESTION_CHECKPOINT_PATH = "agentturing/database/ingestion_checkpoint.json"
+EMBEDDING_CACHE_PATH = "agentturing/database/embedding_cache.sqlite3"
+LEXICAL_INDEX_PATH = "agentturing/database/lexical_index.sqlite3"
+KB_SIDECAR_SOCKET_PATH = "agentturing/database/kb_sidecar.sock"
 TAVILY_DOMAINS = ["khanacademy.org",
                   "brilliant.org",
                   "mathigon.org",
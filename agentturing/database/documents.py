@@ -0,0 +1,66 @@
+"""Turn dataset rows into knowledge base documents and chunks with stable point IDs."""
+
+import hashlib
+from uuid import UUID
+
+from langchain_core.documents import Document
+from langchain_text_splitters import RecursiveCharacterTextSplitter
+
+
+def chunk_point_id(dataset, source_row, chunk_index, content):
+    """Derive a stable Qdrant point ID from a chunk's origin and content."""
+    key = f"{dataset}\x1f{source_row}\x1f{chunk_index}\x1f{content}"
+    return str(UUID(hex=hashlib.sha256(key.encode("utf-8")).hexdigest()[:32]))
+
+
+def dpo_example_to_document(example):
+    """Convert one Math-Step-DPO-10K row into a LangChain doc."""
+    # Create a comprehensive document with problem and solution approach
+    content = f"""
+        Mathematical Problem: {example['prompt']}
+
+        Solution Approach: {example['initial_reason_steps']}
+
+        Step-by-Step Solution: {example['chosen']}
+
+        Final Answer: {example['answer']}
+        """
+
+    return Document(
+        page_content=content,
+        metadata={
+            "dataset": "Math-Step-DPO-10K",
+            "problem_type": "step_by_step_solution",
+            "has_reasoning_steps": True,
+            "has_final_answer": True
+        }
+    )
+
+
+def metamath_example_to_document(example):
+    """Convert one MetaMathQA row into a LangChain doc."""
+    content = f"""
+        Mathematical Query: {example['query']}
+
+        Detailed Solution: {example['response']}
+
+        Problem Type: {example['type']}
+        """
+
+    return Document(
+        page_content=content,
+        metadata={
+            "dataset": "MetaMathQA",
+            "problem_type": example['type'],
+            "has_original_question": 'original_question' in example
+        }
+    )
+
+
+def make_text_splitter(chunk_size=1000, chunk_overlap=200):
+    """Create the text splitter used to chunk knowledge base documents."""
+    return RecursiveCharacterTextSplitter(
+        chunk_size=chunk_size,
+        chunk_overlap=chunk_overlap,
+        length_function=len,
+    )
@@ -0,0 +1,345 @@
+"""Streaming, batched and resumable ingestion into the local Qdrant knowledge base.
+
+Run ``python -m agentturing.database.ingestion --help`` for the CLI options.
+"""
+
+import argparse
+import json
+import os
+import time
+from collections import deque
+from collections.abc import Callable, Iterator
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any
+
+from datasets import load_dataset
+from qdrant_client.http import models as qmodels
+
+from agentturing.config import get_settings
+from agentturing.constants import COLLECTION_NAME, INGESTION_CHECKPOINT_PATH
+from agentturing.database.lexical import LexicalIndex, rebuild_from_collection
+from agentturing.database.documents import (
+    chunk_point_id,
+    dpo_example_to_document,
+    make_text_splitter,
+    metamath_example_to_document,
+)
+from agentturing.database.vectorstore import (
+    delete_dataset_points,
+    existing_point_ids,
+    get_qdrant_client,
+    get_vectorstore,
+)
+from agentturing.model.embeddings import get_embedder
+
+
+@dataclass(frozen=True)
+class DatasetSource:
+    """A Hugging Face dataset split and how to turn its rows into documents."""
+
+    name: str
+    path: str
+    split: str
+    to_document: Callable[[dict[str, Any]], Any]
+    limit: int | None = None
+
+
+SOURCES = {
+    "Math-Step-DPO-10K": DatasetSource(
+        name="Math-Step-DPO-10K",
+        path="xinlai/Math-Step-DPO-10K",
+        split="train",
+        to_document=dpo_example_to_document,
+    ),
+    "MetaMathQA": DatasetSource(
+        name="MetaMathQA",
+        path="meta-math/MetaMathQA",
+        split="train",
+        to_document=metamath_example_to_document,
+        limit=9000,
+    ),
+}
+
+
+@dataclass
+class ChunkBatch:
+    """Chunks from consecutive dataset rows, ending on a row boundary."""
+
+    source: DatasetSource
+    chunks: list[Any]
+    rows: int
+    next_row: int
+    ids: list[str] = field(default_factory=list)
+    skipped: int = 0
+
+    def __post_init__(self) -> None:
+        if not self.ids:
+            self.ids = [
+                chunk_point_id(
+                    self.source.name,
+                    chunk.metadata["source_row"],
+                    chunk.metadata["chunk_index"],
+                    chunk.page_content,
+                )
+                for chunk in self.chunks
+            ]
+
+    def lexical_entries(self, ids: set[str] | None = None) -> list[tuple[str, str, dict]]:
+        """Return ``(point_id, content, metadata)`` entries, optionally only for ``ids``."""
+        return [
+            (point_id, chunk.page_content, chunk.metadata)
+            for point_id, chunk in zip(self.ids, self.chunks)
+            if ids is None or point_id in ids
+        ]
+
+    def drop_existing(self, present: set[str]) -> None:
+        """Remove chunks whose point IDs are already stored in Qdrant."""
+        kept = [(i, c) for i, c in zip(self.ids, self.chunks) if i not in present]
+        self.skipped += len(self.chunks) - len(kept)
+        self.ids = [point_id for point_id, _ in kept]
+        self.chunks = [chunk for _, chunk in kept]
+
+
+class IngestionCheckpoint:
+    """Per-source count of dataset rows already written to Qdrant."""
+
+    def __init__(self, path: str, rows_done: dict[str, int] | None = None) -> None:
+        self.path = path
+        self.rows_done = rows_done or {}
+
+    @classmethod
+    def load(cls, path: str) -> "IngestionCheckpoint":
+        """Read a checkpoint file, or start empty when none exists."""
+        if not os.path.exists(path):
+            return cls(path)
+        with open(path, encoding="utf-8") as handle:
+            return cls(path, json.load(handle).get("rows_done", {}))
+
+    def update(self, source_name: str, next_row: int) -> None:
+        """Record progress and atomically rewrite the checkpoint file."""
+        self.rows_done[source_name] = next_row
+        self.save()
+
+    def save(self) -> None:
+        """Atomically rewrite the checkpoint file from the in-memory state."""
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as handle:
+            json.dump({"rows_done": self.rows_done}, handle, indent=2)
+        os.replace(tmp_path, self.path)
+
+
+@dataclass
+class IngestionStats:
+    """Running totals and throughput for one ingestion run."""
+
+    started: float = field(default_factory=time.perf_counter)
+    rows: int = 0
+    vectors: int = 0
+    skipped: int = 0
+    batches: int = 0
+
+    def record(self, batch: ChunkBatch) -> None:
+        """Add a written batch to the totals and print throughput."""
+        self.rows += batch.rows
+        self.vectors += len(batch.chunks)
+        self.skipped += batch.skipped
+        self.batches += 1
+        elapsed = max(time.perf_counter() - self.started, 1e-9)
+        print(
+            f"[{batch.source.name}] row {batch.next_row} | "
+            f"{self.rows} docs, {self.vectors} vectors, {self.skipped} already present | "
+            f"{self.rows / elapsed:.1f} docs/s, {self.vectors / elapsed:.1f} vectors/s"
+        )
+
+
+def iter_batches(
+    source: DatasetSource,
+    start_row: int,
+    splitter,
+    batch_size: int,
+) -> Iterator[ChunkBatch]:
+    """Stream dataset rows from ``start_row`` and yield chunk batches of ~``batch_size``."""
+    dataset = load_dataset(source.path, split=source.split, streaming=True)
+    if start_row:
+        dataset = dataset.skip(start_row)
+    if source.limit is not None:
+        dataset = dataset.take(max(0, source.limit - start_row))
+
+    chunks: list[Any] = []
+    rows = 0
+    next_row = start_row
+    for example in dataset:
+        row_chunks = splitter.split_documents([source.to_document(example)])
+        for chunk_index, chunk in enumerate(row_chunks):
+            chunk.metadata["source_row"] = next_row
+            chunk.metadata["chunk_index"] = chunk_index
+        chunks.extend(row_chunks)
+        rows += 1
+        next_row += 1
+        if len(chunks) >= batch_size:
+            yield ChunkBatch(source, chunks, rows, next_row)
+            chunks, rows = [], 0
+
+    if chunks:
+        yield ChunkBatch(source, chunks, rows, next_row)
+
+
+def upsert_batch(client, batch: ChunkBatch, vectors: list[list[float]]) -> None:
+    """Write one embedded batch using the payload layout langchain-qdrant reads."""
+    if not batch.chunks:
+        return
+    client.upsert(
+        collection_name=COLLECTION_NAME,
+        points=[
+            qmodels.PointStruct(
+                id=point_id,
+                vector=vector,
+                payload={"page_content": chunk.page_content, "metadata": chunk.metadata},
+            )
+            for point_id, chunk, vector in zip(batch.ids, batch.chunks, vectors)
+        ],
+        wait=True,
+    )
+
+
+def run_ingestion(  # pylint: disable=too-many-arguments,too-many-locals
+    source_names: list[str] | None = None,
+    *,
+    batch_size: int = 256,
+    encode_workers: int = 2,
+    checkpoint_path: str = INGESTION_CHECKPOINT_PATH,
+    reset: bool = False,
+) -> IngestionStats:
+    """Ingest dataset sources into Qdrant, resuming from the last checkpoint.
+
+    Rows are streamed and chunked lazily. Chunks get content-hash point IDs, so
+    chunks already in the collection are skipped before embedding and re-runs
+    never duplicate vectors. Up to ``encode_workers`` batches are embedded
+    concurrently while earlier batches are upserted in order, and the checkpoint
+    advances only after a batch is durably written. Written chunks, and chunks
+    found already present, are also added to the BM25 lexical index.
+    """
+    embedder = get_embedder()
+    client = get_qdrant_client()
+    get_vectorstore(embedder=embedder, client=client)
+    lexical = LexicalIndex(get_settings().kb_lexical_index_path)
+
+    checkpoint = IngestionCheckpoint(checkpoint_path) if reset else (
+        IngestionCheckpoint.load(checkpoint_path)
+    )
+    splitter = make_text_splitter()
+    stats = IngestionStats()
+
+    def flush(pending: deque) -> None:
+        batch, future = pending.popleft()
+        upsert_batch(client, batch, future.result())
+        lexical.add(batch.lexical_entries())
+        checkpoint.update(batch.source.name, batch.next_row)
+        stats.record(batch)
+
+    with ThreadPoolExecutor(max_workers=encode_workers) as pool:
+        for name in source_names or list(SOURCES):
+            source = SOURCES[name]
+            start_row = checkpoint.rows_done.get(source.name, 0)
+            print(f"Ingesting {source.name} from row {start_row}")
+
+            pending: deque = deque()
+            for batch in iter_batches(source, start_row, splitter, batch_size):
+                present = existing_point_ids(client, batch.ids)
+                # Backfills the lexical index for collections built before it existed.
+                lexical.add(batch.lexical_entries(present))
+                batch.drop_existing(present)
+                texts = [chunk.page_content for chunk in batch.chunks]
+                pending.append((batch, pool.submit(embedder.embed_documents, texts)))
+                if len(pending) > encode_workers:
+                    flush(pending)
+
+            while pending:
+                flush(pending)
+
+    print(
+        f"Ingestion complete: {stats.rows} docs, {stats.vectors} vectors added, "
+        f"{stats.skipped} already present in {time.perf_counter() - stats.started:.1f}s"
+    )
+    return stats
+
+
+def remove_source(
+    source_name: str,
+    checkpoint_path: str = INGESTION_CHECKPOINT_PATH,
+) -> None:
+    """Delete one dataset source from Qdrant and the lexical index and forget its checkpoint."""
+    delete_dataset_points(get_qdrant_client(), source_name)
+    LexicalIndex(get_settings().kb_lexical_index_path).remove_dataset(source_name)
+    checkpoint = IngestionCheckpoint.load(checkpoint_path)
+    if source_name in checkpoint.rows_done:
+        checkpoint.rows_done.pop(source_name)
+        checkpoint.save()
+    print(f"Removed {source_name} from {COLLECTION_NAME}.")
+
+
+def rebuild_lexical_index() -> int:
+    """Rebuild the BM25 lexical index from every chunk stored in Qdrant."""
+    index = LexicalIndex(get_settings().kb_lexical_index_path)
+    total = rebuild_from_collection(get_qdrant_client(), index)
+    print(f"Indexed {total} chunks from {COLLECTION_NAME} in {index.path}.")
+    return total
+
+
+def main(argv: list[str] | None = None) -> None:
+    """Command-line entry point for knowledge base ingestion."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--source",
+        action="append",
+        choices=sorted(SOURCES),
+        help="Dataset source to ingest; repeat for several. Defaults to all sources.",
+    )
+    parser.add_argument("--batch-size", type=int, default=256, help="Chunks per embedding batch.")
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=2,
+        help="Batches embedded concurrently on worker threads.",
+    )
+    parser.add_argument(
+        "--checkpoint",
+        default=INGESTION_CHECKPOINT_PATH,
+        help="Checkpoint file used to resume interrupted runs.",
+    )
+    parser.add_argument(
+        "--reset",
+        action="store_true",
+        help="Ignore the existing checkpoint and start from the first row.",
+    )
+    parser.add_argument(
+        "--remove",
+        choices=sorted(SOURCES),
+        help="Delete a dataset source from the collection instead of ingesting.",
+    )
+    parser.add_argument(
+        "--rebuild-lexical",
+        action="store_true",
+        help="Rebuild the BM25 lexical index from the collection instead of ingesting.",
+    )
+    args = parser.parse_args(argv)
+
+    if args.remove:
+        remove_source(args.remove, checkpoint_path=args.checkpoint)
+        return
+    if args.rebuild_lexical:
+        rebuild_lexical_index()
+        return
+
+    run_ingestion(
+        args.source,
+        batch_size=max(1, args.batch_size),
+        encode_workers=max(1, args.workers),
+        checkpoint_path=args.checkpoint,
+        reset=args.reset,
+    )
+
+
+if __name__ == "__main__":
+    main()
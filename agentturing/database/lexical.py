@@ -0,0 +1,236 @@
+"""BM25 index of knowledge base chunks with math-aware tokenization.
+
+MiniLM embeds formulas poorly: ``x^3 - 3x^2 + 2`` and ``x^2 - 3x + 2`` land
+close together, and exact numbers barely move a vector. This index keeps the
+same chunks as ``math_combined`` in a SQLite FTS5 table, keyed by Qdrant point
+ID, with tokens that preserve what matters in math text: monomials such as
+``3x^2`` and ``x^2``, numbers including decimals, and LaTeX command names.
+
+It is filled during ingestion and can be rebuilt from the collection with
+``agentturing-ingest --rebuild-lexical``.
+"""
+
+import json
+import os
+import re
+import sqlite3
+import threading
+from collections.abc import Iterable
+from dataclasses import dataclass, field
+from typing import Any
+
+from qdrant_client.http import models as qmodels
+
+from agentturing.constants import COLLECTION_NAME
+
+# Query tokens beyond this are ignored to keep BM25 lookups short.
+MAX_QUERY_TOKENS = 32
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS chunks (
+    id INTEGER PRIMARY KEY,
+    point_id TEXT NOT NULL UNIQUE,
+    dataset TEXT,
+    content TEXT NOT NULL,
+    metadata TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS chunks_dataset ON chunks (dataset);
+CREATE VIRTUAL TABLE IF NOT EXISTS chunk_terms USING fts5(
+    terms, tokenize = "unicode61 tokenchars '^.'"
+);
+"""
+
+_BRACED_EXPONENT = re.compile(r"\^\s*\{\s*([a-z0-9.]+)\s*\}")
+_LATEX_COMMAND = re.compile(r"\\([a-z]+)")
+_MONOMIAL = re.compile(
+    r"(?<![a-z0-9.])(\d+(?:\.\d+)?)?([a-z])(?:\s*\^\s*(\d+(?:\.\d+)?|[a-z]))?(?![a-z])"
+)
+_WORD = re.compile(r"\d+(?:\.\d+)?|[a-z]+")
+_MATH_HINT = re.compile(r"\d|[\^=+*/<>]|\\[A-Za-z]")
+# LaTeX layout commands that say nothing about the content.
+_LATEX_LAYOUT = frozenset(
+    {
+        "left", "right", "big", "bigl", "bigr", "quad", "qquad", "displaystyle",
+        "text", "textbf", "mathrm", "mathbf", "operatorname", "begin", "end",
+    }
+)
+_STOPWORDS = frozenset(
+    {
+        "a", "an", "and", "are", "as", "at", "be", "by", "can", "do", "does", "find",
+        "for", "from", "how", "i", "if", "in", "is", "it", "its", "of", "on", "or",
+        "so", "that", "the", "then", "this", "to", "we", "what", "when", "which",
+        "with", "you",
+    }
+)
+
+
+def math_tokens(text: str) -> list[str]:
+    """Split ``text`` into BM25 terms, keeping monomials, numbers and LaTeX commands.
+
+    ``3x^2`` yields ``3x^2`` and ``x^2`` next to ``3``, ``x`` and ``2``;
+    ``x^{10}`` and ``x**10`` are read as ``x^10``; ``\\frac`` becomes ``frac``.
+    Common English words and LaTeX layout commands are dropped.
+    """
+    text = text.lower().replace("**", "^")
+    text = _BRACED_EXPONENT.sub(r"^\1", text)
+    tokens = []
+    for match in _LATEX_COMMAND.finditer(text):
+        if match.group(1) not in _LATEX_LAYOUT:
+            tokens.append(match.group(1))
+    text = _LATEX_COMMAND.sub(" ", text)
+    for coefficient, variable, exponent in _MONOMIAL.findall(text):
+        if exponent:
+            tokens.append(f"{variable}^{exponent}")
+            if coefficient:
+                tokens.append(f"{coefficient}{variable}^{exponent}")
+        elif coefficient:
+            tokens.append(f"{coefficient}{variable}")
+    tokens.extend(word for word in _WORD.findall(text) if word not in _STOPWORDS)
+    return tokens
+
+
+def has_math(query: str) -> bool:
+    """Return whether ``query`` contains numbers, operators or LaTeX."""
+    return _MATH_HINT.search(query) is not None
+
+
+@dataclass
+class LexicalHit:
+    """One BM25 match; higher ``score`` is better."""
+
+    point_id: str
+    content: str
+    score: float
+    metadata: dict[str, Any] = field(default_factory=dict)
+
+
+class LexicalIndex:
+    """SQLite FTS5 index of knowledge base chunks, keyed by Qdrant point ID.
+
+    Each thread gets its own connection, so searches can run on the retrieval
+    thread pool; writes are serialized. Searching an index file that does not
+    exist returns None instead of creating it.
+    """
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self._local = threading.local()
+        self._write_lock = threading.Lock()
+
+    def _connect(self) -> sqlite3.Connection:
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            connection = sqlite3.connect(self.path)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.executescript(_SCHEMA)
+            self._local.connection = connection
+        return connection
+
+    def exists(self) -> bool:
+        """Return whether the index file has been created."""
+        return os.path.exists(self.path)
+
+    def add(self, entries: Iterable[tuple[str, str, dict[str, Any]]]) -> int:
+        """Index ``(point_id, content, metadata)`` entries not indexed yet; return how many."""
+        added = 0
+        with self._write_lock:
+            connection = self._connect()
+            with connection:
+                for point_id, content, metadata in entries:
+                    cursor = connection.execute(
+                        "INSERT OR IGNORE INTO chunks (point_id, dataset, content, metadata) "
+                        "VALUES (?, ?, ?, ?)",
+                        (point_id, metadata.get("dataset"), content, json.dumps(metadata)),
+                    )
+                    if cursor.rowcount:
+                        connection.execute(
+                            "INSERT INTO chunk_terms (rowid, terms) VALUES (?, ?)",
+                            (cursor.lastrowid, " ".join(math_tokens(content))),
+                        )
+                        added += 1
+        return added
+
+    def remove_dataset(self, dataset: str) -> None:
+        """Drop every chunk of one dataset source."""
+        with self._write_lock:
+            connection = self._connect()
+            with connection:
+                connection.execute(
+                    "DELETE FROM chunk_terms WHERE rowid IN "
+                    "(SELECT id FROM chunks WHERE dataset = ?)",
+                    (dataset,),
+                )
+                connection.execute("DELETE FROM chunks WHERE dataset = ?", (dataset,))
+
+    def clear(self) -> None:
+        """Drop every indexed chunk."""
+        with self._write_lock:
+            connection = self._connect()
+            with connection:
+                connection.execute("DELETE FROM chunk_terms")
+                connection.execute("DELETE FROM chunks")
+
+    def count(self) -> int:
+        """Return how many chunks are indexed."""
+        return self._connect().execute("SELECT COUNT(*) FROM chunks").fetchone()[0]
+
+    def search(
+        self,
+        query: str,
+        limit: int,
+        filters: dict[str, str] | None = None,
+    ) -> list[LexicalHit] | None:
+        """Return the best BM25 matches for ``query``, or None if there is no index.
+
+        ``filters`` matches chunk metadata fields exactly, like the Qdrant filter.
+        """
+        if not self.exists():
+            return None
+        terms = list(dict.fromkeys(math_tokens(query)))[:MAX_QUERY_TOKENS]
+        if not terms:
+            return []
+        sql = (
+            "SELECT c.point_id, c.content, c.metadata, bm25(chunk_terms) AS rank "
+            "FROM chunk_terms JOIN chunks c ON c.id = chunk_terms.rowid "
+            "WHERE chunk_terms MATCH ?"
+        )
+        params: list[Any] = [" OR ".join(f'"{term}"' for term in terms)]
+        for key, value in (filters or {}).items():
+            sql += " AND json_extract(c.metadata, ?) = ?"
+            params += [f'$."{key}"', value]
+        sql += " ORDER BY rank LIMIT ?"
+        params.append(limit)
+        return [
+            LexicalHit(point_id, content, -rank, json.loads(metadata))
+            for point_id, content, metadata, rank in self._connect().execute(sql, params)
+        ]
+
+
+def rebuild_from_collection(client, index: LexicalIndex, batch_size: int = 1000) -> int:
+    """Re-index every chunk stored in ``math_combined``; return how many were indexed."""
+    index.clear()
+    if not client.collection_exists(collection_name=COLLECTION_NAME):
+        return 0
+    total = 0
+    offset: qmodels.ExtendedPointId | None = None
+    while True:
+        points, offset = client.scroll(
+            collection_name=COLLECTION_NAME,
+            limit=batch_size,
+            offset=offset,
+            with_payload=True,
+            with_vectors=False,
+        )
+        total += index.add(
+            (
+                str(point.id),
+                (point.payload or {}).get("page_content", ""),
+                (point.payload or {}).get("metadata") or {},
+            )
+            for point in points
+        )
+        if offset is None:
+            return total
@@ -0,0 +1,336 @@
+"""Non-blocking retrieval over the math knowledge base for the agent runtime."""
+
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any
+
+import numpy as np
+from qdrant_client import AsyncQdrantClient
+from qdrant_client.http import models as qmodels
+
+from agentturing.constants import COLLECTION_NAME
+from agentturing.database.lexical import LexicalHit, LexicalIndex, has_math
+from agentturing.database.vectorstore import get_qdrant_client, tune_served_collection
+from agentturing.model.embedding_batcher import EmbeddingBatcher
+from agentturing.model.embeddings import get_embedder
+from agentturing.utils.metrics import METRICS
+
+RETRIEVAL_MODES = ("dense", "hybrid", "auto")
+
+HYBRID_SEARCHES = METRICS.counter(
+    "agentturing_kb_hybrid_searches_total",
+    "Hybrid knowledge base searches by outcome (fused, over_budget, no_index, error).",
+    ("outcome",),
+)
+LEXICAL_SECONDS = METRICS.histogram(
+    "agentturing_kb_lexical_seconds",
+    "Duration of BM25 lookups in the lexical index.",
+)
+LEXICAL_ONLY_HITS = METRICS.counter(
+    "agentturing_kb_lexical_only_hits_total",
+    "Fused results that BM25 found and the vector search did not.",
+)
+
+
+@dataclass
+class RetrievedChunk:
+    """One knowledge base hit returned by an async search.
+
+    ``score`` is the cosine similarity to the query. Hybrid searches also set
+    ``rank_score``, the reciprocal rank fusion score scaled so that a chunk
+    ranked first by both retrievers scores 1, and return chunks in that order.
+    """
+
+    content: str
+    score: float
+    metadata: dict[str, Any] = field(default_factory=dict)
+    rank_score: float | None = None
+
+
+def reciprocal_rank_fusion(rankings: list[list[str]], k: int = 60) -> dict[str, float]:
+    """Fuse ranked ID lists into scores scaled so first place in every list scores 1."""
+    scores: dict[str, float] = {}
+    for ranking in rankings:
+        for rank, item in enumerate(ranking, start=1):
+            scores[item] = scores.get(item, 0.0) + 1.0 / (k + rank)
+    best = len(rankings) / (k + 1)
+    return {item: score / best for item, score in scores.items()}
+
+
+def _chunk_from_point(point: Any) -> RetrievedChunk:
+    payload = point.payload or {}
+    return RetrievedChunk(
+        content=payload.get("page_content", ""),
+        score=float(point.score),
+        metadata=payload.get("metadata") or {},
+    )
+
+
+class AsyncKnowledgeBase:
+    """Search Qdrant without blocking the event loop.
+
+    Embedding always runs on a bounded thread pool. A remote Qdrant is queried
+    through ``AsyncQdrantClient``; the on-disk local mode computes searches on the
+    calling thread even through the async client, so it is queried on the same
+    pool with the sync client instead. A semaphore caps concurrent retrievals.
+    With ``batch_max_size`` above one, concurrent query embeddings are
+    micro-batched into single model calls.
+
+    With a ``lexical_index``, hybrid searches also run a BM25 lookup on the pool
+    while the query is embedded, and fuse both rankings by reciprocal rank.
+    The dense results are never held back more than ``hybrid_budget`` seconds
+    waiting for the lexical side.
+    """
+
+    def __init__(  # pylint: disable=too-many-arguments
+        self,
+        max_concurrency: int = 4,
+        worker_threads: int = 2,
+        qdrant_url: str | None = None,
+        search_params: qmodels.SearchParams | None = None,
+        batch_max_size: int = 32,
+        batch_max_wait: float = 0.002,
+        lexical_index: LexicalIndex | None = None,
+        retrieval_mode: str = "auto",
+        hybrid_candidates: int = 20,
+        hybrid_budget: float = 0.05,
+        rrf_k: int = 60,
+    ) -> None:
+        self._qdrant_url = qdrant_url
+        self._search_params = search_params
+        self._lexical = lexical_index
+        self.retrieval_mode = retrieval_mode
+        self._hybrid_candidates = hybrid_candidates
+        self._hybrid_budget = hybrid_budget
+        self._rrf_k = rrf_k
+        self._executor = ThreadPoolExecutor(
+            max_workers=worker_threads,
+            thread_name_prefix="kb-worker",
+        )
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self._init_lock = asyncio.Lock()
+        self._embedder = None
+        self._client = None
+        self._batcher = None
+        if batch_max_size > 1:
+            self._batcher = EmbeddingBatcher(
+                self.embed_queries,
+                max_batch=batch_max_size,
+                max_wait=batch_max_wait,
+            )
+
+    async def _run_in_pool(self, func, *args):
+        """Run a blocking callable on the retrieval thread pool."""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, func, *args)
+
+    def _open_client(self):
+        """Open the Qdrant client that matches the configured deployment."""
+        if self._qdrant_url:
+            return AsyncQdrantClient(url=self._qdrant_url)
+        return get_qdrant_client()
+
+    async def ensure_ready(self) -> None:
+        """Load the embedder and open Qdrant once, off the event loop."""
+        if self._embedder is not None and self._client is not None:
+            return
+
+        async with self._init_lock:
+            if self._embedder is None:
+                self._embedder = await self._run_in_pool(get_embedder)
+            if self._client is None:
+                self._client = await self._run_in_pool(self._open_client)
+                try:
+                    await self._run_in_pool(tune_served_collection)
+                except Exception as exc:  # pylint: disable=broad-exception-caught
+                    print(f"Qdrant collection tuning failed, serving as is: {exc}")
+
+    async def embed_query(self, query: str) -> list[float]:
+        """Embed a single query on the retrieval thread pool, batched with concurrent ones."""
+        if self._batcher is not None:
+            return await self._batcher.embed(query)
+        await self.ensure_ready()
+        return await self._run_in_pool(self._embedder.embed_query, query)
+
+    async def embed_queries(self, texts: list[str]) -> list[list[float]]:
+        """Embed several queries in one model call on the retrieval thread pool."""
+        await self.ensure_ready()
+        # Without the cache wrapper, MiniLM embeds queries and documents the same way.
+        embed = getattr(self._embedder, "embed_queries", self._embedder.embed_documents)
+        return await self._run_in_pool(embed, texts)
+
+    async def embed_documents(self, texts: list[str]) -> list[list[float]]:
+        """Embed a batch of texts on the retrieval thread pool."""
+        await self.ensure_ready()
+        return await self._run_in_pool(self._embedder.embed_documents, texts)
+
+    async def _query_points(
+        self,
+        vector: list[float],
+        top_k: int,
+        query_filter: qmodels.Filter | None,
+    ):
+        """Run a nearest-neighbour query against the configured collection."""
+        query = {
+            "collection_name": COLLECTION_NAME,
+            "query": vector,
+            "limit": top_k,
+            "query_filter": query_filter,
+            "search_params": self._search_params,
+            "with_payload": True,
+        }
+        if self._qdrant_url:
+            if not await self._client.collection_exists(collection_name=COLLECTION_NAME):
+                return []
+            response = await self._client.query_points(**query)
+            return response.points
+
+        def _search():
+            if not self._client.collection_exists(collection_name=COLLECTION_NAME):
+                return []
+            return self._client.query_points(**query).points
+
+        return await self._run_in_pool(_search)
+
+    async def _point_vectors(self, ids: list[str]) -> dict[str, list[float]]:
+        """Fetch the stored vectors of the given points."""
+        query = {
+            "collection_name": COLLECTION_NAME,
+            "ids": ids,
+            "with_payload": False,
+            "with_vectors": True,
+        }
+        if self._qdrant_url:
+            points = await self._client.retrieve(**query)
+        else:
+            points = await self._run_in_pool(lambda: self._client.retrieve(**query))
+        return {str(point.id): point.vector for point in points}
+
+    def _lexical_search(self, query: str, limit: int, filters: dict[str, str] | None):
+        started = time.perf_counter()
+        hits = self._lexical.search(query, limit, filters)
+        LEXICAL_SECONDS.observe(time.perf_counter() - started)
+        return hits
+
+    def _uses_hybrid(self, query: str, mode: str | None) -> bool:
+        mode = mode if mode in RETRIEVAL_MODES else self.retrieval_mode
+        if self._lexical is None or mode == "dense":
+            return False
+        return mode == "hybrid" or has_math(query)
+
+    async def _fuse(
+        self,
+        points: list[Any],
+        lexical: asyncio.Future,
+        vector: list[float],
+        top_k: int,
+    ) -> list[RetrievedChunk] | None:
+        """Fuse dense points with the BM25 hits, or return None to keep dense results."""
+        try:
+            async with asyncio.timeout(self._hybrid_budget):
+                hits: list[LexicalHit] | None = await lexical
+                if hits is None:
+                    HYBRID_SEARCHES.inc(outcome="no_index")
+                    return None
+                dense = {str(point.id): point for point in points}
+                sparse = {hit.point_id: hit for hit in hits}
+                fused = reciprocal_rank_fusion([list(dense), list(sparse)], k=self._rrf_k)
+                ranked = sorted(fused, key=fused.get, reverse=True)[:top_k]
+                missing = [point_id for point_id in ranked if point_id not in dense]
+                vectors = await self._point_vectors(missing) if missing else {}
+        except TimeoutError:
+            HYBRID_SEARCHES.inc(outcome="over_budget")
+            return None
+        except Exception as exc:  # pylint: disable=broad-exception-caught
+            print(f"Hybrid knowledge base search failed, using vector results: {exc}")
+            HYBRID_SEARCHES.inc(outcome="error")
+            return None
+
+        query_vector = np.asarray(vector, dtype=np.float32)
+        query_vector /= np.linalg.norm(query_vector) or 1.0
+        chunks = []
+        for point_id in ranked:
+            if point_id in dense:
+                chunk = _chunk_from_point(dense[point_id])
+            elif point_id in vectors:
+                # Scored like a vector hit, so similarity thresholds still apply.
+                stored = np.asarray(vectors[point_id], dtype=np.float32)
+                similarity = float(stored @ query_vector / (np.linalg.norm(stored) or 1.0))
+                hit = sparse[point_id]
+                chunk = RetrievedChunk(hit.content, similarity, hit.metadata)
+                LEXICAL_ONLY_HITS.inc()
+            else:
+                # Indexed but no longer in the collection.
+                continue
+            chunk.rank_score = round(fused[point_id], 4)
+            chunks.append(chunk)
+        HYBRID_SEARCHES.inc(outcome="fused")
+        return chunks
+
+    async def search(  # pylint: disable=too-many-arguments
+        self,
+        query: str,
+        top_k: int = 4,
+        filters: dict[str, str] | None = None,
+        vector: list[float] | None = None,
+        mode: str | None = None,
+    ) -> list[RetrievedChunk]:
+        """Return the closest knowledge base chunks for a query.
+
+        ``filters`` restricts hits by metadata, e.g. ``{"dataset": "MetaMathQA"}``;
+        the indexed ``dataset`` and ``problem_type`` fields keep this fast.
+        Pass ``vector`` when the query embedding is already known. ``mode`` is
+        ``dense`` for vector search only, ``hybrid`` to fuse it with BM25, or
+        ``auto`` for hybrid on queries with numbers, operators or LaTeX; it
+        defaults to the knowledge base's ``retrieval_mode``.
+        """
+        query_filter = None
+        if filters:
+            query_filter = qmodels.Filter(
+                must=[
+                    qmodels.FieldCondition(
+                        key=f"metadata.{key}",
+                        match=qmodels.MatchValue(value=value),
+                    )
+                    for key, value in filters.items()
+                ]
+            )
+
+        hybrid = self._uses_hybrid(query, mode)
+        limit = max(top_k, self._hybrid_candidates) if hybrid else top_k
+        lexical = None
+        async with self._semaphore:
+            if hybrid:
+                lexical = asyncio.ensure_future(
+                    self._run_in_pool(self._lexical_search, query, limit, filters)
+                )
+            try:
+                if vector is None:
+                    vector = await self.embed_query(query)
+                else:
+                    await self.ensure_ready()
+                points = await self._query_points(vector, limit, query_filter)
+                if lexical is not None:
+                    fused = await self._fuse(points, lexical, vector, top_k)
+                    if fused is not None:
+                        return fused
+            finally:
+                if lexical is not None:
+                    lexical.cancel()
+                    if lexical.done() and not lexical.cancelled():
+                        lexical.exception()
+
+        return [_chunk_from_point(point) for point in points[:top_k]]
+
+    async def aclose(self) -> None:
+        """Close the Qdrant client and release the retrieval thread pool."""
+        if self._batcher is not None:
+            self._batcher.close()
+        if self._client is not None:
+            result = self._client.close()
+            if asyncio.iscoroutine(result):
+                await result
+            self._client = None
+        self._executor.shutdown(wait=False)
@@ -0,0 +1,294 @@
+"""Shared embedding and retrieval process for multi-worker deployments.
+
+Each uvicorn worker would otherwise load its own copy of torch, the embedding
+model and Qdrant, and the embedded local Qdrant store refuses a second process.
+The sidecar runs one ``AsyncKnowledgeBase`` and answers newline-delimited JSON
+requests over a Unix socket. Workers set ``KB_SIDECAR_SOCKET`` and use
+``KnowledgeBaseClient``, which has the same async interface.
+
+Query embeddings from every worker, including the ones behind ``search``, go
+through the knowledge base's micro-batcher, so concurrent requests from
+different workers share one model call.
+
+    uv run python -m agentturing.database.sidecar --socket agentturing/database/kb_sidecar.sock
+"""
+
+import argparse
+import asyncio
+import itertools
+import json
+import os
+import signal
+from dataclasses import asdict
+from typing import Any
+
+from agentturing.config import get_settings
+from agentturing.constants import KB_SIDECAR_SOCKET_PATH
+from agentturing.database.lexical import LexicalIndex
+from agentturing.database.retrieval import AsyncKnowledgeBase, RetrievedChunk
+from agentturing.database.vectorstore import build_search_params
+
+# Room for a batch of document embeddings in one line.
+_STREAM_LIMIT = 64 * 1024 * 1024
+
+
+class KnowledgeBaseSidecarError(RuntimeError):
+    """Raised when the sidecar is unreachable or reports a failed request."""
+
+
+class KnowledgeBaseServer:
+    """Serve one ``AsyncKnowledgeBase`` to many worker processes."""
+
+    def __init__(self, knowledge_base: AsyncKnowledgeBase) -> None:
+        self.knowledge_base = knowledge_base
+
+    async def handle(self, request: dict[str, Any]) -> Any:
+        """Run one request and return its JSON-serializable result."""
+        op = request.get("op")
+        if op == "ping":
+            await self.knowledge_base.ensure_ready()
+            return "ok"
+        if op == "embed_query":
+            return await self.knowledge_base.embed_query(request["text"])
+        if op == "embed_documents":
+            return await self.knowledge_base.embed_documents(request["texts"])
+        if op == "search":
+            chunks = await self.knowledge_base.search(
+                request["query"],
+                top_k=request.get("top_k", 4),
+                filters=request.get("filters"),
+                vector=request.get("vector"),
+                mode=request.get("mode"),
+            )
+            return [asdict(chunk) for chunk in chunks]
+        raise ValueError(f"Unknown sidecar operation {op!r}.")
+
+    @staticmethod
+    async def _reply(writer: asyncio.StreamWriter, reply: dict[str, Any]) -> None:
+        writer.write(json.dumps(reply).encode("utf-8") + b"\n")
+        await writer.drain()
+
+    async def _respond(self, request: dict[str, Any], writer: asyncio.StreamWriter) -> None:
+        try:
+            reply = {"id": request.get("id"), "result": await self.handle(request)}
+        except Exception as exc:  # pylint: disable=broad-exception-caught
+            reply = {"id": request.get("id"), "error": f"{type(exc).__name__}: {exc}"}
+        await self._reply(writer, reply)
+
+    async def serve_connection(
+        self,
+        reader: asyncio.StreamReader,
+        writer: asyncio.StreamWriter,
+    ) -> None:
+        """Answer one worker's pipelined requests concurrently, in completion order.
+
+        A line that is too long or not a JSON object gets an error reply without
+        an id, and the connection keeps serving the following lines.
+        """
+        tasks: set[asyncio.Task] = set()
+        try:
+            while True:
+                try:
+                    line = await reader.readline()
+                    if not line:
+                        break
+                    request = json.loads(line)
+                    if not isinstance(request, dict):
+                        raise ValueError("request is not a JSON object")
+                except ValueError as exc:
+                    # readline raises ValueError for a line over the limit, after dropping it.
+                    await self._reply(writer, {"id": None, "error": f"Bad request: {exc}"})
+                    continue
+                task = asyncio.create_task(self._respond(request, writer))
+                tasks.add(task)
+                task.add_done_callback(tasks.discard)
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            for task in tasks:
+                task.cancel()
+            writer.close()
+
+    async def aclose(self) -> None:
+        """Release the knowledge base."""
+        await self.knowledge_base.aclose()
+
+
+class KnowledgeBaseClient:
+    """``AsyncKnowledgeBase`` stand-in that forwards every call to the sidecar.
+
+    One connection per process carries all requests; replies are matched to
+    callers by request id, so concurrent searches do not wait on each other.
+    """
+
+    def __init__(self, socket_path: str) -> None:
+        self._socket_path = socket_path
+        self._ids = itertools.count(1)
+        self._pending: dict[int, asyncio.Future] = {}
+        self._connect_lock = asyncio.Lock()
+        self._writer: asyncio.StreamWriter | None = None
+        self._reader_task: asyncio.Task | None = None
+
+    async def _connect(self) -> asyncio.StreamWriter:
+        if self._writer is not None:
+            return self._writer
+
+        async with self._connect_lock:
+            if self._writer is None:
+                try:
+                    reader, writer = await asyncio.open_unix_connection(
+                        self._socket_path, limit=_STREAM_LIMIT
+                    )
+                except OSError as exc:
+                    raise KnowledgeBaseSidecarError(
+                        f"Knowledge base sidecar at {self._socket_path} is unreachable: {exc}"
+                    ) from exc
+                self._writer = writer
+                self._reader_task = asyncio.create_task(self._read_replies(reader, writer))
+        return self._writer
+
+    async def _read_replies(
+        self,
+        reader: asyncio.StreamReader,
+        writer: asyncio.StreamWriter,
+    ) -> None:
+        try:
+            while line := await reader.readline():
+                reply = json.loads(line)
+                future = self._pending.pop(reply.get("id"), None)
+                if future is None or future.done():
+                    continue
+                if "error" in reply:
+                    future.set_exception(KnowledgeBaseSidecarError(reply["error"]))
+                else:
+                    future.set_result(reply["result"])
+        except (ConnectionError, ValueError):
+            pass
+        finally:
+            # Fail everything still waiting; the next call reconnects.
+            if self._writer is writer:
+                self._writer = None
+            writer.close()
+            pending, self._pending = self._pending, {}
+            for future in pending.values():
+                if not future.done():
+                    future.set_exception(
+                        KnowledgeBaseSidecarError("Knowledge base sidecar connection closed.")
+                    )
+
+    async def _call(self, op: str, **payload: Any) -> Any:
+        writer = await self._connect()
+        request_id = next(self._ids)
+        future = asyncio.get_running_loop().create_future()
+        self._pending[request_id] = future
+        try:
+            request = {"id": request_id, "op": op, **payload}
+            writer.write(json.dumps(request).encode("utf-8") + b"\n")
+            await writer.drain()
+            return await future
+        finally:
+            self._pending.pop(request_id, None)
+
+    async def ensure_ready(self) -> None:
+        """Wait until the sidecar has loaded the embedder and opened Qdrant."""
+        await self._call("ping")
+
+    async def embed_query(self, query: str) -> list[float]:
+        """Embed a single query in the sidecar."""
+        return await self._call("embed_query", text=query)
+
+    async def embed_documents(self, texts: list[str]) -> list[list[float]]:
+        """Embed a batch of texts in the sidecar."""
+        return await self._call("embed_documents", texts=texts)
+
+    async def search(  # pylint: disable=too-many-arguments
+        self,
+        query: str,
+        top_k: int = 4,
+        filters: dict[str, str] | None = None,
+        vector: list[float] | None = None,
+        mode: str | None = None,
+    ) -> list[RetrievedChunk]:
+        """Return the closest knowledge base chunks for a query from the sidecar."""
+        items = await self._call(
+            "search", query=query, top_k=top_k, filters=filters, vector=vector, mode=mode
+        )
+        return [RetrievedChunk(**item) for item in items]
+
+    async def aclose(self) -> None:
+        """Close the connection to the sidecar."""
+        if self._reader_task is not None:
+            self._reader_task.cancel()
+            self._reader_task = None
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
+
+
+def build_local_knowledge_base(settings=None) -> AsyncKnowledgeBase:
+    """Create the in-process knowledge base for the sidecar or a single API process."""
+    settings = settings or get_settings()
+    return AsyncKnowledgeBase(
+        max_concurrency=settings.kb_max_concurrency,
+        worker_threads=settings.kb_worker_threads,
+        qdrant_url=settings.qdrant_url,
+        search_params=build_search_params(settings),
+        batch_max_size=settings.embedding_batch_max_size,
+        batch_max_wait=settings.embedding_batch_max_wait_ms / 1000,
+        lexical_index=LexicalIndex(settings.kb_lexical_index_path),
+        retrieval_mode=settings.kb_retrieval_mode,
+        hybrid_candidates=settings.kb_hybrid_candidates,
+        hybrid_budget=settings.kb_hybrid_budget_ms / 1000,
+        rrf_k=settings.kb_rrf_k,
+    )
+
+
+async def serve(socket_path: str, warm_up: bool = True) -> None:
+    """Serve the knowledge base on ``socket_path`` until SIGINT or SIGTERM."""
+    server = KnowledgeBaseServer(build_local_knowledge_base())
+    if warm_up:
+        # Load the model before accepting connections so workers never see a cold start.
+        try:
+            await server.knowledge_base.embed_query("warm up")
+            await server.knowledge_base.search("warm up", top_k=1)
+        except Exception as exc:  # pylint: disable=broad-exception-caught
+            print(f"Warm-up of the knowledge base sidecar failed: {exc}")
+
+    if os.path.exists(socket_path):
+        os.unlink(socket_path)
+    listener = await asyncio.start_unix_server(
+        server.serve_connection, path=socket_path, limit=_STREAM_LIMIT
+    )
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for signum in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(signum, stop.set)
+    print(f"Knowledge base sidecar listening on {socket_path}")
+    try:
+        async with listener:
+            await stop.wait()
+    finally:
+        await server.aclose()
+        if os.path.exists(socket_path):
+            os.unlink(socket_path)
+
+
+def main(argv: list[str] | None = None) -> None:
+    """Command-line entry point for the knowledge base sidecar."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--socket",
+        default=get_settings().kb_sidecar_socket or KB_SIDECAR_SOCKET_PATH,
+        help="Unix socket path to listen on.",
+    )
+    parser.add_argument(
+        "--no-warm-up",
+        action="store_true",
+        help="Load the embedder and Qdrant on the first request instead of at startup.",
+    )
+    args = parser.parse_args(argv)
+    asyncio.run(serve(args.socket, warm_up=not args.no_warm_up))
+
+
+if __name__ == "__main__":
+    main()
@@ -5,16 +5,164 @@ from qdrant_client import QdrantClient
 
 from qdrant_client.http import models as qmodels
 
+from agentturing.config import get_settings
 from agentturing.constants import QDRANT_PATH, COLLECTION_NAME
 from agentturing.model.embeddings import get_embedder
 
+PAYLOAD_INDEXES = ("metadata.dataset", "metadata.problem_type")
+
 
 def get_qdrant_client():
-    """Create a local filesystem-backed Qdrant client."""
+    """Create a Qdrant client for the configured server, or the local filesystem store."""
     print("Connecting to QDrant")
+    settings = get_settings()
+    if settings.qdrant_url:
+        return QdrantClient(url=settings.qdrant_url)
     return QdrantClient(path=QDRANT_PATH)
 
 
+def build_hnsw_config(settings):
+    """Return the HNSW index parameters from settings."""
+    return qmodels.HnswConfigDiff(
+        m=settings.qdrant_hnsw_m,
+        ef_construct=settings.qdrant_hnsw_ef_construct,
+    )
+
+
+def build_quantization_config(settings):
+    """Return the configured vector quantization, or ``None`` when disabled."""
+    if settings.qdrant_quantization == "scalar":
+        return qmodels.ScalarQuantization(
+            scalar=qmodels.ScalarQuantizationConfig(
+                type=qmodels.ScalarType.INT8,
+                always_ram=True,
+            )
+        )
+    if settings.qdrant_quantization == "binary":
+        return qmodels.BinaryQuantization(
+            binary=qmodels.BinaryQuantizationConfig(always_ram=True)
+        )
+    return None
+
+
+def build_search_params(settings):
+    """Return search-time HNSW and quantization parameters from settings."""
+    quantization = None
+    if settings.qdrant_quantization in {"scalar", "binary"}:
+        quantization = qmodels.QuantizationSearchParams(
+            rescore=settings.qdrant_quantization_rescore,
+            oversampling=settings.qdrant_quantization_oversampling,
+        )
+    return qmodels.SearchParams(
+        hnsw_ef=settings.qdrant_search_ef,
+        quantization=quantization,
+    )
+
+
+def _hnsw_needs_update(current, desired):
+    return current.m != desired.m or current.ef_construct != desired.ef_construct
+
+
+def _quantization_kind(config):
+    if isinstance(config, qmodels.ScalarQuantization):
+        return "scalar"
+    if isinstance(config, qmodels.BinaryQuantization):
+        return "binary"
+    return "none"
+
+
+def apply_collection_tuning(client, settings=None):
+    """Bring an existing collection in line with the configured index settings.
+
+    Only parameters that differ from the live collection are sent, so calling
+    this repeatedly is a no-op once the collection matches the configuration.
+    The embedded local store neither applies nor reports these settings, so
+    without ``QDRANT_URL`` nothing is sent. Returns the updated parameters.
+    """
+    settings = settings or get_settings()
+    if not settings.qdrant_url or not client.collection_exists(collection_name=COLLECTION_NAME):
+        return []
+    info = client.get_collection(collection_name=COLLECTION_NAME)
+    config = info.config
+
+    hnsw = build_hnsw_config(settings)
+    quantization = build_quantization_config(settings)
+    update = {}
+    if _hnsw_needs_update(config.hnsw_config, hnsw):
+        update["hnsw_config"] = hnsw
+    if _quantization_kind(config.quantization_config) != settings.qdrant_quantization:
+        update["quantization_config"] = quantization or qmodels.Disabled.DISABLED
+    if bool(getattr(config.params.vectors, "on_disk", False)) != settings.qdrant_on_disk_vectors:
+        update["vectors_config"] = {
+            "": qmodels.VectorParamsDiff(on_disk=settings.qdrant_on_disk_vectors)
+        }
+    if update:
+        print(f"Updating collection {COLLECTION_NAME}: {', '.join(update)}")
+        client.update_collection(collection_name=COLLECTION_NAME, **update)
+
+    payload_schema = info.payload_schema or {}
+    for field_name in PAYLOAD_INDEXES:
+        if field_name not in payload_schema:
+            client.create_payload_index(
+                collection_name=COLLECTION_NAME,
+                field_name=field_name,
+                field_schema=qmodels.PayloadSchemaType.KEYWORD,
+                wait=True,
+            )
+            update[field_name] = "keyword index"
+    return list(update)
+
+
+def tune_served_collection(settings=None):
+    """Apply the collection tuning once when the API opens a Qdrant server collection."""
+    settings = settings or get_settings()
+    if not settings.qdrant_url:
+        return []
+    client = QdrantClient(url=settings.qdrant_url)
+    try:
+        return apply_collection_tuning(client, settings)
+    finally:
+        client.close()
+
+
+def existing_point_ids(client, ids, batch_size=1000):
+    """Return the subset of point IDs that are already stored in the collection."""
+    if not client.collection_exists(collection_name=COLLECTION_NAME):
+        return set()
+
+    found = set()
+    for start in range(0, len(ids), batch_size):
+        records = client.retrieve(
+            collection_name=COLLECTION_NAME,
+            ids=ids[start:start + batch_size],
+            with_payload=False,
+            with_vectors=False,
+        )
+        found.update(str(record.id) for record in records)
+    return found
+
+
+def delete_dataset_points(client, dataset):
+    """Remove every point that was ingested from the given dataset source."""
+    if not client.collection_exists(collection_name=COLLECTION_NAME):
+        return
+
+    client.delete(
+        collection_name=COLLECTION_NAME,
+        points_selector=qmodels.FilterSelector(
+            filter=qmodels.Filter(
+                must=[
+                    qmodels.FieldCondition(
+                        key="metadata.dataset",
+                        match=qmodels.MatchValue(value=dataset),
+                    )
+                ]
+            )
+        ),
+        wait=True,
+    )
+
+
 def get_vectorstore(embedder=None, client=None):
     """Create or open the configured Qdrant collection for math retrieval."""
     if embedder is None:
@@ -23,15 +171,20 @@ def get_vectorstore(embedder=None, client=None):
         client = get_qdrant_client()
     print("Creating vectorstore")
 
-    embed_dim = len(embedder.embed_query("dimension check"))
+    settings = get_settings()
     if not client.collection_exists(collection_name=COLLECTION_NAME):
-        client.recreate_collection(
+        embed_dim = len(embedder.embed_query("dimension check"))
+        client.create_collection(
             collection_name=COLLECTION_NAME,
             vectors_config=qmodels.VectorParams(
                 size=embed_dim,
                 distance=qmodels.Distance.COSINE,
+                on_disk=settings.qdrant_on_disk_vectors,
             ),
+            hnsw_config=build_hnsw_config(settings),
+            quantization_config=build_quantization_config(settings),
         )
+    apply_collection_tuning(client, settings)
 
     return QdrantVectorStore(
         client=client,
@@ -0,0 +1,108 @@
+"""Dynamic micro-batching of single-text embedding requests."""
+
+import asyncio
+from collections.abc import Awaitable, Callable
+
+from agentturing.utils.metrics import LOOP_LAG_BUCKETS, METRICS
+
+BATCH_SIZE_BUCKETS = (1, 2, 4, 8, 16, 32, 64, 128)
+
+BATCH_SIZE = METRICS.histogram(
+    "agentturing_embedding_batch_size",
+    "Texts embedded per batched model call.",
+    buckets=BATCH_SIZE_BUCKETS,
+)
+QUEUE_WAIT_SECONDS = METRICS.histogram(
+    "agentturing_embedding_queue_wait_seconds",
+    "Time an embedding request waited in the batcher before its batch was sent.",
+    buckets=LOOP_LAG_BUCKETS,
+)
+BATCH_SECONDS = METRICS.histogram(
+    "agentturing_embedding_batch_seconds",
+    "Duration of one batched embedding call.",
+)
+
+
+class EmbeddingBatcher:
+    """Coalesce concurrent ``embed`` calls into batched model calls.
+
+    Requests queue until ``max_batch`` texts are waiting or the oldest has
+    waited ``max_wait`` seconds, then go to ``embed_batch`` together. Each
+    caller gets the vector for its own text. A caller that is cancelled while
+    queued is dropped from the batch.
+    """
+
+    def __init__(
+        self,
+        embed_batch: Callable[[list[str]], Awaitable[list[list[float]]]],
+        max_batch: int = 32,
+        max_wait: float = 0.002,
+    ) -> None:
+        self._embed_batch = embed_batch
+        self.max_batch = max(1, max_batch)
+        self.max_wait = max(0.0, max_wait)
+        self._pending: list[tuple[str, asyncio.Future, float]] = []
+        self._timer: asyncio.TimerHandle | None = None
+        self._tasks: set[asyncio.Task] = set()
+
+    async def embed(self, text: str) -> list[float]:
+        """Queue one text and wait for its vector."""
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((text, future, loop.time()))
+        if len(self._pending) >= self.max_batch:
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.max_wait, self._flush)
+        return await future
+
+    def _flush(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        loop = asyncio.get_running_loop()
+        while self._pending:
+            batch, self._pending = (
+                self._pending[:self.max_batch],
+                self._pending[self.max_batch:],
+            )
+            batch = [item for item in batch if not item[1].done()]
+            if not batch:
+                continue
+            now = loop.time()
+            for _, _, queued in batch:
+                QUEUE_WAIT_SECONDS.observe(now - queued)
+            BATCH_SIZE.observe(len(batch))
+            task = loop.create_task(self._run(batch))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _run(self, batch: list[tuple[str, asyncio.Future, float]]) -> None:
+        started = asyncio.get_running_loop().time()
+        try:
+            vectors = await self._embed_batch([text for text, _, _ in batch])
+        except asyncio.CancelledError:
+            for _, future, _ in batch:
+                future.cancel()
+            raise
+        except Exception as exc:  # pylint: disable=broad-exception-caught
+            for _, future, _ in batch:
+                if not future.done():
+                    future.set_exception(exc)
+            return
+        finally:
+            BATCH_SECONDS.observe(asyncio.get_running_loop().time() - started)
+        for (_, future, _), vector in zip(batch, vectors):
+            if not future.done():
+                future.set_result(vector)
+
+    def close(self) -> None:
+        """Cancel queued requests and batches still running."""
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        for _, future, _ in self._pending:
+            future.cancel()
+        self._pending = []
+        for task in self._tasks:
+            task.cancel()
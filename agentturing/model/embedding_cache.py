@@ -0,0 +1,129 @@
+"""Persistent embedding cache keyed by model name and text hash."""
+
+import hashlib
+import math
+import os
+import sqlite3
+import threading
+from array import array
+
+from langchain_core.embeddings import Embeddings
+
+from agentturing.utils.ttl_cache import TTLCache
+
+
+class CachedEmbeddings(Embeddings):
+    """Wrap an embedder with an in-memory LRU for queries and a SQLite store for documents.
+
+    Document vectors are stored as packed float32 blobs under ``sha256(model,
+    text)``, so a cache file can be shared between ingestion runs and the API
+    process. Queries are only kept in memory, since nearly every one is new.
+    Once the store holds more than ``max_rows`` vectors, the oldest are pruned.
+    """
+
+    def __init__(  # pylint: disable=too-many-arguments
+        self,
+        embedder: Embeddings,
+        model_name: str,
+        path: str,
+        query_cache_size: int = 4096,
+        max_rows: int = 200_000,
+    ) -> None:
+        self.embedder = embedder
+        self.model_name = model_name
+        self.max_rows = max(1, max_rows)
+        self._queries = TTLCache(maxsize=query_cache_size, ttl=math.inf)
+        self._lock = threading.Lock()
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS embeddings (key TEXT PRIMARY KEY, vector BLOB NOT NULL)"
+        )
+        self._db.commit()
+        self._rows = self._db.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+
+    def _key(self, text: str) -> str:
+        return hashlib.sha256(f"{self.model_name}\x00{text}".encode("utf-8")).hexdigest()
+
+    def _load(self, keys: list[str]) -> dict[str, list[float]]:
+        """Fetch stored vectors for the given keys in batches."""
+        found: dict[str, list[float]] = {}
+        with self._lock:
+            for start in range(0, len(keys), 500):
+                batch = keys[start:start + 500]
+                placeholders = ",".join("?" * len(batch))
+                rows = self._db.execute(
+                    f"SELECT key, vector FROM embeddings WHERE key IN ({placeholders})",
+                    batch,
+                )
+                for key, blob in rows:
+                    found[key] = array("f", blob).tolist()
+        return found
+
+    def _save(self, items: dict[str, list[float]]) -> None:
+        """Persist freshly computed vectors in one transaction, pruning the oldest rows."""
+        with self._lock, self._db:
+            self._db.executemany(
+                "INSERT OR REPLACE INTO embeddings (key, vector) VALUES (?, ?)",
+                [(key, array("f", vector).tobytes()) for key, vector in items.items()],
+            )
+            self._rows += len(items)
+            if self._rows > self.max_rows:
+                # Prune a tenth below the cap so a full store is not pruned on every write.
+                self._db.execute(
+                    "DELETE FROM embeddings WHERE rowid IN "
+                    "(SELECT rowid FROM embeddings ORDER BY rowid LIMIT "
+                    "max(0, (SELECT COUNT(*) FROM embeddings) - ?))",
+                    (self.max_rows - self.max_rows // 10,),
+                )
+                self._rows = self._db.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+
+    def embed_documents(self, texts: list[str]) -> list[list[float]]:
+        """Embed texts, running the model only for texts not seen before."""
+        keys = [self._key(text) for text in texts]
+        vectors = self._load(list(dict.fromkeys(keys)))
+
+        missing = {key: text for key, text in zip(keys, texts) if key not in vectors}
+        if missing:
+            computed = self.embedder.embed_documents(list(missing.values()))
+            fresh = dict(zip(missing, computed))
+            self._save(fresh)
+            vectors.update(fresh)
+
+        return [vectors[key] for key in keys]
+
+    def embed_query(self, text: str) -> list[float]:
+        """Embed a query, reusing the in-memory LRU."""
+        key = self._key(text)
+        with self._lock:
+            vector = self._queries.get(key)
+        if vector is not None:
+            return vector
+
+        vector = self.embedder.embed_query(text)
+        with self._lock:
+            self._queries.set(key, vector)
+        return vector
+
+    def embed_queries(self, texts: list[str]) -> list[list[float]]:
+        """Embed several queries, running the model once for all texts not in the LRU."""
+        keys = [self._key(text) for text in texts]
+        vectors: dict[str, list[float]] = {}
+        with self._lock:
+            for key in keys:
+                vector = self._queries.get(key)
+                if vector is not None:
+                    vectors[key] = vector
+
+        unseen = {key: text for key, text in zip(keys, texts) if key not in vectors}
+        if unseen:
+            vectors.update(zip(unseen, self.embedder.embed_documents(list(unseen.values()))))
+            with self._lock:
+                for key in unseen:
+                    self._queries.set(key, vectors[key])
+
+        return [vectors[key] for key in keys]
@@ -2,11 +2,59 @@
 
 from langchain_huggingface import HuggingFaceEmbeddings
 
+from agentturing.config import get_settings
 from agentturing.constants import EMBEDDING_MODEL_NAME
 
+from .embedding_cache import CachedEmbeddings
+
+EMBEDDING_BACKENDS = ("torch", "onnx", "onnx-int8")
+DEFAULT_INT8_ONNX_FILE = "onnx/model_quint8_avx2.onnx"
+
+
+def build_base_embedder(backend="torch", onnx_file=None):
+    """Create the uncached MiniLM embedder for a given inference backend.
+
+    ``onnx`` and ``onnx-int8`` run the same model through ONNX Runtime via
+    sentence-transformers (install ``sentence-transformers[onnx]``). The int8
+    variant loads one of the quantized exports published with the model.
+    """
+    if backend not in EMBEDDING_BACKENDS:
+        raise ValueError(
+            f"Unknown embedding backend {backend!r}; expected one of {EMBEDDING_BACKENDS}."
+        )
+
+    if backend == "torch":
+        return HuggingFaceEmbeddings(
+            model_name=EMBEDDING_MODEL_NAME,
+        )
+
+    model_kwargs = {"backend": "onnx"}
+    file_name = onnx_file or (DEFAULT_INT8_ONNX_FILE if backend == "onnx-int8" else None)
+    if file_name:
+        model_kwargs["model_kwargs"] = {"file_name": file_name}
 
-def get_embedder():
-    """Create the embedding model used for Qdrant indexing and retrieval."""
     return HuggingFaceEmbeddings(
         model_name=EMBEDDING_MODEL_NAME,
+        model_kwargs=model_kwargs,
+    )
+
+
+def get_embedder():
+    """Create the embedding model used for Qdrant indexing and retrieval."""
+    settings = get_settings()
+    embedder = build_base_embedder(settings.embedding_backend, settings.embedding_onnx_file)
+    if not settings.embedding_cache_enabled:
+        return embedder
+
+    # Vectors from different backends are close but not identical, so cache them apart.
+    model_name = EMBEDDING_MODEL_NAME
+    if settings.embedding_backend != "torch":
+        model_name = f"{EMBEDDING_MODEL_NAME}:{settings.embedding_backend}"
+
+    return CachedEmbeddings(
+        embedder,
+        model_name=model_name,
+        path=settings.embedding_cache_path,
+        query_cache_size=settings.embedding_query_cache_size,
+        max_rows=settings.embedding_cache_max_rows,
     )
@@ -0,0 +1,83 @@
+"""Serve the API with several worker processes sharing one knowledge base sidecar.
+
+Starts ``agentturing.database.sidecar``, waits until its socket accepts
+connections, then runs ``uvicorn app:app`` with ``--workers`` processes that
+reach the embedding model and Qdrant through ``KB_SIDECAR_SOCKET``. Run it from
+the repository root, like ``uvicorn app:app``.
+
+    uv run agentturing-serve --workers 4 --port 8000
+"""
+
+import argparse
+import os
+import socket
+import subprocess
+import sys
+import time
+
+from agentturing.constants import KB_SIDECAR_SOCKET_PATH
+
+
+def wait_for_socket(path: str, process: subprocess.Popen, timeout: float) -> None:
+    """Block until ``path`` accepts Unix socket connections or the sidecar exits."""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"Knowledge base sidecar exited with code {process.returncode}.")
+        try:
+            with socket.socket(socket.AF_UNIX) as probe:
+                probe.connect(path)
+            return
+        except OSError:
+            time.sleep(0.2)
+    raise RuntimeError(f"Knowledge base sidecar did not listen on {path} within {timeout:.0f}s.")
+
+
+def main(argv: list[str] | None = None) -> None:
+    """Start the sidecar, then the uvicorn workers, and stop the sidecar on exit."""
+    import uvicorn  # pylint: disable=import-outside-toplevel
+
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=os.cpu_count() or 1,
+        help="API worker processes. Defaults to the number of CPUs.",
+    )
+    parser.add_argument(
+        "--socket",
+        default=os.getenv("KB_SIDECAR_SOCKET") or KB_SIDECAR_SOCKET_PATH,
+        help="Unix socket shared by the sidecar and the workers.",
+    )
+    parser.add_argument(
+        "--startup-timeout",
+        type=float,
+        default=300.0,
+        help="Seconds to wait for the sidecar to load the embedding model.",
+    )
+    parser.add_argument("--log-level", default="info")
+    args = parser.parse_args(argv)
+
+    sidecar = subprocess.Popen(  # pylint: disable=consider-using-with
+        [sys.executable, "-m", "agentturing.database.sidecar", "--socket", args.socket]
+    )
+    try:
+        wait_for_socket(args.socket, sidecar, args.startup_timeout)
+        # Workers read their settings from the environment they inherit.
+        os.environ["KB_SIDECAR_SOCKET"] = args.socket
+        uvicorn.run(
+            "app:app",
+            host=args.host,
+            port=args.port,
+            workers=max(1, args.workers),
+            log_level=args.log_level,
+        )
+    finally:
+        sidecar.terminate()
+        sidecar.wait(timeout=30)
+
+
+if __name__ == "__main__":
+    main()
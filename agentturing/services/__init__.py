@@ -4,8 +4,10 @@ from functools import lru_cache
 
 from agentturing.config import get_settings
 
+from .admission import AdmissionRejected
 from .agentic_backend import AgenticBackendUnavailable, AgenticMathBackend
 from .base import BackendResponse
+from .warmup import ReadinessTracker, warm_up
 
 
 @lru_cache(maxsize=1)
@@ -15,7 +17,10 @@ def get_chat_backend():
 
 
 __all__ = [
+    "AdmissionRejected",
     "AgenticBackendUnavailable",
     "BackendResponse",
+    "ReadinessTracker",
     "get_chat_backend",
+    "warm_up",
 ]
@@ -0,0 +1,260 @@
+"""Admission control for agent runs and per-model concurrency caps."""
+
+import asyncio
+import contextvars
+import itertools
+import math
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
+from typing import Any
+
+from agentturing.utils.metrics import METRICS
+
+PRIORITIES = ("high", "normal", "low")
+DEFAULT_PRIORITY = "normal"
+# Smoothing of the observed slot hold time used for Retry-After.
+HOLD_TIME_ALPHA = 0.2
+MAX_RETRY_AFTER = 60
+
+QUEUE_DEPTH = METRICS.gauge(
+    "agentturing_admission_queue_depth",
+    "Requests waiting for a slot, by pool (agent runs or a model).",
+    ("pool",),
+)
+ACTIVE_SLOTS = METRICS.gauge(
+    "agentturing_admission_active",
+    "Slots in use, by pool.",
+    ("pool",),
+)
+WAIT_SECONDS = METRICS.histogram(
+    "agentturing_admission_wait_seconds",
+    "Time spent waiting for a slot before running, by pool and priority.",
+    ("pool", "priority"),
+)
+REJECTED = METRICS.counter(
+    "agentturing_admission_rejected_total",
+    "Requests turned away without a slot, by pool and reason.",
+    ("pool", "reason"),
+)
+
+# Priority of the run in the current task; model calls inherit it.
+_PRIORITY: contextvars.ContextVar[str] = contextvars.ContextVar(
+    "agentturing_priority", default=DEFAULT_PRIORITY
+)
+
+
+def normalize_priority(value: str | None) -> str:
+    """Map a client-supplied priority to a known class, defaulting to ``normal``."""
+    value = (value or "").strip().lower()
+    return value if value in PRIORITIES else DEFAULT_PRIORITY
+
+
+def _holds_slot(future: asyncio.Future) -> bool:
+    return future.done() and not future.cancelled() and future.exception() is None
+
+
+class AdmissionRejected(RuntimeError):
+    """Raised when a request cannot get a slot.
+
+    ``status_code`` is 429 when the wait queue is full and 503 when the wait
+    deadline passed; ``retry_after`` is a suggested delay in whole seconds.
+    """
+
+    def __init__(self, message: str, *, status_code: int, retry_after: int) -> None:
+        super().__init__(message)
+        self.status_code = status_code
+        self.retry_after = retry_after
+
+
+class PriorityLimiter:
+    """Cap concurrent holders of a pool and queue the rest by priority.
+
+    Free slots go to the oldest waiter of the best priority class. With
+    ``max_queue`` set, an arrival that finds the queue full is rejected, unless
+    it outranks the newest waiter of the lowest class queued, which is rejected
+    in its place. With ``queue_timeout`` set, a waiter gives up after that many
+    seconds.
+    """
+
+    def __init__(
+        self,
+        pool: str,
+        limit: int,
+        *,
+        max_queue: int | None = None,
+        queue_timeout: float | None = None,
+    ) -> None:
+        self.pool = pool
+        self.limit = max(1, limit)
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self.active = 0
+        self._waiters: list[tuple[int, int, asyncio.Future]] = []
+        self._order = itertools.count()
+        self._hold_time = 1.0
+
+    @property
+    def queued(self) -> int:
+        """Return how many requests are waiting for a slot."""
+        return len(self._waiters)
+
+    def retry_after(self) -> int:
+        """Estimate the seconds until a newly queued request would get a slot."""
+        estimate = self._hold_time * (self.queued + 1) / self.limit
+        return min(MAX_RETRY_AFTER, max(1, math.ceil(estimate)))
+
+    def _reject(self, reason: str, status_code: int) -> AdmissionRejected:
+        REJECTED.inc(pool=self.pool, reason=reason)
+        return AdmissionRejected(
+            f"{self.pool} is at capacity ({reason.replace('_', ' ')}); retry later.",
+            status_code=status_code,
+            retry_after=self.retry_after(),
+        )
+
+    def _update_gauges(self) -> None:
+        QUEUE_DEPTH.set(self.queued, pool=self.pool)
+        ACTIVE_SLOTS.set(self.active, pool=self.pool)
+
+    def _make_room(self, rank: int) -> None:
+        """Reject the newest lowest-priority waiter if ``rank`` outranks it."""
+        # Waiters cancelled but not yet removed by their own cleanup free room.
+        self._waiters = [waiter for waiter in self._waiters if not waiter[2].done()]
+        if self.queued < self.max_queue:
+            return
+        worst = max(self._waiters, key=lambda waiter: (waiter[0], waiter[1]))
+        if worst[0] <= rank:
+            raise self._reject("queue_full", 429)
+        self._waiters.remove(worst)
+        worst[2].set_exception(self._reject("preempted", 429))
+
+    async def acquire(self, priority: str = DEFAULT_PRIORITY) -> None:
+        """Wait for a slot, raising ``AdmissionRejected`` if none can be had."""
+        priority = normalize_priority(priority)
+        if self.active < self.limit and not self._waiters:
+            self.active += 1
+            self._update_gauges()
+            WAIT_SECONDS.observe(0.0, pool=self.pool, priority=priority)
+            return
+
+        rank = PRIORITIES.index(priority)
+        if self.max_queue is not None and self.queued >= self.max_queue:
+            if self.max_queue == 0:
+                raise self._reject("queue_full", 429)
+            self._make_room(rank)
+
+        loop = asyncio.get_running_loop()
+        waiter = (rank, next(self._order), loop.create_future())
+        self._waiters.append(waiter)
+        self._update_gauges()
+        started = loop.time()
+        granted = False
+        try:
+            async with asyncio.timeout(self.queue_timeout):
+                await waiter[2]
+            granted = True
+        except TimeoutError:
+            raise self._reject("timeout", 503) from None
+        finally:
+            if waiter in self._waiters:
+                self._waiters.remove(waiter)
+            elif not granted and _holds_slot(waiter[2]):
+                # Granted a slot just as the caller gave up: hand it on.
+                self._release_slot()
+            self._update_gauges()
+        WAIT_SECONDS.observe(loop.time() - started, pool=self.pool, priority=priority)
+
+    def release(self, held_for: float | None = None) -> None:
+        """Give a slot back, recording how long it was held."""
+        if held_for is not None:
+            self._hold_time += HOLD_TIME_ALPHA * (held_for - self._hold_time)
+        self._release_slot()
+        self._update_gauges()
+
+    def _release_slot(self) -> None:
+        self.active -= 1
+        while self._waiters and self.active < self.limit:
+            waiter = min(self._waiters, key=lambda item: (item[0], item[1]))
+            self._waiters.remove(waiter)
+            if waiter[2].done():
+                continue
+            waiter[2].set_result(None)
+            self.active += 1
+
+    @asynccontextmanager
+    async def slot(self, priority: str = DEFAULT_PRIORITY) -> AsyncIterator[None]:
+        """Hold one slot for the duration of the block."""
+        await self.acquire(priority)
+        started = asyncio.get_running_loop().time()
+        try:
+            yield
+        finally:
+            self.release(asyncio.get_running_loop().time() - started)
+
+
+class AdmissionTicket:
+    """A run's slot in the admission limiter, released exactly once."""
+
+    def __init__(self, limiter: PriorityLimiter, priority: str) -> None:
+        self._limiter = limiter
+        self.priority = priority
+        self._started = asyncio.get_running_loop().time()
+        self._released = False
+
+    def release(self) -> None:
+        """Return the slot; later calls do nothing."""
+        if self._released:
+            return
+        self._released = True
+        self._limiter.release(asyncio.get_running_loop().time() - self._started)
+
+
+def set_run_priority(priority: str) -> None:
+    """Tag the current task, and the tasks it starts, with ``priority``."""
+    _PRIORITY.set(normalize_priority(priority))
+
+
+class ScheduledModel:
+    """Agents SDK ``Model`` wrapper that holds a model slot for each call."""
+
+    def __init__(self, model: Any, limiter: PriorityLimiter) -> None:
+        self._model = model
+        self._limiter = limiter
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._model, name)
+
+    async def get_response(self, *args: Any, **kwargs: Any) -> Any:
+        """Return the wrapped model's response once a slot is free."""
+        async with self._limiter.slot(_PRIORITY.get()):
+            return await self._model.get_response(*args, **kwargs)
+
+    async def stream_response(self, *args: Any, **kwargs: Any) -> AsyncIterator[Any]:
+        """Stream the wrapped model's response once a slot is free."""
+        async with self._limiter.slot(_PRIORITY.get()):
+            async for event in self._model.stream_response(*args, **kwargs):
+                yield event
+
+
+class ScheduledModelProvider:
+    """Agents SDK ``ModelProvider`` that caps concurrent calls per model.
+
+    Models named in ``limits`` get their own ``PriorityLimiter``; calls to any
+    other model are passed through. Waits are not bounded here: a run already
+    holds an admission slot, so at most that many runs can queue for a model.
+    """
+
+    def __init__(self, provider: Any, limits: dict[str, int]) -> None:
+        self._provider = provider
+        self.limiters = {
+            name: PriorityLimiter(f"model:{name}", limit) for name, limit in limits.items()
+        }
+
+    def get_model(self, model_name: str | None) -> Any:
+        """Return the provider's model, wrapped if it has a concurrency cap."""
+        model = self._provider.get_model(model_name)
+        limiter = self.limiters.get(model_name or "")
+        return model if limiter is None else ScheduledModel(model, limiter)
+
+    async def aclose(self) -> None:
+        """Close the wrapped provider."""
+        await self._provider.aclose()
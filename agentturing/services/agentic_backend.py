@@ -2,17 +2,95 @@
 
 # pylint: disable=import-outside-toplevel
 
+import asyncio
 import json
+import time
 from dataclasses import dataclass
 from functools import lru_cache
-from typing import Any
+from typing import Any, Literal
 
 from agentturing.config import Settings
-from agentturing.constants import TAVILY_DOMAINS
-from agentturing.guardrails.setup import make_input_guard, make_output_guard
-from agentturing.utils.sanitize_output import format_tavily_results
-
+from agentturing.guardrails.setup import (
+    UNSAFE_OUTPUT_MESSAGE,
+    make_input_guard,
+    make_streaming_output_guard,
+)
+from agentturing.utils.metrics import RequestTimings
+from agentturing.utils.context_packer import pack_context
+from agentturing.utils.sanitize_output import (
+    format_kb_passages,
+    format_tavily_results,
+    format_web_passages,
+    kb_passages,
+    tavily_passages,
+)
+
+from .admission import (
+    DEFAULT_PRIORITY,
+    AdmissionTicket,
+    PriorityLimiter,
+    ScheduledModelProvider,
+    set_run_priority,
+)
 from .base import BackendResponse
+from .resilience import (
+    ResilientModelProvider,
+    note_model_agent,
+    record_model_decisions,
+    track_model_agents,
+)
+from .run_metrics import (
+    ERRORS,
+    EVENTS,
+    HANDOFFS,
+    TTFT_SECONDS,
+    RunFinisher,
+    RunState,
+    observe_run,
+    run_tool,
+)
+
+
+class _ToolEventOrder:
+    """Release ``tool_output`` events in the order their ``tool_call`` events were sent.
+
+    Parallel tool calls can finish in any order; holding outputs until every
+    earlier call has reported keeps each output after its call and the outputs
+    in call order, so clients can pair them by ``call_id``.
+    """
+
+    def __init__(self) -> None:
+        self._open: dict[str, str] = {}
+        self._ready: dict[str, dict[str, Any]] = {}
+
+    def called(self, call_id: str | None, tool_name: str) -> None:
+        """Register a call that has been sent to the client."""
+        if call_id is not None:
+            self._open[call_id] = tool_name
+
+    def tool_name(self, call_id: str | None) -> str | None:
+        """Return the tool name recorded for a call, if any."""
+        return self._open.get(call_id) if call_id is not None else None
+
+    def completed(self, call_id: str | None, event: dict[str, Any]) -> list[dict[str, Any]]:
+        """Accept an output and return the outputs that can be sent now."""
+        if call_id not in self._open:
+            return [event]
+        self._ready[call_id] = event
+        released = []
+        while self._open:
+            first = next(iter(self._open))
+            if first not in self._ready:
+                break
+            del self._open[first]
+            released.append(self._ready.pop(first))
+        return released
+
+    def flush(self) -> list[dict[str, Any]]:
+        """Return held outputs in call order and forget calls that never reported."""
+        released = [self._ready.pop(call_id) for call_id in self._open if call_id in self._ready]
+        self._open.clear()
+        return released
 
 
 class AgenticBackendUnavailable(RuntimeError):
@@ -29,40 +107,43 @@ class RuntimeBundle:
     math_research_agent: Any
     web_research_agent: Any
     run_config: Any
+    hooks: Any = None
 
 
 @lru_cache(maxsize=1)
-def _get_vectorstore():
-    """Lazily load the vector store to avoid heavy startup imports."""
-    from agentturing.database.vectorstore import get_vectorstore
+def _get_knowledge_base(settings: Settings):
+    """Lazily create the async knowledge base to avoid heavy startup imports.
 
-    return get_vectorstore()
+    With ``KB_SIDECAR_SOCKET`` set, retrieval goes to the shared sidecar process.
+    """
+    from agentturing.database.sidecar import KnowledgeBaseClient, build_local_knowledge_base
 
+    if settings.kb_sidecar_socket:
+        return KnowledgeBaseClient(settings.kb_sidecar_socket)
+    return build_local_knowledge_base(settings)
 
-@lru_cache(maxsize=8)
-def _get_math_tavily_client(api_key: str):
-    """Create and cache the Tavily client used for math-focused research."""
-    from langchain_tavily import TavilySearch
 
-    return TavilySearch(
-        max_results=5,
-        topic="general",
-        tavily_api_key=api_key,
-        include_domains=TAVILY_DOMAINS,
-        search_depth="basic",
-    )
+@lru_cache(maxsize=1)
+def _get_http_client(settings: Settings):
+    """Create and cache the HTTP connection pool shared by the model provider and Tavily."""
+    from .http_client import build_http_client
 
+    return build_http_client(settings)
 
-@lru_cache(maxsize=8)
-def _get_general_tavily_client(api_key: str):
-    """Create and cache the Tavily client used for general web research."""
-    from langchain_tavily import TavilySearch
 
-    return TavilySearch(
-        max_results=5,
-        topic="general",
-        tavily_api_key=api_key,
-        search_depth="advanced",
+@lru_cache(maxsize=1)
+def _get_web_search_client(settings: Settings):
+    """Create and cache the async Tavily client shared by both search scopes."""
+    from .web_search import WebSearchClient
+
+    return WebSearchClient(
+        settings.tavily_api_key,
+        base_url=settings.tavily_base_url,
+        cache_size=settings.web_search_cache_size,
+        cache_ttl=settings.web_search_cache_ttl,
+        math_timeout=settings.web_search_math_timeout,
+        general_timeout=settings.web_search_general_timeout,
+        http_client=_get_http_client(settings),
     )
 
 
@@ -74,8 +155,54 @@ class AgenticMathBackend:
     def __init__(self, settings: Settings) -> None:
         self.settings = settings
         self._input_guard = make_input_guard()
-        self._output_guard = make_output_guard()
+        self.knowledge_base = _get_knowledge_base(settings)
         self._runtime = self._build_runtime()
+        self.answer_cache = self._build_answer_cache()
+        self.fast_router = self._build_fast_router()
+        self.admission = PriorityLimiter(
+            "runs",
+            settings.run_max_concurrency,
+            max_queue=settings.admission_queue_size,
+            queue_timeout=settings.admission_queue_timeout,
+        )
+        self._run_finisher = RunFinisher()
+
+    async def warm_up_connections(self) -> dict[str, str]:
+        """Open pooled connections to the model provider and Tavily before traffic arrives."""
+        from .http_client import warm_up_connections
+
+        urls = [self.settings.provider_base_url]
+        headers = {
+            self.settings.provider_base_url: {
+                "Authorization": f"Bearer {self.settings.provider_api_key}"
+            }
+        }
+        if self.settings.tavily_api_key:
+            urls.append(self.settings.tavily_base_url)
+        results = await warm_up_connections(
+            _get_http_client(self.settings),
+            urls,
+            connections=self.settings.http_warmup_connections,
+            headers=headers,
+        )
+        for url, result in results.items():
+            if result != "ok":
+                print(f"Connection warm-up to {url} failed: {result}")
+        return results
+
+    def _build_answer_cache(self):
+        """Create the semantic answer cache when it is enabled in settings."""
+        if not self.settings.answer_cache_enabled:
+            return None
+
+        from .answer_cache import AnswerCache
+
+        return AnswerCache(
+            embed=self.knowledge_base.embed_query,
+            max_entries=self.settings.answer_cache_size,
+            similarity_threshold=self.settings.answer_cache_similarity,
+            ttl=self.settings.answer_cache_ttl,
+        )
 
     def _build_runtime(self) -> RuntimeBundle:  # pylint: disable=too-many-locals
         """Build the streamed agent runtime and its tool-backed research agent."""
@@ -85,11 +212,14 @@ class AgenticMathBackend:
             )
 
         try:
+            from openai import AsyncOpenAI
             from agents import (
                 Agent,
                 ModelSettings,
                 OpenAIProvider,
                 RunConfig,
+                RunContextWrapper,
+                RunHooks,
                 Runner,
                 function_tool,
                 set_default_openai_api,
@@ -105,31 +235,48 @@ class AgenticMathBackend:
         set_tracing_disabled(self.settings.tracing_disabled)
 
         @function_tool
-        def search_knowledge_base(query: str, top_k: int = 4) -> str:
+        async def search_knowledge_base(
+            ctx: RunContextWrapper[RunState],
+            query: str,
+            top_k: int = 4,
+            mode: Literal["auto", "dense", "hybrid"] = "auto",
+        ) -> str:
             """Search the local math knowledge base for worked examples.
 
             Args:
                 query: The math query or concept to search for.
                 top_k: Number of candidate matches to fetch from Qdrant.
+                mode: "hybrid" also matches exact formulas, numbers and LaTeX
+                    by keyword; "dense" matches by meaning only; "auto" picks
+                    hybrid for queries that contain math.
             """
-            vectorstore = _get_vectorstore()
-            results = vectorstore.similarity_search_with_score(
-                query,
-                k=max(1, min(top_k, 8)),
+            state = ctx.context
+            top_k = max(1, min(top_k, 8))
+
+            async def search() -> str:
+                results = None
+                if mode == "auto" and state is not None and state.prefetch is not None:
+                    results = await state.prefetch.lookup(query, top_k)
+                if results is None:
+                    results = await self.knowledge_base.search(
+                        query, top_k=top_k, mode=None if mode == "auto" else mode
+                    )
+                if not results:
+                    return "No relevant knowledge base entries were found."
+
+                packed = await self._pack_context(kb_passages(results))
+                packed.record("search_knowledge_base")
+                return "\n\n".join(format_kb_passages(packed.passages))
+
+            return await run_tool(
+                state,
+                "search_knowledge_base",
+                search,
+                timeout=self.settings.kb_tool_timeout,
+                failure_label="Knowledge base search",
             )
 
-            if not results:
-                return "No relevant knowledge base entries were found."
-
-            formatted_results = []
-            for index, (doc, score) in enumerate(results, start=1):
-                snippet = " ".join(doc.page_content.split())
-                snippet = snippet[:1200]
-                formatted_results.append(f"[KB {index}] score={score}\n{snippet}")
-
-            return "\n\n".join(formatted_results)
-
-        def _run_tavily_search(query: str, math_only: bool) -> str:
+        async def _run_tavily_search(state: RunState | None, query: str, math_only: bool) -> str:
             """Run Tavily search with the correct source scope for the current path.
 
             Args:
@@ -138,43 +285,90 @@ class AgenticMathBackend:
             if not self.settings.tavily_api_key:
                 return "Web search is unavailable because TAVILY_API_KEY is not configured."
 
-            try:
-                tavily = (
-                    _get_math_tavily_client(self.settings.tavily_api_key)
-                    if math_only
-                    else _get_general_tavily_client(self.settings.tavily_api_key)
-                )
-                results = tavily.invoke(query)
-            except Exception as exc:  # pylint: disable=broad-exception-caught
-                return f"Web search failed: {exc}"
-
-            if isinstance(results, dict):
-                raw_results = results.get("results", [])
-            elif isinstance(results, list):
-                raw_results = results
-            elif isinstance(results, str):
-                return results
-            else:
-                raw_results = [str(results)]
+            tool_name = "math_web_search" if math_only else "web_search"
 
-            formatted = format_tavily_results(raw_results)
-            return "\n\n".join(formatted)
+            async def search() -> str:
+                raw_results = await _get_web_search_client(self.settings).search(
+                    query,
+                    math_only=math_only,
+                )
+                passages = tavily_passages(raw_results)
+                if not passages:
+                    return "\n\n".join(format_tavily_results(raw_results))
+
+                packed = await self._pack_context(passages)
+                packed.record(tool_name)
+                return "\n\n".join(format_web_passages(packed.passages))
+
+            return await run_tool(
+                state,
+                tool_name,
+                search,
+                timeout=(
+                    self.settings.web_search_math_timeout
+                    if math_only
+                    else self.settings.web_search_general_timeout
+                ),
+                failure_label="Web search",
+            )
 
         @function_tool
-        def math_web_search(query: str) -> str:
+        async def math_web_search(ctx: RunContextWrapper[RunState], query: str) -> str:
             """Search curated math-oriented web sources for tutoring context."""
-            return _run_tavily_search(query, math_only=True)
+            return await _run_tavily_search(ctx.context, query, math_only=True)
 
         @function_tool
-        def web_search(query: str) -> str:
+        async def web_search(ctx: RunContextWrapper[RunState], query: str) -> str:
             """Search the open web for general research questions."""
-            return _run_tavily_search(query, math_only=False)
+            return await _run_tavily_search(ctx.context, query, math_only=False)
 
+        # include_usage asks non-OpenAI providers for token usage on streamed turns.
         model_settings = ModelSettings(
             temperature=self.settings.agent_temperature,
             parallel_tool_calls=False,
+            include_usage=True,
+        )
+        # Research tools are async and share no per-call state, so the research
+        # agents may request several searches in one turn and run them together.
+        research_model_settings = ModelSettings(
+            temperature=self.settings.agent_temperature,
+            parallel_tool_calls=True,
+            include_usage=True,
         )
 
+        solver_base_instructions = (
+            "You are the primary mathematics tutor. Solve the user's problem directly "
+            "when you already have enough information. "
+            "If you need a theorem statement, worked example, retrieved reference, or "
+            "curated math web context, handoff to MathResearchAgent. "
+            "When MathResearchAgent hands back context, continue the solution yourself and "
+            "produce the final answer with a concise step-by-step explanation. "
+            "Do not answer non-mathematical requests."
+        )
+
+        async def solver_instructions(ctx: RunContextWrapper[RunState], _agent) -> str:
+            """Offer strong prefetched knowledge base hits to SolverAgent up front."""
+            state = ctx.context
+            if state is None:
+                return solver_base_instructions
+            if state.solver_brief is None:
+                # Packed once per run; later SolverAgent turns reuse it.
+                state.solver_brief = ""
+                if state.prefetch is not None and state.prefetch.outcome is None:
+                    state.solver_brief = await state.prefetch.brief(
+                        wait=self.settings.kb_prefetch_wait
+                    )
+            brief = state.solver_brief
+            if not brief:
+                return solver_base_instructions
+            return (
+                f"{solver_base_instructions}\n\n"
+                "Knowledge base matches already retrieved for this question:\n"
+                f"{brief}\n\n"
+                "If these matches give you what you need, solve directly without handing off "
+                "to MathResearchAgent."
+            )
+
         router_agent = Agent(
             name="RouterAgent",
             handoff_description=(
@@ -199,15 +393,7 @@ class AgenticMathBackend:
                 "Primary math tutor that can solve directly or delegate research "
                 "before producing the final answer."
             ),
-            instructions=(
-                "You are the primary mathematics tutor. Solve the user's problem directly "
-                "when you already have enough information. "
-                "If you need a theorem statement, worked example, retrieved reference, or "
-                "curated math web context, handoff to MathResearchAgent. "
-                "When MathResearchAgent hands back context, continue the solution yourself and "
-                "produce the final answer with a concise step-by-step explanation. "
-                "Do not answer non-mathematical requests."
-            ),
+            instructions=solver_instructions,
             model=self.settings.solver_model,
             model_settings=model_settings,
         )
@@ -220,13 +406,13 @@ class AgenticMathBackend:
             instructions=(
                 "You are a math research specialist. Use the available tools to gather only "
                 "the minimum context needed to help solve the user's math problem. "
-                "Prefer the local knowledge base first, and use curated math web search only "
-                "when the knowledge base is insufficient. "
+                "Prefer the local knowledge base. When you also expect to need curated math "
+                "web search, call both tools in the same turn so they run in parallel. "
                 "After collecting relevant tutoring context, handoff back to SolverAgent with a short "
                 "research brief. Do not produce the final user-facing answer yourself."
             ),
             model=self.settings.research_model,
-            model_settings=model_settings,
+            model_settings=research_model_settings,
             tools=[search_knowledge_base, math_web_search],
             handoffs=[solver_agent],
         )
@@ -243,23 +429,59 @@ class AgenticMathBackend:
                 "Summarize findings directly for the user and note uncertainty when sources are thin."
             ),
             model=self.settings.research_model,
-            model_settings=model_settings,
+            model_settings=research_model_settings,
             tools=[web_search],
         )
 
         router_agent.handoffs.extend([solver_agent, web_research_agent])
         solver_agent.handoffs.append(math_research_agent)
 
+        from .http_client import build_http_timeout
+
+        # Every agent hop shares the tuned pool, so hops reuse warm connections.
         provider = OpenAIProvider(
-            api_key=self.settings.provider_api_key,
-            base_url=self.settings.provider_base_url,
+            openai_client=AsyncOpenAI(
+                api_key=self.settings.provider_api_key,
+                base_url=self.settings.provider_base_url,
+                http_client=_get_http_client(self.settings),
+                timeout=build_http_timeout(self.settings),
+            ),
             use_responses=False,
         )
+        model_provider = ScheduledModelProvider(provider, dict(self.settings.model_concurrency))
+        hedged: set[str] = set()
+        if self.settings.model_hedging_enabled:
+            # Router and research turns are short and cheap to duplicate; the
+            # solver's long reasoning calls are not hedged.
+            hedged = {router_agent.name, math_research_agent.name, web_research_agent.name}
+        fallbacks = {}
+        fallback_model = self.settings.model_fallback_model
+        if self.settings.model_fallback_enabled:
+            if fallback_model and fallback_model != self.settings.default_model:
+                fallbacks[solver_agent.name] = fallback_model
+            else:
+                print(
+                    "MODEL_FALLBACK_ENABLED is set but MODEL_FALLBACK_MODEL is empty or "
+                    "OPENAI_DEFAULT_MODEL; solver calls will NOT fall back."
+                )
+        if hedged or fallbacks:
+            model_provider = ResilientModelProvider(
+                model_provider, self.settings, hedged=hedged, fallbacks=fallbacks
+            )
         run_config = RunConfig(
-            model_provider=provider,
+            model_provider=model_provider,
             model=self.settings.default_model,
         )
 
+        class AgentTurnHooks(RunHooks):  # pylint: disable=too-few-public-methods
+            """Note the agent making each model call for per-agent hedging and fallback."""
+
+            async def on_llm_start(  # pylint: disable=unused-argument
+                self, context, agent, system_prompt, input_items
+            ) -> None:
+                """Record ``agent`` as the one making the run's next model call."""
+                note_model_agent(agent.name)
+
         return RuntimeBundle(
             runner=Runner,
             router_agent=router_agent,
@@ -267,15 +489,16 @@ class AgenticMathBackend:
             math_research_agent=math_research_agent,
             web_research_agent=web_research_agent,
             run_config=run_config,
+            hooks=AgentTurnHooks(),
         )
 
-    def _model_for_agent(self, agent_name: str) -> str:
-        """Return the configured model name for a given runtime agent."""
-        if agent_name == self._runtime.router_agent.name:
-            return self.settings.triage_model
-        if agent_name == self._runtime.solver_agent.name:
-            return self.settings.solver_model
-        return self.settings.research_model
+    @property
+    def _served_model(self) -> str:
+        """Return the model that serves every agent's turns: the run config's model.
+
+        Calls moved to a fallback model are listed in the run's model decisions.
+        """
+        return self._runtime.run_config.model
 
     def _stringify_tool_output(self, output: Any) -> str:
         """Convert tool output to a compact, frontend-safe preview string."""
@@ -290,11 +513,21 @@ class AgenticMathBackend:
         text = " ".join(text.split())
         return text[:1200]
 
-    async def ask(self, question: str) -> BackendResponse:
+    async def admit(self, priority: str = DEFAULT_PRIORITY) -> AdmissionTicket:
+        """Wait for a run slot in ``priority``'s class.
+
+        Raises ``AdmissionRejected`` (429) at once when the wait queue is full,
+        or (503) when no slot frees up within ``ADMISSION_QUEUE_TIMEOUT``. The
+        caller must release the ticket when its run ends.
+        """
+        await self.admission.acquire(priority)
+        return AdmissionTicket(self.admission, priority)
+
+    async def ask(self, question: str, priority: str = DEFAULT_PRIORITY) -> BackendResponse:
         """Run the streamed agent workflow and return the final assembled response."""
         final_event: dict[str, Any] | None = None
 
-        async for event in self.stream_ask(question):
+        async for event in self.stream_ask(question, priority):
             if event["type"] == "done":
                 final_event = event
 
@@ -308,8 +541,167 @@ class AgenticMathBackend:
             metadata=final_event["metadata"],
         )
 
-    async def stream_ask(self, question: str):
-        """Yield SSE-ready events from one streamed agent run."""
+    def _build_fast_router(self):
+        """Create the local fast-path router when it is enabled in settings."""
+        if not self.settings.fast_router_enabled:
+            return None
+
+        from .fast_router import FastRouter, load_router_examples
+
+        return FastRouter(
+            embed_query=self.knowledge_base.embed_query,
+            embed_documents=self.knowledge_base.embed_documents,
+            examples=load_router_examples(self.settings.fast_router_examples_path),
+            threshold=self.settings.fast_router_threshold,
+        )
+
+    async def _select_starting_agent(self, question: str) -> tuple[Any, dict[str, Any]]:
+        """Pick the first agent for a run, skipping RouterAgent when the local router is sure."""
+        router_agent = self._runtime.router_agent
+        if self.fast_router is None:
+            return router_agent, {"source": "router_agent", "agent": router_agent.name}
+
+        from .fast_router import WEB_RESEARCH_ROUTE
+
+        try:
+            decision = await self.fast_router.route(question)
+        except Exception as exc:  # pylint: disable=broad-exception-caught
+            print(f"Fast router failed, falling back to RouterAgent: {exc}")
+            return router_agent, {"source": "router_agent", "agent": router_agent.name}
+
+        route = {
+            "predicted": decision.route,
+            "confidence": round(decision.confidence, 4),
+            "threshold": self.fast_router.threshold,
+        }
+        if not decision.confident:
+            return router_agent, {**route, "source": "router_agent", "agent": router_agent.name}
+
+        agent = (
+            self._runtime.web_research_agent
+            if decision.route == WEB_RESEARCH_ROUTE
+            else self._runtime.solver_agent
+        )
+        return agent, {**route, "source": "fast_path", "agent": agent.name}
+
+    async def _pack_context(self, passages):
+        """Merge, deduplicate and budget tool passages before they reach the prompt."""
+        return await pack_context(
+            passages,
+            self.settings.context_token_budget,
+            embed_documents=self.knowledge_base.embed_documents,
+            similarity=self.settings.context_dedup_similarity,
+        )
+
+    def _start_prefetch(self, question: str):
+        """Start a speculative knowledge base search for the validated question."""
+        if not self.settings.kb_prefetch_enabled:
+            return None
+
+        from .kb_prefetch import KnowledgePrefetch
+
+        return KnowledgePrefetch(
+            self.knowledge_base,
+            question,
+            top_k=self.settings.kb_prefetch_top_k,
+            similarity=self.settings.kb_prefetch_similarity,
+            min_score=self.settings.kb_prefetch_min_score,
+            token_budget=self.settings.context_token_budget,
+        )
+
+    @staticmethod
+    def _close_prefetch(run_state: RunState) -> None:
+        """Cancel the prefetch once the run can no longer use it."""
+        if run_state.prefetch is not None:
+            run_state.prefetch.close()
+
+    async def _replay_cached_answer(self, match):
+        """Yield a synthetic event stream for an answer served from the cache."""
+        done_event = match.done_event
+        metadata = done_event["metadata"]
+        metadata.update(
+            {
+                "cache_hit": True,
+                "cache_tier": match.tier,
+                "cache_similarity": round(match.similarity, 4),
+                "model_decisions": [],
+            }
+        )
+        yield {
+            "type": "meta",
+            "backend": self.backend_name,
+            "model": metadata["model"],
+            "research_used": metadata["research_used"],
+            "last_agent": metadata["last_agent"],
+            "cache_hit": True,
+        }
+        if done_event["reasoning"]:
+            yield {"type": "reason", "text": done_event["reasoning"]}
+        yield {"type": "answer", "text": done_event["answer"]}
+        yield done_event
+
+    async def stream_ask(self, question: str, priority: str = DEFAULT_PRIORITY):
+        """Yield SSE-ready events from one streamed agent run.
+
+        Every run is timed phase by phase into the process metrics, and the
+        ``done`` event carries the request's own breakdown in
+        ``metadata["timings"]``.
+
+        If the consumer stops early, by cancelling the task that iterates this
+        generator (as Starlette does when a streaming client disconnects) or by
+        closing it, the agent run is cancelled with it: the model stream, tool
+        calls in flight and any pending handoff stop instead of finishing for
+        nobody.
+
+        Model calls of the run wait for per-model slots in ``priority``'s
+        class; admission to the run itself is the caller's job (``admit``).
+        Hedged and fallback model calls are listed in
+        ``metadata["model_decisions"]``.
+        """
+        set_run_priority(priority)
+        timings = RequestTimings()
+        run_state = RunState(
+            timings=timings,
+            tool_slots=asyncio.Semaphore(self.settings.tool_max_concurrency),
+        )
+        record_model_decisions(run_state.model_decisions)
+        track_model_agents()
+        outcome = "cancelled"
+        events = self._stream_run(question, run_state)
+        try:
+            async for event in events:
+                event_type = event["type"]
+                EVENTS.inc(type=event_type)
+                if event_type in {"answer", "reason"} and "ttft" not in timings.marks:
+                    timings.mark("ttft")
+                    TTFT_SECONDS.observe(timings.marks["ttft"])
+                if event_type == "answer":
+                    timings.mark("first_answer")
+                if event_type == "done":
+                    metadata = event["metadata"]
+                    outcome = "cache_hit" if metadata.get("cache_hit") else "answered"
+                    metadata["timings"] = timings.summary()
+                yield event
+        except ValueError:
+            outcome = "rejected"
+            raise
+        except Exception as exc:
+            outcome = "error"
+            ERRORS.inc(type=type(exc).__name__)
+            raise
+        finally:
+            self._run_finisher.finish(run_state, outcome)
+            await events.aclose()
+            if run_state.prefetch is not None:
+                run_state.prefetch.close()
+            observe_run(timings, outcome, self._served_model)
+
+    async def _stream_run(  # pylint: disable=too-many-locals,too-many-branches,too-many-statements
+        self,
+        question: str,
+        run_state: RunState,
+    ):
+        """Run guards, cache, routing and the agent stream for ``stream_ask``."""
         from agents.items import HandoffOutputItem, ToolCallItem, ToolCallOutputItem
         from agents.stream_events import (
             AgentUpdatedStreamEvent,
@@ -317,32 +709,61 @@ class AgenticMathBackend:
             RunItemStreamEvent,
         )
 
-        validated_question = self._input_guard(question)
-        reasoning_chunks: list[str] = []
-        answer_chunks: list[str] = []
+        timings = run_state.timings
+        with timings.phase("input_guard"):
+            validated_question = self._input_guard(question)
+        run_state.prefetch = self._start_prefetch(validated_question)
+        if self.answer_cache is not None:
+            with timings.phase("cache_lookup"):
+                match = await self.answer_cache.lookup(validated_question)
+            if match is not None:
+                self._close_prefetch(run_state)
+                async for event in self._replay_cached_answer(match):
+                    yield event
+                return
+
+        with timings.phase("routing"):
+            starting_agent, route = await self._select_starting_agent(validated_question)
+        if starting_agent is self._runtime.web_research_agent:
+            self._close_prefetch(run_state)
+        reasoning_guard = make_streaming_output_guard()
+        answer_guard = make_streaming_output_guard()
         research_used = False
-        current_agent_name = self._runtime.router_agent.name
+        # Web results and refusals go stale or are wrong to replay, so they are not cached.
+        cacheable = starting_agent is not self._runtime.web_research_agent
+        current_agent_name = starting_agent.name
 
         run_result = self._runtime.runner.run_streamed(
-            self._runtime.router_agent,
+            starting_agent,
             validated_question,
+            context=run_state,
             run_config=self._runtime.run_config,
+            hooks=self._runtime.hooks,
         )
+        run_state.run = run_result
+        agent_started = time.perf_counter()
 
         yield {
             "type": "meta",
             "backend": self.backend_name,
-            "model": self._model_for_agent(current_agent_name),
+            "model": self._served_model,
             "research_used": research_used,
             "last_agent": current_agent_name,
+            "cache_hit": False,
+            "route": route,
         }
 
+        tool_order = _ToolEventOrder()
         answer_agent_names = {
             self._runtime.solver_agent.name,
             self._runtime.web_research_agent.name,
         }
         async for event in run_result.stream_events():
             if isinstance(event, AgentUpdatedStreamEvent):
+                if event.new_agent.name != current_agent_name:
+                    now = time.perf_counter()
+                    timings.add_agent(current_agent_name, now - agent_started)
+                    agent_started = now
                 current_agent_name = event.new_agent.name
                 research_used = research_used or (
                     current_agent_name in {
@@ -363,6 +784,13 @@ class AgenticMathBackend:
                             self._runtime.web_research_agent.name,
                         }
                     )
+                    timings.handoffs += 1
+                    HANDOFFS.inc(from_agent=source_agent, to_agent=target_agent)
+                    if target_agent == self._runtime.web_research_agent.name:
+                        cacheable = False
+                        self._close_prefetch(run_state)
+                    for released in tool_order.flush():
+                        yield released
                     yield {
                         "type": "handoff",
                         "from_agent": source_agent,
@@ -377,12 +805,15 @@ class AgenticMathBackend:
                         continue
 
                     research_used = True
+                    cacheable = cacheable and tool_name not in {"web_search", "math_web_search"}
+                    call_id = getattr(raw_item, "call_id", None)
+                    tool_order.called(call_id, tool_name)
                     yield {
                         "type": "tool_call",
                         "agent": getattr(event.item.agent, "name", current_agent_name),
                         "tool_name": tool_name,
                         "arguments": getattr(raw_item, "arguments", None) or "",
-                        "call_id": getattr(raw_item, "call_id", None),
+                        "call_id": call_id,
                     }
                     continue
 
@@ -396,17 +827,20 @@ class AgenticMathBackend:
                     else:
                         tool_name = getattr(raw_item, "name", None)
                         call_id = getattr(raw_item, "call_id", None)
+                    tool_name = tool_name or tool_order.tool_name(call_id)
 
                     if (tool_name or "").startswith("transfer_to_"):
                         continue
 
-                    yield {
+                    output_event = {
                         "type": "tool_output",
                         "agent": getattr(event.item.agent, "name", current_agent_name),
                         "tool_name": tool_name or "tool",
                         "call_id": call_id,
                         "text": self._stringify_tool_output(event.item.output),
                     }
+                    for released in tool_order.completed(call_id, output_event):
+                        yield released
                     continue
 
             if not isinstance(event, RawResponsesStreamEvent):
@@ -422,30 +856,52 @@ class AgenticMathBackend:
                 "response.reasoning_summary_text.delta",
                 "response.reasoning_text.delta",
             }:
-                reasoning_text = getattr(data, "delta", None)
+                with timings.phase("output_guard"):
+                    reasoning_text = reasoning_guard.feed(getattr(data, "delta", None) or "")
                 if reasoning_text:
-                    reasoning_chunks.append(reasoning_text)
                     yield {"type": "reason", "text": reasoning_text}
                 continue
 
             if data_type in {"response.output_text.delta", "response.refusal.delta"}:
-                answer_text = getattr(data, "delta", None)
+                cacheable = cacheable and data_type != "response.refusal.delta"
+                with timings.phase("output_guard"):
+                    answer_text = answer_guard.feed(getattr(data, "delta", None) or "")
                 if answer_text:
-                    answer_chunks.append(answer_text)
                     yield {"type": "answer", "text": answer_text}
 
+        for released in tool_order.flush():
+            yield released
+        timings.add_agent(current_agent_name, time.perf_counter() - agent_started)
+
+        for event_type, guard in (("reason", reasoning_guard), ("answer", answer_guard)):
+            with timings.phase("output_guard"):
+                tail = guard.finish()
+            if tail:
+                yield {"type": event_type, "text": tail}
+
         final_output = str(run_result.final_output).strip() if run_result.final_output else ""
-        final_answer = self._output_guard(final_output or "".join(answer_chunks).strip())
-        final_reasoning = "".join(reasoning_chunks).strip()
+        with timings.phase("output_guard"):
+            final_answer = answer_guard.final_text(final_output)
+            final_reasoning = reasoning_guard.final_text()
         last_agent_name = getattr(run_result.last_agent, "name", current_agent_name)
-        yield {
+        done_event = {
             "type": "done",
             "answer": final_answer,
             "reasoning": final_reasoning,
             "metadata": {
                 "backend": self.backend_name,
                 "last_agent": last_agent_name,
-                "model": self._model_for_agent(last_agent_name),
+                "model": self._served_model,
                 "research_used": research_used,
+                "cache_hit": False,
+                "route": route,
+                "model_decisions": run_state.model_decisions,
             },
         }
+        if run_state.prefetch is not None:
+            run_state.prefetch.close()
+            done_event["metadata"]["kb_prefetch"] = run_state.prefetch.summary()
+        cacheable = cacheable and final_answer not in {"", UNSAFE_OUTPUT_MESSAGE}
+        if self.answer_cache is not None and cacheable:
+            await self.answer_cache.store(validated_question, done_event)
+        yield done_event
@@ -0,0 +1,143 @@
+"""Semantic cache of completed answers keyed by validated questions."""
+
+import copy
+import hashlib
+import re
+import time
+from collections import OrderedDict
+from collections.abc import Awaitable, Callable
+from dataclasses import dataclass
+from typing import Any
+
+import numpy as np
+
+from agentturing.utils.metrics import METRICS
+
+from .web_search import normalize_query
+
+LOOKUPS = METRICS.counter(
+    "agentturing_answer_cache_lookups_total",
+    "Answer cache lookups by result (exact, semantic, miss).",
+    ("result",),
+)
+EVICTIONS = METRICS.counter(
+    "agentturing_answer_cache_evictions_total",
+    "Answers evicted from the cache to stay within ANSWER_CACHE_SIZE.",
+)
+
+# Numbers, operators and single-letter variables, in order; MiniLM barely sees them.
+_MATH_TOKEN = re.compile(r"\d+(?:\.\d+)?|[=+\-*/^<>()]|(?<![a-z'])[a-z](?![a-z])")
+
+
+def math_signature(question: str) -> tuple[str, ...]:
+    """Return the numbers, operators and variables of a question in order."""
+    return tuple(_MATH_TOKEN.findall(question.lower().replace("**", "^")))
+
+
+@dataclass
+class CachedAnswer:
+    """A stored ``done`` event together with the question embedding."""
+
+    question: str
+    vector: np.ndarray
+    signature: tuple[str, ...]
+    done_event: dict[str, Any]
+    expires_at: float
+
+
+@dataclass
+class CacheMatch:
+    """A cache lookup result and how it was found."""
+
+    done_event: dict[str, Any]
+    tier: str
+    similarity: float
+
+
+class AnswerCache:
+    """Two-tier answer cache: exact question hash first, then cosine similarity.
+
+    A semantic hit also needs the same numbers, operators and variables in the
+    same order, so "Solve 2x+5=17" never replays the answer to "Solve 2x+5=19".
+    Entries are evicted least-recently-used once ``max_entries`` is reached and
+    expire after ``ttl`` seconds.
+    """
+
+    def __init__(
+        self,
+        embed: Callable[[str], Awaitable[list[float]]],
+        max_entries: int = 1024,
+        similarity_threshold: float = 0.95,
+        ttl: float = 86400.0,
+    ) -> None:
+        self._embed = embed
+        self.max_entries = max(1, max_entries)
+        self.similarity_threshold = similarity_threshold
+        self.ttl = ttl
+        self._entries: OrderedDict[str, CachedAnswer] = OrderedDict()
+
+    @staticmethod
+    def _key(question: str) -> str:
+        return hashlib.sha256(normalize_query(question).encode("utf-8")).hexdigest()
+
+    async def _vector(self, question: str) -> np.ndarray:
+        """Embed and L2-normalize a question so dot products are cosine scores."""
+        vector = np.asarray(await self._embed(question), dtype=np.float32)
+        norm = float(np.linalg.norm(vector))
+        return vector / norm if norm else vector
+
+    def _drop_expired(self) -> None:
+        now = time.monotonic()
+        expired = [key for key, entry in self._entries.items() if entry.expires_at <= now]
+        for key in expired:
+            del self._entries[key]
+
+    async def lookup(self, question: str) -> CacheMatch | None:
+        """Return a cached answer for the same or a near-duplicate question."""
+        self._drop_expired()
+        key = self._key(question)
+
+        entry = self._entries.get(key)
+        if entry is not None:
+            self._entries.move_to_end(key)
+            LOOKUPS.inc(result="exact")
+            return CacheMatch(copy.deepcopy(entry.done_event), tier="exact", similarity=1.0)
+
+        if self._entries:
+            vector = await self._vector(question)
+            keys = list(self._entries)
+            matrix = np.stack([self._entries[k].vector for k in keys])
+            scores = matrix @ vector
+            signature = math_signature(question)
+            for index, entry_key in enumerate(keys):
+                if self._entries[entry_key].signature != signature:
+                    scores[index] = -1.0
+            best = int(np.argmax(scores))
+            similarity = float(scores[best])
+            if similarity >= self.similarity_threshold:
+                self._entries.move_to_end(keys[best])
+                LOOKUPS.inc(result="semantic")
+                return CacheMatch(
+                    copy.deepcopy(self._entries[keys[best]].done_event),
+                    tier="semantic",
+                    similarity=similarity,
+                )
+
+        LOOKUPS.inc(result="miss")
+        return None
+
+    async def store(self, question: str, done_event: dict[str, Any]) -> None:
+        """Remember the final event of a completed run."""
+        key = self._key(question)
+        vector = await self._vector(question)
+        self._entries[key] = CachedAnswer(
+            question=question,
+            vector=vector,
+            signature=math_signature(question),
+            done_event=copy.deepcopy(done_event),
+            expires_at=time.monotonic() + self.ttl,
+        )
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            EVICTIONS.inc()
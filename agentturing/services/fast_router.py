@@ -0,0 +1,166 @@
+"""Local embedding classifier that routes confident requests without an LLM call."""
+
+import asyncio
+import json
+from collections.abc import Awaitable, Callable
+from dataclasses import dataclass
+
+import numpy as np
+
+SOLVER_ROUTE = "solver"
+WEB_RESEARCH_ROUTE = "web_research"
+
+ROUTER_EXAMPLES: tuple[tuple[str, str], ...] = (
+    ("Solve 2x + 5 = 17 for x.", SOLVER_ROUTE),
+    ("Find the critical points of f(x) = x^3 - 3x^2 + 2.", SOLVER_ROUTE),
+    ("What is the integral of e^{-x} x^3 from 0 to 1?", SOLVER_ROUTE),
+    ("Differentiate sin(x) * cos(x) with respect to x.", SOLVER_ROUTE),
+    ("Prove that the square root of 2 is irrational.", SOLVER_ROUTE),
+    ("Simplify (x^2 - 9) / (x - 3).", SOLVER_ROUTE),
+    ("How many ways can 5 books be arranged on a shelf?", SOLVER_ROUTE),
+    ("Explain the concept of p-adic numbers.", SOLVER_ROUTE),
+    ("What is the probability of rolling two sixes with two dice?", SOLVER_ROUTE),
+    ("Compute the determinant of the matrix [[1, 2], [3, 4]].", SOLVER_ROUTE),
+    ("Factor the quadratic x^2 + 5x + 6.", SOLVER_ROUTE),
+    ("Find the limit of sin(x)/x as x approaches 0.", SOLVER_ROUTE),
+    ("Explain why the derivative of e^x is e^x.", SOLVER_ROUTE),
+    ("What is the variance of a binomial random variable?", SOLVER_ROUTE),
+    ("A train travels 120 km in 2 hours. What is its average speed?", SOLVER_ROUTE),
+    ("Teach me how to complete the square.", SOLVER_ROUTE),
+    ("How do I solve a system of two linear equations?", SOLVER_ROUTE),
+    ("Find the eigenvalues of a 2x2 rotation matrix.", SOLVER_ROUTE),
+    ("What is the sum of the first 100 positive integers?", SOLVER_ROUTE),
+    ("Show that the sum of angles in a triangle is 180 degrees.", SOLVER_ROUTE),
+    ("Summarize recent papers on neural theorem proving.", WEB_RESEARCH_ROUTE),
+    ("What is the history of Fermat's Last Theorem and who proved it?", WEB_RESEARCH_ROUTE),
+    ("Compare transformer architectures used for math reasoning.", WEB_RESEARCH_ROUTE),
+    ("Who won the Fields Medal in 2022?", WEB_RESEARCH_ROUTE),
+    ("What are the latest results on the Riemann hypothesis?", WEB_RESEARCH_ROUTE),
+    ("Which universities have the best mathematics PhD programs?", WEB_RESEARCH_ROUTE),
+    ("Give an overview of methods for training LLMs on math datasets.", WEB_RESEARCH_ROUTE),
+    ("What software do mathematicians use for formal proofs today?", WEB_RESEARCH_ROUTE),
+    ("Find research papers about graph neural networks for combinatorics.", WEB_RESEARCH_ROUTE),
+    ("What is the current status of the twin prime conjecture research?", WEB_RESEARCH_ROUTE),
+    ("Describe the life and work of Srinivasa Ramanujan.", WEB_RESEARCH_ROUTE),
+    ("What datasets are commonly used to benchmark math word problem solvers?", WEB_RESEARCH_ROUTE),
+    ("How does Wolfram Alpha compare to Symbolab as a product?", WEB_RESEARCH_ROUTE),
+    (
+        "What are current trends in quantum computing algorithms for linear algebra?",
+        WEB_RESEARCH_ROUTE,
+    ),
+    ("Explain the architecture of AlphaGeometry from DeepMind.", WEB_RESEARCH_ROUTE),
+    ("Which conferences publish work on automated theorem proving?", WEB_RESEARCH_ROUTE),
+)
+
+
+@dataclass
+class RouteDecision:
+    """Outcome of the local router for a single question."""
+
+    route: str
+    confidence: float
+    confident: bool
+
+
+def load_router_examples(path: str | None) -> list[tuple[str, str]]:
+    """Return the built-in labeled examples plus any extras from a JSONL file.
+
+    Each line of the file must be an object with ``text`` and ``label`` keys,
+    where ``label`` is ``solver`` or ``web_research``.
+    """
+    examples = list(ROUTER_EXAMPLES)
+    if not path:
+        return examples
+
+    with open(path, encoding="utf-8") as handle:
+        for line in handle:
+            line = line.strip()
+            if not line:
+                continue
+            record = json.loads(line)
+            if record.get("label") in {SOLVER_ROUTE, WEB_RESEARCH_ROUTE}:
+                examples.append((record["text"], record["label"]))
+    return examples
+
+
+def _train_logistic_regression(
+    features: np.ndarray,
+    labels: np.ndarray,
+    epochs: int = 400,
+    learning_rate: float = 0.5,
+    l2: float = 1e-3,
+) -> tuple[np.ndarray, float]:
+    """Fit binary logistic regression with full-batch gradient descent."""
+    weights = np.zeros(features.shape[1], dtype=np.float32)
+    bias = 0.0
+    for _ in range(epochs):
+        logits = features @ weights + bias
+        probs = 1.0 / (1.0 + np.exp(-logits))
+        error = probs - labels
+        weights -= learning_rate * (features.T @ error / len(labels) + l2 * weights)
+        bias -= learning_rate * float(error.mean())
+    return weights, bias
+
+
+class FastRouter:
+    """Classify questions as solver or web research work from their embeddings.
+
+    The classifier is a logistic regression over normalized MiniLM embeddings,
+    trained once on first use. Decisions below ``threshold`` are marked as not
+    confident so the caller can fall back to the LLM router.
+    """
+
+    def __init__(
+        self,
+        embed_query: Callable[[str], Awaitable[list[float]]],
+        embed_documents: Callable[[list[str]], Awaitable[list[list[float]]]],
+        examples: list[tuple[str, str]],
+        threshold: float = 0.85,
+    ) -> None:
+        self._embed_query = embed_query
+        self._embed_documents = embed_documents
+        self._examples = examples
+        self.threshold = threshold
+        self._weights: np.ndarray | None = None
+        self._bias = 0.0
+        self._train_lock = asyncio.Lock()
+
+    @staticmethod
+    def _normalize(vectors: np.ndarray) -> np.ndarray:
+        norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+        return vectors / np.where(norms == 0, 1.0, norms)
+
+    async def ensure_trained(self) -> None:
+        """Embed the labeled examples and fit the classifier once."""
+        if self._weights is not None:
+            return
+
+        async with self._train_lock:
+            if self._weights is not None:
+                return
+            texts = [text for text, _ in self._examples]
+            features = self._normalize(
+                np.asarray(await self._embed_documents(texts), dtype=np.float32)
+            )
+            labels = np.asarray(
+                [1.0 if label == WEB_RESEARCH_ROUTE else 0.0 for _, label in self._examples],
+                dtype=np.float32,
+            )
+            self._weights, self._bias = _train_logistic_regression(features, labels)
+
+    async def route(self, question: str) -> RouteDecision:
+        """Return the predicted route and its probability for a question."""
+        await self.ensure_trained()
+        vector = self._normalize(
+            np.asarray(await self._embed_query(question), dtype=np.float32)
+        )
+        web_probability = float(1.0 / (1.0 + np.exp(-(vector @ self._weights + self._bias))))
+        if web_probability >= 0.5:
+            route, confidence = WEB_RESEARCH_ROUTE, web_probability
+        else:
+            route, confidence = SOLVER_ROUTE, 1.0 - web_probability
+        return RouteDecision(
+            route=route,
+            confidence=confidence,
+            confident=confidence >= self.threshold,
+        )
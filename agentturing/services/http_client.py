@@ -0,0 +1,237 @@
+"""Shared, instrumented HTTP connection pool for the model provider and Tavily.
+
+Every agent hop (Router, Solver, research agents) and every web search goes
+through one ``httpx.AsyncClient``, so a hop reuses a connection that an earlier
+hop or the startup warm-up already opened instead of paying TCP and TLS setup
+again. Idle connections are kept for ``HTTP_KEEPALIVE_EXPIRY`` seconds rather
+than httpx's default of five.
+"""
+
+import asyncio
+import importlib.util
+import time
+from typing import Any
+from urllib.parse import urlsplit
+
+import httpx
+
+from agentturing.config import Settings
+from agentturing.utils.metrics import METRICS
+
+REQUESTS_IN_FLIGHT = METRICS.gauge(
+    "agentturing_http_requests_in_flight",
+    "Outbound HTTP requests in progress on the shared client, by origin.",
+    ("origin",),
+)
+POOL_CONNECTIONS = METRICS.gauge(
+    "agentturing_http_pool_connections",
+    "Connections held by the shared pool, by state (active or idle).",
+    ("state",),
+)
+POOL_UTILIZATION = METRICS.gauge(
+    "agentturing_http_pool_utilization",
+    "Active connections as a fraction of HTTP_MAX_CONNECTIONS.",
+)
+CONNECTIONS_OPENED = METRICS.counter(
+    "agentturing_http_connections_opened_total",
+    "New connections opened by the shared client, by origin.",
+    ("origin",),
+)
+CONNECT_SECONDS = METRICS.histogram(
+    "agentturing_http_connect_seconds",
+    "TCP connect plus TLS handshake time of new connections, by origin.",
+    ("origin",),
+)
+REQUEST_SECONDS = METRICS.histogram(
+    "agentturing_http_request_seconds",
+    "Time to response headers of outbound requests, by origin.",
+    ("origin",),
+)
+
+_CONNECT_STEPS = ("connection.connect_tcp", "connection.start_tls")
+# Most a closed-early response is read ahead to keep its HTTP/1.1 connection.
+DRAIN_MAX_BYTES = 64 * 1024
+DRAIN_TIMEOUT = 0.05
+
+
+def http2_available() -> bool:
+    """Return whether the optional ``h2`` package that httpx needs for HTTP/2 is installed."""
+    return importlib.util.find_spec("h2") is not None
+
+
+def _origin(url: httpx.URL | str) -> str:
+    parts = urlsplit(str(url))
+    return f"{parts.scheme}://{parts.netloc}"
+
+
+class _DrainingStream(httpx.AsyncByteStream):
+    """Response body that finishes a nearly complete read before closing.
+
+    The OpenAI SDK closes a streamed completion as soon as it sees ``[DONE]``,
+    before the final empty chunk of the HTTP/1.1 body has been read, and httpx
+    then discards the connection. Reading what is left, within a small byte and
+    time budget, lets the connection go back to the pool; a body that is still
+    streaming (an abandoned run) is closed as before.
+    """
+
+    def __init__(self, stream: httpx.AsyncByteStream) -> None:
+        self._stream = stream
+        self._iterator: Any = None
+        self._finished = False
+
+    async def __aiter__(self):
+        self._iterator = self._stream.__aiter__()
+        async for chunk in self._iterator:
+            yield chunk
+        self._finished = True
+
+    async def aclose(self) -> None:
+        """Drain a nearly finished body so the connection is reused, then close it."""
+        if self._iterator is not None and not self._finished:
+            drained = 0
+            try:
+                async with asyncio.timeout(DRAIN_TIMEOUT):
+                    async for chunk in self._iterator:
+                        drained += len(chunk)
+                        if drained > DRAIN_MAX_BYTES:
+                            break
+            except (TimeoutError, httpx.HTTPError):
+                pass
+        await self._stream.aclose()
+
+
+class PooledTransport(httpx.AsyncBaseTransport):
+    """``AsyncHTTPTransport`` wrapper that exports pool and connection metrics.
+
+    New connections are detected through httpcore's ``trace`` extension, so
+    the time spent in TCP connect and TLS handshakes is measured per origin.
+    """
+
+    def __init__(self, limits: httpx.Limits, http2: bool) -> None:
+        self._transport = httpx.AsyncHTTPTransport(limits=limits, http2=http2)
+        self._max_connections = limits.max_connections
+        self.http2 = http2
+
+    def stats(self) -> dict[str, Any]:
+        """Return the pool's active and idle connections and its utilization."""
+        # httpx keeps the httpcore pool private; skip the counts if that changes.
+        pool = getattr(self._transport, "_pool", None)
+        connections = list(getattr(pool, "connections", []))
+        idle = sum(1 for connection in connections if connection.is_idle())
+        active = len(connections) - idle
+        return {
+            "active": active,
+            "idle": idle,
+            "max_connections": self._max_connections,
+            "utilization": round(active / self._max_connections, 4)
+            if self._max_connections
+            else None,
+            "http2": self.http2,
+        }
+
+    def _record_pool(self) -> None:
+        stats = self.stats()
+        POOL_CONNECTIONS.set(stats["active"], state="active")
+        POOL_CONNECTIONS.set(stats["idle"], state="idle")
+        if stats["utilization"] is not None:
+            POOL_UTILIZATION.set(stats["utilization"])
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        """Send ``request`` through the pool, timing connects and draining the body on close."""
+        origin = _origin(request.url)
+        outer_trace = request.extensions.get("trace")
+        connect_started: dict[str, float] = {}
+
+        async def trace(event_name: str, info: dict[str, Any]) -> None:
+            step, _, phase = event_name.rpartition(".")
+            if step in _CONNECT_STEPS:
+                if phase == "started":
+                    connect_started[step] = time.perf_counter()
+                elif phase == "complete" and step in connect_started:
+                    elapsed = time.perf_counter() - connect_started[step]
+                    connect_started["total"] = connect_started.get("total", 0.0) + elapsed
+                    if step == "connection.connect_tcp":
+                        CONNECTIONS_OPENED.inc(origin=origin)
+            if outer_trace is not None:
+                await outer_trace(event_name, info)
+
+        request.extensions["trace"] = trace
+        REQUESTS_IN_FLIGHT.inc(origin=origin)
+        started = time.perf_counter()
+        try:
+            response = await self._transport.handle_async_request(request)
+        finally:
+            REQUESTS_IN_FLIGHT.dec(origin=origin)
+            self._record_pool()
+        REQUEST_SECONDS.observe(time.perf_counter() - started, origin=origin)
+        if "total" in connect_started:
+            CONNECT_SECONDS.observe(connect_started["total"], origin=origin)
+        response.stream = _DrainingStream(response.stream)
+        return response
+
+    async def aclose(self) -> None:
+        """Close the wrapped transport and its pooled connections."""
+        await self._transport.aclose()
+
+
+def build_http_client(settings: Settings) -> httpx.AsyncClient:
+    """Create the shared async client with the configured pool, timeouts and protocol."""
+    http2 = settings.http2_enabled and http2_available()
+    if settings.http2_enabled and not http2:
+        print("HTTP/2 requested but the h2 package is missing; using HTTP/1.1.")
+    limits = httpx.Limits(
+        max_connections=settings.http_max_connections,
+        max_keepalive_connections=settings.http_max_keepalive_connections,
+        keepalive_expiry=settings.http_keepalive_expiry,
+    )
+    return httpx.AsyncClient(
+        transport=PooledTransport(limits, http2),
+        timeout=build_http_timeout(settings),
+    )
+
+
+def build_http_timeout(settings: Settings) -> httpx.Timeout:
+    """Return the connect/read/write/pool timeouts for outbound requests."""
+    return httpx.Timeout(
+        connect=settings.http_connect_timeout,
+        read=settings.http_read_timeout,
+        write=settings.http_connect_timeout,
+        pool=settings.http_connect_timeout,
+    )
+
+
+def pool_stats(client: httpx.AsyncClient) -> dict[str, Any] | None:
+    """Return the shared pool's utilization, or None for a client built elsewhere."""
+    # pylint: disable-next=protected-access
+    transport = client._transport
+    return transport.stats() if isinstance(transport, PooledTransport) else None
+
+
+async def warm_up_connections(
+    client: httpx.AsyncClient,
+    urls: list[str],
+    connections: int = 1,
+    headers: dict[str, dict[str, str]] | None = None,
+) -> dict[str, str]:
+    """Open ``connections`` keep-alive connections to each URL's origin.
+
+    Each connection is opened by a concurrent ``HEAD`` request; the response
+    status does not matter, only that the connection ends up in the pool.
+    Returns ``"ok"`` or the error per URL; failures do not raise.
+    """
+    headers = headers or {}
+
+    async def touch(url: str) -> None:
+        response = await client.head(url, headers=headers.get(url))
+        await response.aclose()
+
+    async def warm(url: str) -> tuple[str, str]:
+        results = await asyncio.gather(
+            *(touch(url) for _ in range(max(1, connections))), return_exceptions=True
+        )
+        errors = [result for result in results if isinstance(result, Exception)]
+        if errors:
+            return url, f"{type(errors[0]).__name__}: {errors[0]}"
+        return url, "ok"
+
+    return dict(await asyncio.gather(*(warm(url) for url in urls)))
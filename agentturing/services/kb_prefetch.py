@@ -0,0 +1,134 @@
+"""Speculative knowledge base retrieval started before the agents ask for it."""
+
+import asyncio
+import time
+
+import numpy as np
+
+from agentturing.utils.context_packer import pack_context
+from agentturing.utils.metrics import METRICS
+from agentturing.utils.sanitize_output import format_kb_passages, kb_passages
+
+from .web_search import normalize_query
+
+PREFETCH_OUTCOMES = METRICS.counter(
+    "agentturing_kb_prefetch_total",
+    "Speculative knowledge base prefetches by outcome.",
+    ("outcome",),
+)
+
+
+class KnowledgePrefetch:
+    """One request's speculative knowledge base search.
+
+    The search for the validated question starts as soon as the object is
+    created. ``lookup`` serves a later ``search_knowledge_base`` call from it
+    when the tool query is the same question or its embedding is at least
+    ``similarity`` cosine-close. ``brief`` packs strong hits into
+    ``token_budget`` tokens for the solver's instructions.
+
+    ``close`` cancels the search if it is still running and records how the
+    prefetch was used.
+    """
+
+    def __init__(  # pylint: disable=too-many-arguments
+        self,
+        knowledge_base,
+        question: str,
+        *,
+        top_k: int = 4,
+        similarity: float = 0.9,
+        min_score: float = 0.8,
+        token_budget: int = 1200,
+    ) -> None:
+        self._knowledge_base = knowledge_base
+        self.question = question
+        self.top_k = top_k
+        self.similarity = similarity
+        self.min_score = min_score
+        self.token_budget = token_budget
+        self.started = time.perf_counter()
+        self.seconds: float | None = None
+        self.used_by: set[str] = set()
+        self.outcome: str | None = None
+        self._vector: np.ndarray | None = None
+        self._task = asyncio.create_task(self._run())
+
+    async def _run(self):
+        vector = await self._knowledge_base.embed_query(self.question)
+        array = np.asarray(vector, dtype=np.float32)
+        norm = float(np.linalg.norm(array))
+        self._vector = array / norm if norm else array
+        chunks = await self._knowledge_base.search(self.question, top_k=self.top_k, vector=vector)
+        self.seconds = time.perf_counter() - self.started
+        return chunks
+
+    async def _result(self, wait: float | None = None):
+        """Return the prefetched chunks, or None if they failed or did not arrive in time."""
+        try:
+            if wait is None:
+                return await asyncio.shield(self._task)
+            return await asyncio.wait_for(asyncio.shield(self._task), wait)
+        except TimeoutError:
+            return None
+        except asyncio.CancelledError:
+            # Only swallow the cancellation of the prefetch itself, not of the caller.
+            if self._task.cancelled():
+                return None
+            raise
+        except Exception:  # pylint: disable=broad-exception-caught
+            return None
+
+    async def _matches(self, query: str) -> bool:
+        if normalize_query(query) == normalize_query(self.question):
+            return True
+        if self._vector is None:
+            return False
+        vector = np.asarray(await self._knowledge_base.embed_query(query), dtype=np.float32)
+        norm = float(np.linalg.norm(vector))
+        return bool(norm) and float(self._vector @ (vector / norm)) >= self.similarity
+
+    async def lookup(self, query: str, top_k: int):
+        """Return prefetched chunks for a matching tool query, or None to search normally."""
+        if top_k > self.top_k:
+            return None
+        chunks = await self._result()
+        if chunks is None or not await self._matches(query):
+            return None
+        self.used_by.add("tool")
+        return chunks[:top_k]
+
+    async def brief(self, wait: float) -> str:
+        """Return strong prefetched hits as prompt context, waiting at most ``wait`` seconds."""
+        chunks = await self._result(wait)
+        strong = [chunk for chunk in chunks or [] if chunk.score >= self.min_score]
+        if not strong:
+            return ""
+        self.used_by.add("solver")
+        packed = await pack_context(kb_passages(strong), self.token_budget)
+        packed.record("kb_prefetch")
+        return "\n\n".join(format_kb_passages(packed.passages))
+
+    def summary(self) -> dict:
+        """Return the outcome and search time for the ``done`` metadata."""
+        return {
+            "outcome": self.outcome or "pending",
+            "ms": None if self.seconds is None else round(self.seconds * 1000, 2),
+        }
+
+    def close(self) -> str:
+        """Cancel the search if it is still running and record the outcome once."""
+        if self.outcome is not None:
+            return self.outcome
+        if not self._task.done():
+            self._task.cancel()
+            outcome = "cancelled"
+        elif self._task.cancelled() or self._task.exception() is not None:
+            outcome = "failed"
+        elif self.used_by:
+            outcome = "used_by_" + "_and_".join(sorted(self.used_by))
+        else:
+            outcome = "unused"
+        PREFETCH_OUTCOMES.inc(outcome=outcome)
+        self.outcome = outcome
+        return outcome
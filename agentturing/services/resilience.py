@@ -0,0 +1,515 @@
+"""Hedged model calls and circuit-broken fallback to another model.
+
+Both wrappers are applied by ``ResilientModelProvider`` per agent, on top of
+the per-model concurrency caps, so every duplicate or fallback request still
+waits for its own model slot. The agent making a call is the one last passed
+to ``note_model_agent`` in the run started after ``track_model_agents``.
+Decisions taken for a run's model calls are collected in the list passed to
+``record_model_decisions``.
+"""
+
+import asyncio
+import contextlib
+import contextvars
+import math
+import time
+from collections import deque
+from collections.abc import AsyncIterator, Awaitable, Callable
+from typing import Any
+
+import httpx
+
+from agentturing.config import Settings
+from agentturing.utils.metrics import METRICS
+
+# First-event latencies kept per hedged model for the hedge delay percentile.
+LATENCY_WINDOW = 200
+# Samples needed before the percentile replaces the initial hedge delay.
+MIN_LATENCY_SAMPLES = 20
+CIRCUIT_STATES = {"closed": 0, "open": 1, "half_open": 2}
+
+FIRST_EVENT_SECONDS = METRICS.histogram(
+    "agentturing_model_first_event_seconds",
+    "Time from a hedged model's request to its first streamed event, by model.",
+    ("model",),
+)
+HEDGES = METRICS.counter(
+    "agentturing_model_hedges_total",
+    "Duplicate model requests sent after the hedge delay, by model and which request won.",
+    ("model", "winner"),
+)
+FALLBACKS = METRICS.counter(
+    "agentturing_model_fallbacks_total",
+    "Model calls moved to the fallback model, by primary model and reason.",
+    ("model", "reason"),
+)
+CIRCUIT_STATE = METRICS.gauge(
+    "agentturing_model_circuit_state",
+    "Circuit breaker state of a primary model: 0 closed, 1 open, 2 half-open.",
+    ("model",),
+)
+
+# Decision log of the run in the current task; model calls append to it.
+_DECISIONS: contextvars.ContextVar[list[dict[str, Any]] | None] = contextvars.ContextVar(
+    "agentturing_model_decisions", default=None
+)
+
+
+def record_model_decisions(decisions: list[dict[str, Any]]) -> None:
+    """Collect hedge and fallback decisions of the current task's model calls in ``decisions``."""
+    _DECISIONS.set(decisions)
+
+
+# Agent making the model calls of the run in the current task, in a one-item
+# list so the SDK's hook tasks and its run loop share it.
+_AGENT: contextvars.ContextVar[list[str] | None] = contextvars.ContextVar(
+    "agentturing_model_agent", default=None
+)
+
+
+def track_model_agents() -> None:
+    """Start routing the current task's model calls by the agent making them."""
+    _AGENT.set([""])
+
+
+def note_model_agent(name: str) -> None:
+    """Record that agent ``name`` makes the current run's next model calls."""
+    agent = _AGENT.get()
+    if agent is not None:
+        agent[0] = name
+
+
+def _decide(decision: dict[str, Any]) -> None:
+    decisions = _DECISIONS.get()
+    if decisions is not None:
+        decisions.append(decision)
+
+
+def is_provider_failure(exc: BaseException) -> bool:
+    """Return whether ``exc`` is a transport error, timeout, rate limit or 5xx from the provider."""
+    from openai import APIConnectionError, APIStatusError  # pylint: disable=import-outside-toplevel
+
+    if isinstance(exc, APIStatusError):
+        return exc.status_code == 429 or exc.status_code >= 500
+    return isinstance(exc, (APIConnectionError, httpx.HTTPError, TimeoutError))
+
+
+async def _open_stream(model: Any, args: tuple, kwargs: dict) -> tuple[AsyncIterator[Any], Any]:
+    """Start a streamed call and wait for its first event (None for an empty stream)."""
+    stream = model.stream_response(*args, **kwargs)
+    try:
+        return stream, await anext(stream, None)
+    except BaseException:
+        await stream.aclose()
+        raise
+
+
+class LatencyWindow:
+    """Recent time-to-first-event samples of one model."""
+
+    def __init__(self, size: int = LATENCY_WINDOW) -> None:
+        self._samples: deque[float] = deque(maxlen=size)
+
+    def add(self, seconds: float) -> None:
+        """Record one sample."""
+        self._samples.append(seconds)
+
+    def percentile(self, percent: float) -> float | None:
+        """Return the nearest-rank ``percent`` percentile, or None with too few samples."""
+        if len(self._samples) < MIN_LATENCY_SAMPLES:
+            return None
+        ordered = sorted(self._samples)
+        index = math.ceil(percent / 100 * len(ordered)) - 1
+        return ordered[min(len(ordered) - 1, max(0, index))]
+
+
+class CircuitBreaker:
+    """Failure-rate circuit breaker over the last ``window`` calls of one model.
+
+    The circuit opens once at least ``min_calls`` outcomes are recorded and
+    the failed share reaches ``error_rate``. While open, ``allow`` refuses
+    calls; after ``cooldown`` seconds one probe call is let through
+    (half-open), and its success closes the circuit again while its failure
+    reopens it.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        *,
+        window: int,
+        min_calls: int,
+        error_rate: float,
+        cooldown: float,
+    ) -> None:
+        self.name = name
+        self.min_calls = min_calls
+        self.error_rate = error_rate
+        self.cooldown = cooldown
+        self.state = "closed"
+        self._outcomes: deque[bool] = deque(maxlen=window)
+        self._opened_at = 0.0
+        self._probing = False
+        self._set_state("closed")
+
+    def _set_state(self, state: str) -> None:
+        self.state = state
+        CIRCUIT_STATE.set(CIRCUIT_STATES[state], model=self.name)
+
+    def _open(self) -> None:
+        self._outcomes.clear()
+        self._opened_at = time.monotonic()
+        self._probing = False
+        self._set_state("open")
+
+    def allow(self) -> bool:
+        """Return whether a call may go to the model now."""
+        if self.state == "open":
+            if time.monotonic() - self._opened_at < self.cooldown:
+                return False
+            self._set_state("half_open")
+        if self.state == "half_open":
+            if self._probing:
+                return False
+            self._probing = True
+        return True
+
+    def record(self, success: bool) -> None:
+        """Record the outcome of an allowed call."""
+        if self.state == "open":
+            return
+        if self.state == "half_open":
+            self._probing = False
+            if success:
+                self._outcomes.clear()
+                self._set_state("closed")
+            else:
+                self._open()
+            return
+        self._outcomes.append(success)
+        failures = self._outcomes.count(False)
+        if (
+            len(self._outcomes) >= self.min_calls
+            and failures / len(self._outcomes) >= self.error_rate
+        ):
+            self._open()
+
+    def release(self) -> None:
+        """Forget an allowed call that ended without a provider outcome."""
+        self._probing = False
+
+
+class _StreamAttempt:
+    """One streamed request, read by its own task into a queue.
+
+    The SDK opens tracing spans inside ``stream_response``, so a stream must
+    be iterated from start to finish in one task; racing two of them therefore
+    goes through a task each. ``first`` resolves with the first event or the
+    request's error.
+    """
+
+    _END = object()
+
+    def __init__(self, model: Any, args: tuple, kwargs: dict) -> None:
+        self.first: asyncio.Future = asyncio.get_running_loop().create_future()
+        self._events: asyncio.Queue = asyncio.Queue()
+        self._task = asyncio.ensure_future(self._pump(model, args, kwargs))
+
+    async def _pump(self, model: Any, args: tuple, kwargs: dict) -> None:
+        try:
+            async with contextlib.aclosing(model.stream_response(*args, **kwargs)) as stream:
+                async for event in stream:
+                    if not self.first.done():
+                        self.first.set_result(None)
+                    self._events.put_nowait(event)
+        except Exception as exc:  # pylint: disable=broad-exception-caught
+            if self.first.done():
+                self._events.put_nowait(exc)
+            else:
+                self.first.set_exception(exc)
+            return
+        if not self.first.done():
+            self.first.set_result(None)
+        self._events.put_nowait(self._END)
+
+    async def events(self) -> AsyncIterator[Any]:
+        """Yield the streamed events, raising the request's error if it fails midway."""
+        while (event := await self._events.get()) is not self._END:
+            if isinstance(event, Exception):
+                raise event
+            yield event
+
+    async def close(self) -> None:
+        """Cancel the request if it is still running."""
+        self._task.cancel()
+        await asyncio.gather(self._task, return_exceptions=True)
+        if self.first.done() and not self.first.cancelled():
+            self.first.exception()
+
+
+class HedgedModel:
+    """Agents SDK ``Model`` wrapper that hedges slow streamed calls.
+
+    If the first streamed event has not arrived ``delay()`` seconds after the
+    request was sent, the same request is sent again and whichever produces an
+    event first is used; the other is cancelled. A request that fails while
+    the other is still pending does not fail the call. Non-streamed calls are
+    passed through.
+    """
+
+    def __init__(
+        self,
+        model: Any,
+        name: str,
+        latency: LatencyWindow,
+        delay: Callable[[], float],
+    ) -> None:
+        self._model = model
+        self._name = name
+        self._latency = latency
+        self._delay = delay
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._model, name)
+
+    async def get_response(self, *args: Any, **kwargs: Any) -> Any:
+        """Return the wrapped model's response."""
+        return await self._model.get_response(*args, **kwargs)
+
+    async def stream_response(self, *args: Any, **kwargs: Any) -> AsyncIterator[Any]:
+        """Stream the response of whichever request produces its first event first."""
+        loop = asyncio.get_running_loop()
+        delay = self._delay()
+        started = loop.time()
+        attempts = {"primary": _StreamAttempt(self._model, args, kwargs)}
+        try:
+            done, _ = await asyncio.wait({attempts["primary"].first}, timeout=delay)
+            hedged = not done
+            if hedged:
+                attempts["hedge"] = _StreamAttempt(self._model, args, kwargs)
+            winner = None
+            while winner is None:
+                labels = {attempt.first: label for label, attempt in attempts.items()}
+                done, _ = await asyncio.wait(labels, return_when=asyncio.FIRST_COMPLETED)
+                winner = next((labels[first] for first in done if first.exception() is None), None)
+                if winner is None:
+                    if len(done) == len(labels):
+                        failed = [first for first in done if first.exception() is not None]
+                        raise failed[0].exception()
+                    for first in done:
+                        del attempts[labels[first]]
+            # Cancel the losing request now rather than after the winner's
+            # stream ends, so it stops using tokens and its model slot.
+            losers = [attempts.pop(label) for label in list(attempts) if label != winner]
+            await asyncio.gather(*(attempt.close() for attempt in losers))
+            # Time since the primary was sent: a lower bound on its own
+            # latency when the hedge won, so the percentile is not dragged down.
+            elapsed = loop.time() - started
+            self._latency.add(elapsed)
+            FIRST_EVENT_SECONDS.observe(elapsed, model=self._name)
+            if hedged:
+                HEDGES.inc(model=self._name, winner=winner)
+                _decide(
+                    {
+                        "model": self._name,
+                        "action": "hedge",
+                        "delay_ms": round(delay * 1000, 1),
+                        "winner": winner,
+                    }
+                )
+            async for event in attempts[winner].events():
+                yield event
+        finally:
+            await asyncio.gather(*(attempt.close() for attempt in attempts.values()))
+
+
+class FallbackModel:
+    """Agents SDK ``Model`` wrapper that moves failing calls to a fallback model.
+
+    A call goes to the fallback when the primary raises a provider failure
+    (see ``is_provider_failure``) or, when streamed, has not produced its first
+    event within ``timeout`` seconds. While the primary's circuit breaker is
+    open the primary is not tried at all. Failures after the first event are
+    raised, since the streamed output has already been used.
+    """
+
+    def __init__(
+        self,
+        primary: Any,
+        fallback: Any,
+        *,
+        name: str,
+        fallback_name: str,
+        breaker: CircuitBreaker,
+        timeout: float,
+    ) -> None:
+        self._primary = primary
+        self._fallback = fallback
+        self._name = name
+        self._fallback_name = fallback_name
+        self._breaker = breaker
+        self._timeout = timeout
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._primary, name)
+
+    async def _try_primary(
+        self,
+        call: Callable[[], Awaitable[Any]],
+        timeout: float | None,
+    ) -> tuple[Any, str | None]:
+        """Return ``(result, None)`` from the primary, or ``(None, reason)`` to fall back."""
+        if not self._breaker.allow():
+            return None, "circuit_open"
+        try:
+            async with asyncio.timeout(timeout):
+                result = await call()
+        except Exception as exc:  # pylint: disable=broad-exception-caught
+            if not is_provider_failure(exc):
+                self._breaker.release()
+                raise
+            self._breaker.record(False)
+            return None, "timeout" if isinstance(exc, TimeoutError) else type(exc).__name__
+        except BaseException:
+            self._breaker.release()
+            raise
+        self._breaker.record(True)
+        return result, None
+
+    def _fall_back(self, reason: str) -> None:
+        FALLBACKS.inc(model=self._name, reason=reason)
+        _decide(
+            {
+                "model": self._name,
+                "action": "fallback",
+                "to_model": self._fallback_name,
+                "reason": reason,
+                "circuit": self._breaker.state,
+            }
+        )
+
+    async def get_response(self, *args: Any, **kwargs: Any) -> Any:
+        """Return the primary's response, or the fallback's if the primary fails."""
+        response, reason = await self._try_primary(
+            lambda: self._primary.get_response(*args, **kwargs), None
+        )
+        if reason is None:
+            return response
+        self._fall_back(reason)
+        return await self._fallback.get_response(*args, **kwargs)
+
+    async def stream_response(self, *args: Any, **kwargs: Any) -> AsyncIterator[Any]:
+        """Stream the primary's response, or the fallback's if the primary fails or stalls."""
+        opened, reason = await self._try_primary(
+            lambda: _open_stream(self._primary, args, kwargs), self._timeout
+        )
+        if reason is None:
+            stream, first = opened
+            try:
+                if first is not None:
+                    yield first
+                    async for event in stream:
+                        yield event
+            finally:
+                await stream.aclose()
+            return
+        self._fall_back(reason)
+        async for event in self._fallback.stream_response(*args, **kwargs):
+            yield event
+
+
+class AgentRoutedModel:
+    """Agents SDK ``Model`` that hands each call to the model of the agent making it.
+
+    Calls from agents without an entry in ``routes``, or made outside a run
+    tracked with ``track_model_agents``, go to ``model`` directly.
+    """
+
+    def __init__(self, model: Any, routes: dict[str, Any]) -> None:
+        self._model = model
+        self._routes = routes
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._model, name)
+
+    def _route(self) -> Any:
+        agent = _AGENT.get()
+        return self._model if agent is None else self._routes.get(agent[0], self._model)
+
+    async def get_response(self, *args: Any, **kwargs: Any) -> Any:
+        """Return the response of the calling agent's model."""
+        return await self._route().get_response(*args, **kwargs)
+
+    def stream_response(self, *args: Any, **kwargs: Any) -> AsyncIterator[Any]:
+        """Stream the response of the calling agent's model."""
+        return self._route().stream_response(*args, **kwargs)
+
+
+class ResilientModelProvider:
+    """Agents SDK ``ModelProvider`` that hedges and falls back by calling agent.
+
+    Streamed calls from agents in ``hedged`` are hedged after the
+    ``MODEL_HEDGE_PERCENTILE`` percentile of the model's recent time to first
+    event (``MODEL_HEDGE_INITIAL_DELAY`` until enough samples are seen, never
+    less than ``MODEL_HEDGE_MIN_DELAY``). Calls from an agent in ``fallbacks``
+    move to the mapped model on failure, guarded by one circuit breaker per
+    primary model.
+    """
+
+    def __init__(
+        self,
+        provider: Any,
+        settings: Settings,
+        *,
+        hedged: set[str],
+        fallbacks: dict[str, str],
+    ) -> None:
+        self._provider = provider
+        self._settings = settings
+        self._hedged = hedged
+        self._fallbacks = fallbacks
+        self.latencies: dict[str, LatencyWindow] = {}
+        self.breakers: dict[str, CircuitBreaker] = {}
+
+    def hedge_delay(self, model_name: str) -> float:
+        """Return the current hedge delay of ``model_name`` in seconds."""
+        observed = self.latencies[model_name].percentile(self._settings.model_hedge_percentile)
+        delay = self._settings.model_hedge_initial_delay if observed is None else observed
+        return max(self._settings.model_hedge_min_delay, delay)
+
+    def _breaker(self, model_name: str) -> CircuitBreaker:
+        if model_name not in self.breakers:
+            self.breakers[model_name] = CircuitBreaker(
+                model_name,
+                window=self._settings.model_breaker_window,
+                min_calls=self._settings.model_breaker_min_calls,
+                error_rate=self._settings.model_breaker_error_rate,
+                cooldown=self._settings.model_breaker_cooldown,
+            )
+        return self.breakers[model_name]
+
+    def get_model(self, model_name: str | None) -> Any:
+        """Return the provider's model, wrapped per agent for hedging and fallback."""
+        name = model_name or ""
+        model = self._provider.get_model(model_name)
+        routes: dict[str, Any] = {}
+        if self._hedged:
+            latency = self.latencies.setdefault(name, LatencyWindow())
+            hedged = HedgedModel(model, name, latency, lambda: self.hedge_delay(name))
+            routes = dict.fromkeys(self._hedged, hedged)
+        for agent, fallback in self._fallbacks.items():
+            if fallback == name:
+                continue
+            routes[agent] = FallbackModel(
+                routes.get(agent, model),
+                self._provider.get_model(fallback),
+                name=name,
+                fallback_name=fallback,
+                breaker=self._breaker(name),
+                timeout=self._settings.model_fallback_timeout,
+            )
+        return AgentRoutedModel(model, routes) if routes else model
+
+    async def aclose(self) -> None:
+        """Close the wrapped provider."""
+        await self._provider.aclose()
@@ -0,0 +1,161 @@
+"""Per-run state, timed tool calls and the metrics recorded for agent runs."""
+
+import asyncio
+import time
+from collections.abc import Awaitable, Callable
+from dataclasses import dataclass, field
+from typing import Any
+
+from agentturing.utils.metrics import METRICS, RequestTimings
+
+REQUEST_SECONDS = METRICS.histogram(
+    "agentturing_request_duration_seconds",
+    "End-to-end duration of stream_ask runs.",
+    ("outcome",),
+)
+PHASE_SECONDS = METRICS.histogram(
+    "agentturing_phase_duration_seconds",
+    "Time spent in each phase of a run (guards, cache lookup, routing).",
+    ("phase",),
+)
+TTFT_SECONDS = METRICS.histogram(
+    "agentturing_time_to_first_token_seconds",
+    "Time from request start to the first streamed answer or reasoning text.",
+)
+AGENT_SECONDS = METRICS.histogram(
+    "agentturing_agent_duration_seconds",
+    "Time during which each agent was active within a run.",
+    ("agent", "model"),
+)
+TOOL_SECONDS = METRICS.histogram(
+    "agentturing_tool_duration_seconds",
+    "Duration of each tool call.",
+    ("tool",),
+)
+TOOL_CALLS = METRICS.counter(
+    "agentturing_tool_calls_total",
+    "Tool calls by tool and status.",
+    ("tool", "status"),
+)
+HANDOFFS = METRICS.counter(
+    "agentturing_handoffs_total",
+    "Agent handoffs by source and target agent.",
+    ("from_agent", "to_agent"),
+)
+EVENTS = METRICS.counter(
+    "agentturing_stream_events_total",
+    "Events yielded by stream_ask, by type.",
+    ("type",),
+)
+ERRORS = METRICS.counter(
+    "agentturing_errors_total",
+    "Runs that failed, by exception type.",
+    ("type",),
+)
+RUNS_CANCELLED = METRICS.counter(
+    "agentturing_runs_cancelled_total",
+    "Runs abandoned by their client, by whether the agent run had started.",
+    ("stage",),
+)
+CANCELLED_TOKENS_SAVED = METRICS.counter(
+    "agentturing_cancelled_output_tokens_saved_total",
+    "Estimated output tokens not generated because abandoned runs were stopped early.",
+)
+
+
+@dataclass
+class RunState:
+    """Per-run state handed to tools through the SDK's run context.
+
+    ``tool_slots`` caps how many tool calls of one run execute at once when the
+    model requests several in parallel. ``prefetch`` holds the run's speculative
+    knowledge base search, if one was started, and ``run`` the SDK's streamed
+    run once the agents have been started. ``model_decisions`` collects the
+    hedges and fallbacks taken for the run's model calls. ``solver_brief`` is
+    the prefetched context offered to SolverAgent, packed on its first turn.
+    """
+
+    timings: RequestTimings
+    tool_slots: asyncio.Semaphore
+    prefetch: Any = None
+    run: Any = None
+    model_decisions: list[dict[str, Any]] = field(default_factory=list)
+    solver_brief: str | None = None
+
+
+async def run_tool(
+    state: RunState | None,
+    tool_name: str,
+    call: Callable[[], Awaitable[str]],
+    timeout: float,
+    failure_label: str,
+) -> str:
+    """Run one tool call under the run's concurrency cap and a deadline.
+
+    Timeouts and failures are returned as text so the agent can carry on with
+    whatever the other sources produced. Every call is timed into the metrics
+    and the run's timings.
+    """
+    status = "ok"
+    started = time.perf_counter()
+    try:
+        async with asyncio.timeout(timeout):
+            if state is None:
+                return await call()
+            async with state.tool_slots:
+                return await call()
+    except asyncio.CancelledError:
+        status = "cancelled"
+        raise
+    except TimeoutError:
+        status = "timeout"
+        return f"{failure_label} timed out after {timeout:g}s; continue without it."
+    except Exception as exc:  # pylint: disable=broad-exception-caught
+        status = "error"
+        return f"{failure_label} failed: {exc}"
+    finally:
+        seconds = time.perf_counter() - started
+        TOOL_SECONDS.observe(seconds, tool=tool_name)
+        TOOL_CALLS.inc(tool=tool_name, status=status)
+        if state is not None:
+            state.timings.add_tool(tool_name, seconds, status)
+
+
+def observe_run(timings: RequestTimings, outcome: str, model: str) -> None:
+    """Record a finished run's phases, agents and total duration in the metrics."""
+    for phase, seconds in timings.phases.items():
+        PHASE_SECONDS.observe(seconds, phase=phase)
+    for agent_name, seconds in timings.agents.items():
+        AGENT_SECONDS.observe(seconds, agent=agent_name, model=model)
+    REQUEST_SECONDS.observe(timings.elapsed(), outcome=outcome)
+
+
+class RunFinisher:  # pylint: disable=too-few-public-methods
+    """Cancel abandoned agent runs and estimate the output tokens they saved.
+
+    The estimate is the average output of the answered runs seen so far, less
+    what the cancelled run had already generated.
+    """
+
+    def __init__(self) -> None:
+        self._answered_output_tokens = 0
+        self._answered_runs = 0
+
+    def finish(self, run_state: RunState, outcome: str) -> None:
+        """Cancel an abandoned agent run and account for its output tokens."""
+        run = run_state.run
+        if outcome == "cancelled":
+            RUNS_CANCELLED.inc(stage="before_run" if run is None else "agent_run")
+        if run is None:
+            return
+        if not run.is_complete:
+            # Cancels the SDK's run loop task, which closes the model's HTTP
+            # stream and cancels tool calls still running in it.
+            run.cancel()
+        output_tokens = run.context_wrapper.usage.output_tokens
+        if outcome == "answered":
+            self._answered_output_tokens += output_tokens
+            self._answered_runs += 1
+        elif outcome == "cancelled" and self._answered_runs:
+            expected = self._answered_output_tokens / self._answered_runs
+            CANCELLED_TOKENS_SAVED.inc(max(0.0, expected - output_tokens))
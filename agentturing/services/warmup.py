@@ -0,0 +1,100 @@
+"""Startup warm-up and per-component readiness tracking."""
+
+import asyncio
+import time
+from dataclasses import dataclass, field
+from typing import Any
+
+COMPONENTS = ("agent_runtime", "http_pool", "embedder", "qdrant", "fast_router")
+
+
+@dataclass
+class ComponentStatus:
+    """Load state and timing for one warmed-up component."""
+
+    status: str = "pending"
+    seconds: float | None = None
+    error: str | None = None
+
+
+@dataclass
+class ReadinessTracker:
+    """Collect the warm-up state of every component the API depends on."""
+
+    components: dict[str, ComponentStatus] = field(
+        default_factory=lambda: {name: ComponentStatus() for name in COMPONENTS}
+    )
+
+    @property
+    def ready(self) -> bool:
+        """Return whether every component finished loading or was skipped."""
+        return all(
+            component.status in {"ready", "skipped"}
+            for component in self.components.values()
+        )
+
+    def skip_all(self) -> None:
+        """Mark components as lazily loaded when warm-up is disabled."""
+        for component in self.components.values():
+            component.status = "skipped"
+
+    def snapshot(self) -> dict[str, Any]:
+        """Return a JSON-serializable view of component readiness."""
+        return {
+            "ready": self.ready,
+            "components": {
+                name: {
+                    "status": component.status,
+                    "seconds": component.seconds,
+                    "error": component.error,
+                }
+                for name, component in self.components.items()
+            },
+        }
+
+    async def run(self, name: str, loader) -> bool:
+        """Await one loader coroutine and record its outcome and duration."""
+        component = self.components[name]
+        component.status = "loading"
+        started = time.perf_counter()
+        try:
+            await loader()
+        except Exception as exc:  # pylint: disable=broad-exception-caught
+            component.status = "failed"
+            component.error = str(exc)
+            print(f"Warm-up of {name} failed: {exc}")
+            return False
+        finally:
+            component.seconds = round(time.perf_counter() - started, 3)
+
+        component.status = "ready"
+        return True
+
+
+async def warm_up(tracker: ReadinessTracker, get_backend) -> None:
+    """Preload the agent runtime, provider connections, embedder, Qdrant and fast router."""
+    backend = None
+
+    async def load_runtime():
+        nonlocal backend
+        # SDK imports and agent construction are slow; keep the event loop serving.
+        backend = await asyncio.to_thread(get_backend)
+
+    if not await tracker.run("agent_runtime", load_runtime):
+        for name in COMPONENTS[1:]:
+            tracker.components[name].status = "failed"
+            tracker.components[name].error = "agent runtime unavailable"
+        return
+
+    if backend.settings.http_warmup_connections:
+        # Unreachable upstreams are reported by warm_up_connections, not fatal here.
+        await tracker.run("http_pool", backend.warm_up_connections)
+    else:
+        tracker.components["http_pool"].status = "skipped"
+    await tracker.run("embedder", lambda: backend.knowledge_base.embed_query("warm up"))
+    await tracker.run("qdrant", lambda: backend.knowledge_base.search("warm up", top_k=1))
+
+    if backend.fast_router is None:
+        tracker.components["fast_router"].status = "skipped"
+    else:
+        await tracker.run("fast_router", backend.fast_router.ensure_trained)
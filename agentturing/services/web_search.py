@@ -0,0 +1,105 @@
+"""Async Tavily search client with result caching and request coalescing."""
+
+import asyncio
+from typing import Any
+
+import httpx
+
+from agentturing.constants import TAVILY_DOMAINS
+from agentturing.utils.ttl_cache import TTLCache
+
+
+def normalize_query(query: str) -> str:
+    """Collapse case and whitespace so equivalent queries share a cache entry."""
+    return " ".join(query.lower().split())
+
+
+class WebSearchClient:
+    """Query Tavily over HTTP without blocking the event loop.
+
+    Results are cached per ``(normalized query, math_only)`` scope, and concurrent
+    identical searches share a single upstream request, which is cancelled once
+    every caller waiting on it has been cancelled. ``base_url`` can point at a
+    local stub server that speaks Tavily's ``/search`` API.
+    """
+
+    def __init__(  # pylint: disable=too-many-arguments
+        self,
+        api_key: str,
+        *,
+        base_url: str = "https://api.tavily.com",
+        cache_size: int = 256,
+        cache_ttl: float = 600.0,
+        math_timeout: float = 10.0,
+        general_timeout: float = 20.0,
+        http_client: httpx.AsyncClient | None = None,
+    ) -> None:
+        self._api_key = api_key
+        self._base_url = base_url.rstrip("/")
+        self._timeouts = {True: math_timeout, False: general_timeout}
+        self._cache = TTLCache(maxsize=cache_size, ttl=cache_ttl)
+        self._inflight: dict[tuple[str, bool], asyncio.Future] = {}
+        self._waiters: dict[tuple[str, bool], int] = {}
+        self._owns_http_client = http_client is None
+        self._http_client = http_client or httpx.AsyncClient()
+
+    def _build_payload(self, query: str, math_only: bool) -> dict[str, Any]:
+        """Return the Tavily request body for the given source scope."""
+        payload: dict[str, Any] = {
+            "query": query,
+            "max_results": 5,
+            "topic": "general",
+            "search_depth": "basic" if math_only else "advanced",
+        }
+        if math_only:
+            payload["include_domains"] = TAVILY_DOMAINS
+        return payload
+
+    async def _fetch(self, query: str, math_only: bool) -> list[Any]:
+        """Run one upstream Tavily request and return its raw result list."""
+        response = await self._http_client.post(
+            f"{self._base_url}/search",
+            json=self._build_payload(query, math_only),
+            headers={"Authorization": f"Bearer {self._api_key}"},
+            timeout=self._timeouts[math_only],
+        )
+        response.raise_for_status()
+        return response.json().get("results", [])
+
+    async def search(self, query: str, math_only: bool) -> list[Any]:
+        """Return Tavily results, reusing cached or in-flight searches when possible."""
+        key = (normalize_query(query), math_only)
+        cached = self._cache.get(key)
+        if cached is not None:
+            return cached
+
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(self._fetch(query, math_only))
+            self._inflight[key] = task
+            task.add_done_callback(lambda done: self._finish(key, done))
+
+        # Shield the shared request so one cancelled caller does not fail the others.
+        self._waiters[key] = self._waiters.get(key, 0) + 1
+        try:
+            return await asyncio.shield(task)
+        except asyncio.CancelledError:
+            # Nobody is left to read the result, so stop the upstream request.
+            if self._waiters[key] == 1 and not task.done():
+                task.cancel()
+            raise
+        finally:
+            self._waiters[key] -= 1
+            if not self._waiters[key]:
+                del self._waiters[key]
+
+    def _finish(self, key: tuple[str, bool], task: asyncio.Future) -> None:
+        """Cache a completed search and drop it from the in-flight table."""
+        self._inflight.pop(key, None)
+        if not task.cancelled() and task.exception() is None:
+            self._cache.set(key, task.result())
+
+    async def aclose(self) -> None:
+        """Close the underlying HTTP client unless it was passed in and is shared."""
+        if self._owns_http_client:
+            await self._http_client.aclose()
@@ -0,0 +1,227 @@
+"""Token-bounded, deduplicated packing of retrieved passages into tool output."""
+
+import math
+from collections.abc import Awaitable, Callable
+from dataclasses import dataclass, field, replace
+
+import numpy as np
+
+from agentturing.utils.metrics import METRICS
+
+# Rough English/LaTeX average for the chat models' BPE tokenizers.
+CHARS_PER_TOKEN = 4
+# A passage cut shorter than this is dropped instead of truncated.
+MIN_TRUNCATED_TOKENS = 32
+# Shortest shared boundary treated as a chunk overlap rather than a coincidence.
+MIN_OVERLAP_CHARS = 16
+TOKEN_BUCKETS = (50, 100, 200, 400, 800, 1200, 1600, 2400, 3200, 4800, 6400)
+
+PACKED_TOKENS = METRICS.histogram(
+    "agentturing_context_packed_tokens",
+    "Estimated tokens of packed context returned by a tool.",
+    ("tool",),
+    buckets=TOKEN_BUCKETS,
+)
+TOKENS_SAVED = METRICS.counter(
+    "agentturing_context_tokens_saved_total",
+    "Estimated prompt tokens removed by merging, deduplicating and budgeting context.",
+    ("tool",),
+)
+PASSAGES_DROPPED = METRICS.counter(
+    "agentturing_context_passages_dropped_total",
+    "Retrieved passages merged into a neighbour, dropped as duplicates or cut by the budget.",
+    ("tool", "reason"),
+)
+
+
+@dataclass
+class Passage:
+    """One retrieved text with the fields used to merge, rank and label it.
+
+    ``source`` identifies the document a chunk was cut from and ``position``
+    its chunk index, so neighbouring chunks of one document can be merged.
+    """
+
+    text: str
+    score: float
+    source: str | None = None
+    position: int | None = None
+    title: str | None = None
+    url: str | None = None
+    positions: list[int] = field(default_factory=list)
+
+
+@dataclass
+class PackedContext:
+    """Passages that fit the budget, best first, with what packing removed."""
+
+    passages: list[Passage]
+    raw_tokens: int
+    packed_tokens: int
+    merged: int = 0
+    duplicates: int = 0
+    over_budget: int = 0
+    truncated: int = 0
+
+    @property
+    def tokens_saved(self) -> int:
+        """Return the estimated tokens removed relative to the unpacked passages."""
+        return max(0, self.raw_tokens - self.packed_tokens)
+
+    def record(self, tool: str) -> None:
+        """Export the packing result for ``tool`` to ``/metrics``."""
+        PACKED_TOKENS.observe(self.packed_tokens, tool=tool)
+        TOKENS_SAVED.inc(self.tokens_saved, tool=tool)
+        for reason, count in (
+            ("merged", self.merged),
+            ("duplicate", self.duplicates),
+            ("budget", self.over_budget),
+        ):
+            if count:
+                PASSAGES_DROPPED.inc(count, tool=tool, reason=reason)
+
+
+def estimate_tokens(text: str) -> int:
+    """Estimate the prompt tokens of ``text`` without a model tokenizer."""
+    return math.ceil(len(text) / CHARS_PER_TOKEN) if text else 0
+
+
+def _normalize(text: str) -> str:
+    return " ".join(text.split())
+
+
+def _join_overlapping(first: str, second: str) -> str | None:
+    """Return ``first`` and ``second`` with their shared boundary text kept once."""
+    head = second[:MIN_OVERLAP_CHARS]
+    if len(head) < MIN_OVERLAP_CHARS:
+        return None
+    index = first.find(head, max(0, len(first) - len(second)))
+    while index != -1:
+        # The earliest match that runs to the end of ``first`` is the longest overlap.
+        if second.startswith(first[index:]):
+            return first + second[len(first) - index:]
+        index = first.find(head, index + 1)
+    return None
+
+
+def merge_neighbours(passages: list[Passage]) -> tuple[list[Passage], int]:
+    """Merge overlapping or consecutive chunks of the same source.
+
+    Returns the merged passages in their original order (by first chunk) and
+    how many chunks were folded into a neighbour.
+    """
+    groups: dict[str, list[Passage]] = {}
+    order: list[Passage | str] = []
+    for passage in passages:
+        if passage.source is None or passage.position is None:
+            order.append(passage)
+            continue
+        if passage.source not in groups:
+            groups[passage.source] = []
+            order.append(passage.source)
+        groups[passage.source].append(passage)
+
+    merged_count = 0
+    result: list[Passage] = []
+    for item in order:
+        if isinstance(item, Passage):
+            result.append(item)
+            continue
+        current: Passage | None = None
+        for passage in sorted(groups[item], key=lambda chunk: chunk.position):
+            if current is None:
+                current = replace(passage, positions=[passage.position])
+                continue
+            joined = _join_overlapping(current.text, passage.text)
+            if joined is None and passage.position == current.positions[-1] + 1:
+                joined = f"{current.text} {passage.text}"
+            if joined is None:
+                result.append(current)
+                current = replace(passage, positions=[passage.position])
+                continue
+            current.text = joined
+            current.score = max(current.score, passage.score)
+            current.positions.append(passage.position)
+            merged_count += 1
+        result.append(current)
+    return result, merged_count
+
+
+def _drop_contained(passages: list[Passage]) -> tuple[list[Passage], int]:
+    """Drop passages whose text is already contained in a higher-ranked one."""
+    kept: list[Passage] = []
+    for passage in passages:
+        lowered = passage.text.lower()
+        if any(lowered in other.text.lower() for other in kept):
+            continue
+        kept.append(passage)
+    return kept, len(passages) - len(kept)
+
+
+async def _drop_similar(
+    passages: list[Passage],
+    embed_documents: Callable[[list[str]], Awaitable[list[list[float]]]],
+    similarity: float,
+) -> tuple[list[Passage], int]:
+    """Drop passages whose embedding is within ``similarity`` of a higher-ranked one."""
+    vectors = np.asarray(await embed_documents([p.text for p in passages]), dtype=np.float32)
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    vectors = vectors / np.where(norms == 0, 1.0, norms)
+    kept: list[int] = []
+    for index in range(len(passages)):
+        if kept and float(np.max(vectors[kept] @ vectors[index])) >= similarity:
+            continue
+        kept.append(index)
+    return [passages[index] for index in kept], len(passages) - len(kept)
+
+
+def _truncate(text: str, tokens: int) -> str:
+    limit = tokens * CHARS_PER_TOKEN - 4
+    cut = text.rfind(" ", 0, limit)
+    return text[:cut if cut > limit // 2 else limit].rstrip() + " ..."
+
+
+async def pack_context(
+    passages: list[Passage],
+    token_budget: int,
+    *,
+    embed_documents: Callable[[list[str]], Awaitable[list[list[float]]]] | None = None,
+    similarity: float = 0.95,
+) -> PackedContext:
+    """Merge, deduplicate, rank and budget retrieved passages.
+
+    Chunks of one source are merged first, then passages contained in or (with
+    ``embed_documents``) at least ``similarity`` cosine-close to a better one
+    are dropped. The rest are taken best score first until ``token_budget``
+    estimated tokens of text are used; the passage that crosses the budget is
+    cut at a word boundary if enough room is left. Deduplication falls back to
+    containment alone if embedding fails.
+    """
+    passages = [replace(p, text=_normalize(p.text)) for p in passages if p.text.strip()]
+    raw_tokens = sum(estimate_tokens(p.text) for p in passages)
+
+    merged_passages, merged = merge_neighbours(passages)
+    ranked = sorted(merged_passages, key=lambda p: p.score, reverse=True)
+    ranked, duplicates = _drop_contained(ranked)
+    if embed_documents is not None and similarity < 1.0 < len(ranked):
+        try:
+            ranked, similar = await _drop_similar(ranked, embed_documents, similarity)
+            duplicates += similar
+        except Exception as exc:  # pylint: disable=broad-exception-caught
+            print(f"Context deduplication by embedding failed: {exc}")
+
+    packed = PackedContext([], raw_tokens, 0, merged=merged, duplicates=duplicates)
+    remaining = max(0, token_budget)
+    for passage in ranked:
+        tokens = estimate_tokens(passage.text)
+        if tokens > remaining:
+            if remaining < MIN_TRUNCATED_TOKENS:
+                packed.over_budget += 1
+                continue
+            passage = replace(passage, text=_truncate(passage.text, remaining))
+            tokens = estimate_tokens(passage.text)
+            packed.truncated += 1
+        packed.passages.append(passage)
+        packed.packed_tokens += tokens
+        remaining -= tokens
+    return packed
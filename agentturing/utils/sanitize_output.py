@@ -2,8 +2,16 @@
 
 from typing import Any
 
+from agentturing.utils.context_packer import Passage
 
-def format_tavily_results(results: list[Any], min_score: float = 0.75) -> list[str]:
+WEB_SNIPPET_CHARS = 1000
+
+
+def format_tavily_results(
+    results: list[Any],
+    min_score: float = 0.75,
+    max_chars: int = WEB_SNIPPET_CHARS,
+) -> list[str]:
     """Convert Tavily results into a readable context string."""
     formatted = []
 
@@ -28,7 +36,7 @@ def format_tavily_results(results: list[Any], min_score: float = 0.75) -> list[s
                     content = "No content available"
 
                 # Truncate content if too long
-                snippet = content[:1000] + "..." if len(content) > 500 else content
+                snippet = content[:max_chars] + "..." if len(content) > max_chars else content
 
                 formatted_entry = f"### {title}\n{snippet}\n(Source: {url})"
                 formatted.append(formatted_entry)
@@ -42,6 +50,79 @@ def format_tavily_results(results: list[Any], min_score: float = 0.75) -> list[s
     ]
 
 
+def tavily_passages(
+    results: list[Any],
+    min_score: float = 0.75,
+    max_chars: int = WEB_SNIPPET_CHARS,
+) -> list[Passage]:
+    """Convert Tavily results that clear ``min_score`` into passages for context packing."""
+    passages = []
+    for r in results or []:
+        if isinstance(r, str):
+            if r.strip():
+                passages.append(Passage(text=r.strip(), score=min_score))
+            continue
+
+        try:
+            score = float(r.get("score", 0))
+            content = r.get("content", "").strip()
+            if score < min_score or not content:
+                continue
+            url = r.get("url", "")
+            passages.append(
+                Passage(
+                    text=content[:max_chars],
+                    score=score,
+                    source=url or None,
+                    title=r.get("title", "Untitled"),
+                    url=url,
+                )
+            )
+        except (AttributeError, TypeError, ValueError) as exc:
+            print(f"Error processing Tavily result: {exc}")
+            continue
+    return passages
+
+
+def kb_passages(chunks: list[Any]) -> list[Passage]:
+    """Convert knowledge base hits into passages, keyed by source row for merging.
+
+    Hybrid hits are ranked by their fused ``rank_score`` rather than cosine.
+    """
+    passages = []
+    for chunk in chunks:
+        metadata = chunk.metadata or {}
+        rank_score = getattr(chunk, "rank_score", None)
+        source = None
+        if metadata.get("source_row") is not None:
+            source = f"{metadata.get('dataset')}:{metadata['source_row']}"
+        passages.append(
+            Passage(
+                text=chunk.content,
+                score=chunk.score if rank_score is None else rank_score,
+                source=source,
+                position=metadata.get("chunk_index"),
+            )
+        )
+    return passages
+
+
+def format_web_passages(passages: list[Passage]) -> list[str]:
+    """Render packed web passages the way ``format_tavily_results`` renders results."""
+    return [
+        f"### {p.title}\n{p.text}\n(Source: {p.url})" if p.title else p.text
+        for p in passages
+    ]
+
+
+def format_kb_passages(passages: list[Passage]) -> list[str]:
+    """Render packed knowledge base passages with their rank and rounded score."""
+    return [
+        f"[KB {index}] score={p.score:.3f}\n{p.text}"
+        for index, p in enumerate(passages, start=1)
+    ]
+
+
 def get_formatted_prompt(prompt_value):
     """Convert ChatPromptTemplate messages to single string for LLM"""
     try:
@@ -0,0 +1,140 @@
+"""Event encoding, delta coalescing and wire framing for streamed answers."""
+
+import asyncio
+import contextlib
+import json
+import time
+from collections.abc import AsyncIterator
+from typing import Any
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+SSE_MEDIA_TYPE = "text/event-stream"
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+DELTA_EVENT_TYPES = frozenset({"answer", "reason"})
+
+_ENCODER = json.JSONEncoder(ensure_ascii=False, separators=(",", ":"), default=str)
+
+
+def encode_event(event: dict[str, Any]) -> str:
+    """Serialize one event as compact JSON, using orjson when it is installed."""
+    if orjson is not None:
+        # orjson is a C extension that pylint cannot introspect.
+        return orjson.dumps(event, default=str).decode("utf-8")  # pylint: disable=no-member
+    return _ENCODER.encode(event)
+
+
+def negotiate_media_type(accept: str | None) -> str:
+    """Pick NDJSON when the client asks for it explicitly, otherwise SSE."""
+    if accept and NDJSON_MEDIA_TYPE in accept:
+        return NDJSON_MEDIA_TYPE
+    return SSE_MEDIA_TYPE
+
+
+def frame_events(events: list[dict[str, Any]], media_type: str) -> str:
+    """Frame a batch of events as one SSE or NDJSON write."""
+    if media_type == NDJSON_MEDIA_TYPE:
+        return "".join(f"{encode_event(event)}\n" for event in events)
+    return "".join(f"data: {encode_event(event)}\n\n" for event in events)
+
+
+class _DeltaBuffer:
+    """Merge consecutive deltas of the same type into single events."""
+
+    def __init__(self) -> None:
+        self.events: list[dict[str, Any]] = []
+        self.pending_bytes = 0
+        self.started: float | None = None
+
+    def add(self, event: dict[str, Any]) -> None:
+        """Append an event, merging a delta into the previous one of the same type."""
+        if event.get("type") in DELTA_EVENT_TYPES:
+            text = event.get("text", "")
+            self.pending_bytes += len(text.encode("utf-8"))
+            if self.started is None:
+                self.started = time.monotonic()
+            if self.events and self.events[-1]["type"] == event["type"]:
+                self.events[-1]["text"] += text
+                return
+            self.events.append({"type": event["type"], "text": text})
+            return
+        self.events.append(event)
+
+    def take(self) -> list[dict[str, Any]]:
+        """Return the buffered events and start an empty batch."""
+        events, self.events = self.events, []
+        self.pending_bytes = 0
+        self.started = None
+        return events
+
+
+async def coalesce_events(
+    events: AsyncIterator[dict[str, Any]],
+    *,
+    max_bytes: int = 2048,
+    max_delay: float = 0.03,
+) -> AsyncIterator[list[dict[str, Any]]]:
+    """Group an event stream into write batches.
+
+    ``answer`` and ``reason`` deltas are merged and held until ``max_bytes`` of
+    text are pending or ``max_delay`` seconds have passed since the first held
+    delta. Any other event flushes the batch immediately. A ``max_delay`` of
+    zero disables coalescing and yields one event per batch.
+
+    Closing or cancelling the batches closes ``events`` too, and waits for it to
+    finish its own cleanup before returning.
+    """
+    if max_delay <= 0:
+        async with contextlib.aclosing(events):
+            async for event in events:
+                yield [event]
+        return
+
+    loop = asyncio.get_running_loop()
+    buffer = _DeltaBuffer()
+    ready = asyncio.Event()
+    done = False
+    error: BaseException | None = None
+    timer: asyncio.TimerHandle | None = None
+
+    async def pump() -> None:
+        nonlocal done, error, timer
+        try:
+            async for event in events:
+                is_delta = event.get("type") in DELTA_EVENT_TYPES
+                if is_delta and buffer.started is None:
+                    timer = loop.call_later(max_delay, ready.set)
+                buffer.add(event)
+                if not is_delta or buffer.pending_bytes >= max_bytes:
+                    ready.set()
+        except Exception as exc:  # pylint: disable=broad-exception-caught
+            error = exc
+        finally:
+            done = True
+            ready.set()
+
+    pump_task = asyncio.create_task(pump())
+    try:
+        while True:
+            await ready.wait()
+            ready.clear()
+            if timer is not None:
+                timer.cancel()
+                timer = None
+            if buffer.events:
+                yield buffer.take()
+            if done:
+                break
+
+        if error is not None:
+            raise error
+    finally:
+        pump_task.cancel()
+        if timer is not None:
+            timer.cancel()
+        # Let the source stop its work (an agent run, its tool calls) before
+        # the response is considered finished.
+        await asyncio.wait({pump_task})
@@ -1,24 +1,60 @@
 """FastAPI application exposing agentic math endpoints."""
 
-import json
+import asyncio
 import os
+from contextlib import aclosing, asynccontextmanager
 
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, Header, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import StreamingResponse
+from fastapi.responses import JSONResponse, Response, StreamingResponse
 from pydantic import BaseModel
+from starlette.background import BackgroundTask
 
 from agentturing.config import get_settings
-from agentturing.services import AgenticBackendUnavailable, get_chat_backend
+from agentturing.services import (
+    AdmissionRejected,
+    AgenticBackendUnavailable,
+    ReadinessTracker,
+    get_chat_backend,
+    warm_up,
+)
+from agentturing.utils.metrics import METRICS, PROMETHEUS_CONTENT_TYPE, monitor_event_loop_lag
+from agentturing.utils.streaming import coalesce_events, frame_events, negotiate_media_type
 
 # Some personal laptop  / environment related settings, can remove
 os.environ['TF_CPP_MIN_LOG_LEVEL'] = '2'
 os.environ['TF_ENABLE_ONEDNN_OPTS'] = '0'
 
 SETTINGS = get_settings()
+READINESS = ReadinessTracker()
+
+
+@asynccontextmanager
+async def lifespan(_app: FastAPI):
+    """Preload models and the agent runtime before serving traffic."""
+    warmup_task = None
+    monitor_task = None
+    if SETTINGS.event_loop_monitor_ms > 0:
+        monitor_task = asyncio.create_task(
+            monitor_event_loop_lag(SETTINGS.event_loop_monitor_ms / 1000)
+        )
+    if not SETTINGS.warmup_enabled:
+        READINESS.skip_all()
+    elif SETTINGS.warmup_background:
+        warmup_task = asyncio.create_task(warm_up(READINESS, get_chat_backend))
+    else:
+        await warm_up(READINESS, get_chat_backend)
+
+    yield
+
+    if warmup_task is not None and not warmup_task.done():
+        warmup_task.cancel()
+    if monitor_task is not None:
+        monitor_task.cancel()
+
 
 # FastAPI setup
-app = FastAPI(title="Math Tutor API", version="2.0")
+app = FastAPI(title="Math Tutor API", version="2.0", lifespan=lifespan)
 app.add_middleware(
     CORSMiddleware,
     allow_origins=list(SETTINGS.cors_origins),
@@ -32,16 +68,61 @@ class QueryRequest(BaseModel):  # pylint: disable=too-few-public-methods
 
     question: str
 
+def _admission_error(exc: AdmissionRejected) -> HTTPException:
+    """Turn a rejected admission into a 429/503 that tells the client when to retry."""
+    return HTTPException(
+        status_code=exc.status_code,
+        detail=str(exc),
+        headers={"Retry-After": str(exc.retry_after)},
+    )
+
+
+async def _admit(backend, priority: str | None):
+    """Wait for a run slot or fail the request with the matching status."""
+    try:
+        return await backend.admit(priority)
+    except AdmissionRejected as exc:
+        raise _admission_error(exc) from exc
+
+
+@app.get("/healthz")
+async def healthz():
+    """Report process liveness along with per-component warm-up state."""
+    return {"status": "ok", **READINESS.snapshot()}
+
+
+@app.get("/readyz")
+async def readyz():
+    """Return 200 only once every component has finished warming up."""
+    snapshot = READINESS.snapshot()
+    return JSONResponse(snapshot, status_code=200 if snapshot["ready"] else 503)
+
+
+@app.get("/metrics")
+async def metrics():
+    """Expose request, phase, agent and tool metrics in Prometheus text format."""
+    return Response(METRICS.render(), media_type=PROMETHEUS_CONTENT_TYPE)
+
+
 @app.post("/ask")
-async def ask_math(request: QueryRequest):
-    """Return a complete answer and captured reasoning for a math prompt."""
+async def ask_math(request: QueryRequest, x_priority: str | None = Header(default=None)):
+    """Return a complete answer and captured reasoning for a math prompt.
+
+    Runs beyond ``RUN_MAX_CONCURRENCY`` wait in a bounded queue; the optional
+    ``X-Priority: high|normal|low`` header picks the request's class.
+    """
     question = request.question.strip()
     if not question:
         raise HTTPException(status_code=400, detail="Question cannot be empty")
 
     try:
         backend = get_chat_backend()
-        response = await backend.ask(question)
+    except AgenticBackendUnavailable as exc:
+        raise HTTPException(status_code=500, detail=str(exc)) from exc
+
+    ticket = await _admit(backend, x_priority)
+    try:
+        response = await backend.ask(question, ticket.priority)
     except ValueError as exc:
         return {
             "answer": (
@@ -50,10 +131,10 @@ async def ask_math(request: QueryRequest):
             ),
             "error": f"Input guard triggered: {str(exc)}",
         }
-    except AgenticBackendUnavailable as exc:
-        raise HTTPException(status_code=500, detail=str(exc)) from exc
     except Exception as exc:
         raise HTTPException(status_code=500, detail=f"Pipeline error: {str(exc)}") from exc
+    finally:
+        ticket.release()
 
     return {
         "question": question,
@@ -65,8 +146,22 @@ async def ask_math(request: QueryRequest):
 
 
 @app.post("/ask/stream")
-async def ask_math_stream(request: QueryRequest):
-    """Stream reasoning and answer chunks as server-sent events."""
+async def ask_math_stream(
+    request: QueryRequest,
+    accept: str | None = Header(default=None),
+    x_priority: str | None = Header(default=None),
+):
+    """Stream reasoning and answer chunks as server-sent events or NDJSON.
+
+    Clients that send ``Accept: application/x-ndjson`` get one JSON event per
+    line; everyone else gets SSE. Token deltas are coalesced per write.
+
+    When the client disconnects, Starlette cancels the response and the
+    cancellation reaches the agent run, which stops calling the model and tools.
+    Admission happens before the stream starts, so a full queue is a 429 and a
+    missed queue deadline a 503, both with ``Retry-After``.
+    """
+    media_type = negotiate_media_type(accept)
     question = request.question.strip()
     if not question:
         raise HTTPException(status_code=400, detail="Question cannot be empty")
@@ -76,22 +171,36 @@ async def ask_math_stream(request: QueryRequest):
     except AgenticBackendUnavailable as exc:
         raise HTTPException(status_code=500, detail=str(exc)) from exc
 
+    ticket = await _admit(backend, x_priority)
+
     async def event_stream():
+        batches = coalesce_events(
+            backend.stream_ask(question, ticket.priority),
+            max_bytes=SETTINGS.stream_coalesce_bytes,
+            max_delay=SETTINGS.stream_coalesce_ms / 1000,
+        )
         try:
-            async for event in backend.stream_ask(question):
-                yield f"data: {json.dumps(event)}\n\n"
-        except ValueError as exc:
-            yield f"data: {json.dumps({'type': 'error', 'text': str(exc)})}\n\n"
-        except Exception as exc:  # pylint: disable=broad-exception-caught
-            error_text = f"Pipeline error: {str(exc)}"
-            yield f"data: {json.dumps({'type': 'error', 'text': error_text})}\n\n"
+            async with aclosing(batches):
+                try:
+                    async for batch in batches:
+                        yield frame_events(batch, media_type)
+                except ValueError as exc:
+                    yield frame_events([{"type": "error", "text": str(exc)}], media_type)
+                except Exception as exc:  # pylint: disable=broad-exception-caught
+                    error_text = f"Pipeline error: {str(exc)}"
+                    yield frame_events([{"type": "error", "text": error_text}], media_type)
+        finally:
+            # Only after the run has been closed, so its slot is really free.
+            ticket.release()
 
     return StreamingResponse(
         event_stream(),
-        media_type="text/event-stream",
+        media_type=media_type,
         headers={
             "Cache-Control": "no-cache",
             "Connection": "keep-alive",
             "X-Accel-Buffering": "no",
         },
+        # Also covers a response that is never iterated; release is idempotent.
+        background=BackgroundTask(ticket.release),
     )
@@ -0,0 +1,111 @@
+"""Compare embedding backends on load time, latency, throughput, RSS and parity.
+
+Each backend runs in its own subprocess so peak RSS is measured in isolation:
+
+    uv run python -m benchmarks.embedding_backends --backends torch onnx onnx-int8
+"""
+
+import argparse
+import json
+import math
+import resource
+import statistics
+import subprocess
+import sys
+import time
+
+from agentturing.model.embeddings import EMBEDDING_BACKENDS
+from agentturing.services.fast_router import ROUTER_EXAMPLES
+
+QUERIES = [text for text, _ in ROUTER_EXAMPLES]
+
+
+def _percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+def run_worker(backend, onnx_file, repeats, batch_size):
+    """Measure one backend in the current process and print a JSON report."""
+    started = time.perf_counter()
+    # pylint: disable=import-outside-toplevel
+    from agentturing.model.embeddings import build_base_embedder
+
+    embedder = build_base_embedder(backend, onnx_file)
+    embedder.embed_query("warm up")
+    load_seconds = time.perf_counter() - started
+
+    latencies = []
+    for _ in range(repeats):
+        for query in QUERIES:
+            started = time.perf_counter()
+            embedder.embed_query(query)
+            latencies.append((time.perf_counter() - started) * 1000)
+
+    corpus = (QUERIES * math.ceil(batch_size * 4 / len(QUERIES)))[: batch_size * 4]
+    started = time.perf_counter()
+    for start in range(0, len(corpus), batch_size):
+        embedder.embed_documents(corpus[start:start + batch_size])
+    throughput = len(corpus) / (time.perf_counter() - started)
+
+    print(json.dumps({
+        "backend": backend,
+        "load_seconds": round(load_seconds, 3),
+        "query_p50_ms": round(statistics.median(latencies), 3),
+        "query_p95_ms": round(_percentile(latencies, 0.95), 3),
+        "batch_texts_per_second": round(throughput, 1),
+        "peak_rss_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+        "vectors": embedder.embed_documents(QUERIES),
+    }))
+
+
+def _cosine(left, right):
+    dot = sum(a * b for a, b in zip(left, right))
+    norm = math.sqrt(sum(a * a for a in left)) * math.sqrt(sum(b * b for b in right))
+    return dot / norm if norm else 0.0
+
+
+def main():
+    """Run every requested backend in a subprocess and print a comparison table."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--backends", nargs="+", default=list(EMBEDDING_BACKENDS),
+                        choices=EMBEDDING_BACKENDS)
+    parser.add_argument("--onnx-file", default=None)
+    parser.add_argument("--repeats", type=int, default=5)
+    parser.add_argument("--batch-size", type=int, default=64)
+    parser.add_argument("--tolerance", type=float, default=0.99,
+                        help="Minimum cosine similarity to the torch vectors.")
+    parser.add_argument("--worker", choices=EMBEDDING_BACKENDS, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        run_worker(args.worker, args.onnx_file, args.repeats, args.batch_size)
+        return
+
+    backends = ["torch"] + [backend for backend in args.backends if backend != "torch"]
+    reports = []
+    for backend in backends:
+        command = [sys.executable, "-m", "benchmarks.embedding_backends", "--worker", backend,
+                   "--repeats", str(args.repeats), "--batch-size", str(args.batch_size)]
+        if args.onnx_file:
+            command += ["--onnx-file", args.onnx_file]
+        output = subprocess.run(command, check=True, capture_output=True, text=True).stdout
+        reports.append(json.loads(output.strip().splitlines()[-1]))
+
+    reference = reports[0]["vectors"]
+    failed = False
+    print(f"{'backend':<10} {'load s':>8} {'p50 ms':>8} {'p95 ms':>8} "
+          f"{'texts/s':>9} {'RSS MB':>8} {'min cos':>8}")
+    for report in reports:
+        parity = min(_cosine(a, b) for a, b in zip(reference, report["vectors"]))
+        failed = failed or parity < args.tolerance
+        print(f"{report['backend']:<10} {report['load_seconds']:>8} {report['query_p50_ms']:>8} "
+              f"{report['query_p95_ms']:>8} {report['batch_texts_per_second']:>9} "
+              f"{report['peak_rss_mb']:>8} {parity:>8.4f}")
+
+    if failed:
+        sys.exit(f"Parity check failed: a backend fell below cosine {args.tolerance}.")
+
+
+if __name__ == "__main__":
+    main()
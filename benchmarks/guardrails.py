@@ -0,0 +1,146 @@
+"""Benchmark the precompiled guard engine against the original keyword loops.
+
+Runs an equivalence check over realistic and randomized texts first (allow/deny
+decisions and redacted output must be identical), then times the input and
+output guards on question- and answer-sized texts:
+
+    uv run python -m benchmarks.guardrails --number 2000
+"""
+
+import argparse
+import random
+import re
+import sys
+import timeit
+
+from agentturing.guardrails.setup import (
+    MATH_KEYWORDS,
+    TOXIC_MARKERS,
+    UNSAFE_OUTPUT_MESSAGE,
+    make_input_guard,
+    make_output_guard,
+)
+
+
+def reference_math_intent_check(text):
+    """The original math-only heuristic."""
+    lowered = text.lower()
+    has_keyword = any(keyword in lowered for keyword in MATH_KEYWORDS)
+    has_symbol = bool(re.search(r"[+\-*/=^(){}\[\]√∑∫]|\bpi\b|\btheta\b|\d", lowered))
+    return has_keyword or has_symbol
+
+
+def reference_contains_toxicity(text):
+    """The original toxic-marker loop."""
+    lowered = text.lower()
+    return any(marker in lowered for marker in TOXIC_MARKERS)
+
+
+def reference_filter_pii(text):
+    """The original two-pass PII substitution."""
+    text = re.sub(r"[\w.+-]+@[\w-]+\.[\w.-]+", "[email redacted]", text)
+    text = re.sub(r"(?<!\d)(?:\+?\d[\d\s().-]{7,}\d)", "[phone redacted]", text)
+    return text
+
+
+def reference_input_guard(text):
+    """The original input guard, returning an error string instead of raising."""
+    if not reference_math_intent_check(text):
+        return "error: scope"
+    sanitized = reference_filter_pii(text.strip())
+    if reference_contains_toxicity(sanitized):
+        return "error: unsafe"
+    return sanitized
+
+
+def reference_output_guard(text):
+    """The original output guard."""
+    sanitized = reference_filter_pii(text.strip())
+    if reference_contains_toxicity(sanitized):
+        return UNSAFE_OUTPUT_MESSAGE
+    return sanitized
+
+
+QUESTION = (
+    "Find the critical points of f(x) = x^3 - 3x^2 + 2 and classify each one. "
+    "My tutor's email is jane.doe@example.edu if you need it."
+)
+ANSWER_PARAGRAPH = (
+    "To find the critical points we differentiate: f'(x) = 3x^2 - 6x = 3x(x - 2). "
+    "Setting the derivative to zero gives x = 0 and x = 2. The second derivative "
+    "f''(x) = 6x - 6 is negative at x = 0, so that point is a local maximum, and "
+    "positive at x = 2, so that point is a local minimum. "
+)
+FRAGMENTS = (
+    "solve", "Hate", "kill", "x^2", " ", "  ", "\n", "pi", "theta", "Theory", "self-harm",
+    "a.b+c@d-e.org", "555 123 4567", "+1 (555) 123-4567", "12", "@", ".", "-", "İ", "K",
+    "number theory", "bomb", "whatever", "sq", "uare", "call 555 1234567.x@y.com",
+    "mathfan@gmail.com", "∫", "√", "ß", "(", ")", "terrorist", "suicide", "abc",
+)
+
+
+def random_text(rng, pieces):
+    """Build a text from random fragments to probe edge cases."""
+    return "".join(rng.choice(FRAGMENTS) for _ in range(pieces))
+
+
+def candidate_input_guard(guard, text):
+    """Wrap the new input guard to return comparable strings."""
+    try:
+        return guard(text)
+    except ValueError as exc:
+        return "error: scope" if "math-related" in str(exc) else "error: unsafe"
+
+
+def check_equivalence(samples, seed):
+    """Return the number of texts where old and new guards disagree."""
+    input_guard = make_input_guard()
+    output_guard = make_output_guard()
+    rng = random.Random(seed)
+    texts = [QUESTION, ANSWER_PARAGRAPH * 20, "", "hello there", "I hate this"]
+    texts += [random_text(rng, rng.randint(1, 40)) for _ in range(samples)]
+
+    mismatches = 0
+    for text in texts:
+        if candidate_input_guard(input_guard, text) != reference_input_guard(text):
+            mismatches += 1
+            print(f"input mismatch: {text!r}")
+        if output_guard(text) != reference_output_guard(text):
+            mismatches += 1
+            print(f"output mismatch: {text!r}")
+    return mismatches, len(texts)
+
+
+def main():
+    """Check equivalence, then time original and precompiled guards."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--number", type=int, default=2000)
+    parser.add_argument("--samples", type=int, default=20000)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    mismatches, total = check_equivalence(args.samples, args.seed)
+    print(f"equivalence: {total - mismatches}/{total} texts identical")
+    if mismatches:
+        sys.exit(1)
+
+    input_guard = make_input_guard()
+    output_guard = make_output_guard()
+    cases = [
+        ("input, question", QUESTION,
+         reference_input_guard, lambda text: candidate_input_guard(input_guard, text)),
+        ("output, 1 KB", ANSWER_PARAGRAPH * 3, reference_output_guard, output_guard),
+        ("output, 8 KB", ANSWER_PARAGRAPH * 24, reference_output_guard, output_guard),
+        ("output, 32 KB", ANSWER_PARAGRAPH * 96, reference_output_guard, output_guard),
+    ]
+    for name, text, reference, candidate in cases:
+        old = timeit.timeit(lambda: reference(text), number=args.number)  # pylint: disable=cell-var-from-loop
+        new = timeit.timeit(lambda: candidate(text), number=args.number)  # pylint: disable=cell-var-from-loop
+        print(
+            f"{name:<16} original {old * 1e6 / args.number:>9.1f} us  "
+            f"engine {new * 1e6 / args.number:>9.1f} us  speedup {old / new:>5.2f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,144 @@
+"""Tail latency with and without hedging, and errors with and without fallback.
+
+Both checks run the API against ``benchmarks.stub_services``, once per
+setting, and drive ``/ask/stream`` at a fixed concurrency:
+
+* ``hedge``: on ``--scenario web`` (RouterAgent and WebResearchAgent, whose
+  calls are both hedged) a ``--slow-fraction`` of model responses start
+  ``--slow-ms`` late. Reports p50/p95/p99 time to first token and completion
+  latency, hedges sent and won, and upstream chat requests.
+* ``fallback``: every SolverAgent request for the default model fails with a
+  503. Reports completed and failed runs and the fallback reasons from
+  ``metadata["model_decisions"]``; once the circuit opens, runs stop trying
+  the failing model.
+
+    uv run python -m benchmarks.hedging --check hedge --requests 200
+    uv run python -m benchmarks.hedging --check fallback --requests 40
+"""
+
+import argparse
+import asyncio
+from collections import Counter
+
+import httpx
+
+from benchmarks.load_test import (
+    free_port,
+    metric_total,
+    run_stream_request,
+    start_api,
+    start_stub,
+    summarize,
+    wait_until_up,
+)
+from benchmarks.stub_services import add_stub_arguments
+
+SETTINGS = {
+    "hedge": {
+        "off": {"MODEL_HEDGING_ENABLED": "false"},
+        "on": {"MODEL_HEDGING_ENABLED": "true"},
+    },
+    "fallback": {
+        "off": {"MODEL_FALLBACK_ENABLED": "false"},
+        "on": {"MODEL_FALLBACK_ENABLED": "true"},
+    },
+}
+
+
+async def drive(args: argparse.Namespace, api_url: str, stub_url: str) -> dict:
+    """Send ``--requests`` questions at ``--concurrency`` and summarize them."""
+    results, errors = [], Counter()
+    remaining = iter(range(args.requests))
+    async with httpx.AsyncClient(timeout=args.timeout) as client:
+        before = (await client.get(f"{stub_url}/stats")).json()["chat"]
+
+        async def worker():
+            for _ in remaining:
+                try:
+                    results.append(await run_stream_request(client, api_url))
+                except Exception as exc:  # pylint: disable=broad-exception-caught
+                    errors[type(exc).__name__] += 1
+
+        await asyncio.gather(*(worker() for _ in range(args.concurrency)))
+        after = (await client.get(f"{stub_url}/stats")).json()["chat"]
+        metrics = (await client.get(f"{api_url}/metrics")).text
+
+    decisions = Counter()
+    for result in results:
+        for decision in result["metadata"].get("model_decisions", []):
+            detail = decision.get("winner") or decision.get("reason")
+            decisions[f"{decision['action']}:{detail}"] += 1
+    return {
+        "completed": len(results),
+        "errors": dict(errors),
+        "ttft": summarize([r["ttft"] for r in results if r["ttft"] is not None]),
+        "latency": summarize([r["latency"] for r in results]),
+        "upstream_chat_requests": sum(after[key] - before[key] for key in after),
+        "hedges": metric_total(metrics, "agentturing_model_hedges_total"),
+        "decisions": dict(decisions),
+    }
+
+
+def print_result(name: str, result: dict) -> None:
+    """Print one setting's summary."""
+    def fmt(stats: dict) -> str:
+        return " ".join(
+            f"{key[:-3]}={value:.0f}" for key, value in stats.items()
+            if value is not None and key != "mean_ms"
+        ) or "-"
+
+    print(
+        f"{name:<4} completed={result['completed']} errors={result['errors'] or 0} "
+        f"upstream={result['upstream_chat_requests']} hedges={result['hedges']:g}"
+    )
+    print(f"     ttft ms: {fmt(result['ttft'])} | latency ms: {fmt(result['latency'])}")
+    print(f"     decisions: {result['decisions'] or '-'}")
+
+
+def main() -> None:
+    """Start the stub, run the API with each setting of the chosen check and print both."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--check", choices=tuple(SETTINGS), default="hedge")
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--timeout", type=float, default=120.0)
+    add_stub_arguments(parser)
+    parser.set_defaults(
+        scenario="web",
+        first_token_ms=100.0,
+        answer_tokens=40,
+        tool_latency_ms=100.0,
+        slow_fraction=0.05,
+        slow_ms=2000.0,
+        seed=7,
+    )
+    args = parser.parse_args()
+    extra_env = {"MODEL_HEDGE_INITIAL_DELAY": "0.5"}
+    if args.check == "fallback":
+        args.scenario, args.slow_fraction = "solver", 0.0
+        args.fail_model = args.fail_model or "deepseek-chat"
+        args.fail_agent = args.fail_agent or "SolverAgent"
+        extra_env = {"MODEL_BREAKER_COOLDOWN": "600"}
+
+    stub_port = free_port()
+    stub_url = f"http://127.0.0.1:{stub_port}"
+    stub = start_stub(args, stub_port)
+    try:
+        wait_until_up(stub_url, stub)
+        for name, env in SETTINGS[args.check].items():
+            api_port = free_port()
+            api_url = f"http://127.0.0.1:{api_port}"
+            api = start_api(api_port, stub_url, {**extra_env, **env})
+            try:
+                wait_until_up(api_url, api)
+                print_result(name, asyncio.run(drive(args, api_url, stub_url)))
+            finally:
+                api.terminate()
+                api.wait(timeout=30)
+    finally:
+        stub.terminate()
+        stub.wait(timeout=10)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,186 @@
+"""Per-hop time to first token with the default and the shared, warmed HTTP client.
+
+Each simulated run makes ``--hops`` sequential streamed chat completions, like
+Router -> Solver -> Research -> Solver, with ``--tool-ms`` of tool time between
+hops. Consecutive runs are ``--idle-seconds`` apart, like a lightly loaded
+server between user requests. The requests go to the offline chat stub from
+``benchmarks.stub_services`` through a local proxy that holds every new
+connection for ``--handshake-ms``, standing in for the TCP and TLS setup a
+remote provider costs. Reused connections skip that delay.
+
+Two clients are compared:
+
+* ``default``: ``AsyncOpenAI`` with its own httpx client, as ``OpenAIProvider``
+  built from just an API key and base URL. httpx drops idle connections after
+  five seconds.
+* ``shared``: the client from ``agentturing.services.http_client`` with the
+  ``HTTP_*`` settings, warmed up before the first run as at API startup.
+
+    uv run python -m benchmarks.http_pool --runs 5 --handshake-ms 150
+"""
+
+import argparse
+import asyncio
+import statistics
+import time
+
+from openai import AsyncOpenAI
+
+from agentturing.config import get_settings
+from agentturing.services.http_client import (
+    build_http_client,
+    build_http_timeout,
+    pool_stats,
+    warm_up_connections,
+)
+from benchmarks.load_test import free_port, start_stub, wait_until_up
+from benchmarks.stub_services import add_stub_arguments
+
+
+class HandshakeProxy:
+    """TCP relay that delays each new connection by a fixed handshake cost."""
+
+    def __init__(self, target_port: int, handshake: float) -> None:
+        self.target_port = target_port
+        self.handshake = handshake
+        self.connections = 0
+        self._server: asyncio.Server | None = None
+
+    async def _pipe(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            while data := await reader.read(65536):
+                writer.write(data)
+                await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        self.connections += 1
+        await asyncio.sleep(self.handshake)
+        upstream_reader, upstream_writer = await asyncio.open_connection(
+            "127.0.0.1", self.target_port
+        )
+        await asyncio.gather(
+            self._pipe(reader, upstream_writer),
+            self._pipe(upstream_reader, writer),
+        )
+
+    async def start(self) -> int:
+        """Listen on a free local port and return it."""
+        self._server = await asyncio.start_server(self._handle, "127.0.0.1", 0)
+        return self._server.sockets[0].getsockname()[1]
+
+    def close(self) -> None:
+        """Stop accepting connections."""
+        if self._server is not None:
+            self._server.close()
+
+
+async def hop(client: AsyncOpenAI) -> float:
+    """Stream one chat completion and return its time to the first content token."""
+    started = time.perf_counter()
+    first_token = None
+    stream = await client.chat.completions.create(
+        model="deepseek-chat",
+        messages=[{"role": "user", "content": "Find the critical points of x^3 - 3x^2."}],
+        stream=True,
+    )
+    async for chunk in stream:
+        if first_token is None and chunk.choices and chunk.choices[0].delta.content:
+            first_token = time.perf_counter() - started
+    return first_token if first_token is not None else time.perf_counter() - started
+
+
+async def measure(args: argparse.Namespace, client: AsyncOpenAI, proxy: HandshakeProxy) -> dict:
+    """Run every simulated agent run and return per-hop TTFT and new connections."""
+    connections_before = proxy.connections
+    per_hop: list[list[float]] = [[] for _ in range(args.hops)]
+    for run in range(args.runs):
+        if run:
+            await asyncio.sleep(args.idle_seconds)
+        for index in range(args.hops):
+            if index:
+                await asyncio.sleep(args.tool_ms / 1000)
+            per_hop[index].append(await hop(client))
+    return {
+        "hop_ttft_ms": [round(statistics.mean(values) * 1000, 1) for values in per_hop],
+        "connections": proxy.connections - connections_before,
+    }
+
+
+async def run_benchmark(args: argparse.Namespace, stub_port: int) -> dict[str, dict]:
+    """Measure the default and the shared client against the same proxy."""
+    proxy = HandshakeProxy(stub_port, args.handshake_ms / 1000)
+    base_url = f"http://127.0.0.1:{await proxy.start()}/v1"
+    results = {}
+    try:
+        default_client = AsyncOpenAI(api_key="stub", base_url=base_url)
+        results["default"] = await measure(args, default_client, proxy)
+        await default_client.close()
+
+        settings = get_settings()
+        http_client = build_http_client(settings)
+        shared_client = AsyncOpenAI(
+            api_key="stub",
+            base_url=base_url,
+            http_client=http_client,
+            timeout=build_http_timeout(settings),
+        )
+        warm_started = proxy.connections
+        await warm_up_connections(
+            http_client, [base_url], connections=settings.http_warmup_connections
+        )
+        warmed = proxy.connections - warm_started
+        results["shared"] = await measure(args, shared_client, proxy)
+        results["shared"]["warm_up_connections"] = warmed
+        results["shared"]["pool"] = pool_stats(http_client)
+        await http_client.aclose()
+    finally:
+        proxy.close()
+    return results
+
+
+def main() -> None:
+    """Start the chat stub, compare both clients and print per-hop savings."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--hops", type=int, default=4)
+    parser.add_argument("--tool-ms", type=float, default=300.0)
+    parser.add_argument(
+        "--idle-seconds",
+        type=float,
+        default=6.0,
+        help="Pause between runs; above five seconds the default client reconnects.",
+    )
+    parser.add_argument("--handshake-ms", type=float, default=150.0)
+    add_stub_arguments(parser)
+    parser.set_defaults(first_token_ms=50.0, answer_tokens=20)
+    args = parser.parse_args()
+
+    stub_port = free_port()
+    stub = start_stub(args, stub_port)
+    try:
+        wait_until_up(f"http://127.0.0.1:{stub_port}", stub)
+        results = asyncio.run(run_benchmark(args, stub_port))
+    finally:
+        stub.terminate()
+        stub.wait(timeout=10)
+
+    hops = " ".join(f"{f'hop {index + 1}':>8}" for index in range(args.hops))
+    print(f"{'client':<8} {hops} {'conns':>6}   (mean TTFT ms over {args.runs} runs)")
+    for name, result in results.items():
+        values = " ".join(f"{value:>8}" for value in result["hop_ttft_ms"])
+        print(f"{name:<8} {values} {result['connections']:>6}")
+    saved = [
+        round(old - new, 1)
+        for old, new in zip(results["default"]["hop_ttft_ms"], results["shared"]["hop_ttft_ms"])
+    ]
+    print(f"{'saved':<8} " + " ".join(f"{value:>8}" for value in saved))
+    shared = results["shared"]
+    print(f"shared pool: {shared['warm_up_connections']} warm-up connections, {shared['pool']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+"""Recall and latency of dense and hybrid knowledge base search on formula queries.
+
+Samples ``--queries`` chunks from the lexical index, uses the first sentence
+of each that contains an equation or exponent as the query, and counts how
+often the chunk it came from is in the top ``--top-k`` results of a dense and
+of a hybrid search. Needs the built knowledge base and the embedding model:
+
+    uv run python -m benchmarks.hybrid_retrieval --queries 200 --top-k 4
+"""
+
+import argparse
+import asyncio
+import random
+import re
+import sqlite3
+import statistics
+import time
+
+from agentturing.config import get_settings
+from agentturing.database.sidecar import build_local_knowledge_base
+
+_FORMULA_SENTENCE = re.compile(r"[^.?!\n]*[=^][^.?!\n]*")
+
+
+def _percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+def formula_queries(path: str, count: int, seed: int) -> list[tuple[str, str]]:
+    """Return up to ``count`` ``(query, chunk content)`` pairs from the lexical index."""
+    with sqlite3.connect(path) as connection:
+        rows = connection.execute("SELECT content FROM chunks").fetchall()
+    random.Random(seed).shuffle(rows)
+    queries = []
+    for (content,) in rows:
+        match = _FORMULA_SENTENCE.search(content)
+        if match and len(match.group().split()) >= 3:
+            queries.append((" ".join(match.group().split())[:160], content))
+            if len(queries) == count:
+                break
+    return queries
+
+
+async def measure(knowledge_base, queries, top_k: int, mode: str) -> dict:
+    """Search every query in one mode and return recall@k and latency percentiles."""
+    found, latencies = 0, []
+    for query, content in queries:
+        started = time.perf_counter()
+        chunks = await knowledge_base.search(query, top_k=top_k, mode=mode)
+        latencies.append((time.perf_counter() - started) * 1000)
+        found += any(chunk.content == content for chunk in chunks)
+    return {
+        "recall": round(found / len(queries), 3),
+        "p50_ms": round(statistics.median(latencies), 2),
+        "p95_ms": round(_percentile(latencies, 0.95), 2),
+    }
+
+
+async def run(args: argparse.Namespace) -> None:
+    """Compare both modes on the same queries and print one line each."""
+    settings = get_settings()
+    queries = formula_queries(settings.kb_lexical_index_path, args.queries, args.seed)
+    if not queries:
+        raise SystemExit("No formula chunks found; run agentturing-ingest first.")
+    knowledge_base = build_local_knowledge_base(settings)
+    try:
+        await knowledge_base.search(queries[0][0], top_k=args.top_k, mode="hybrid")
+        print(f"{len(queries)} formula queries, recall@{args.top_k}")
+        for mode in ("dense", "hybrid"):
+            result = await measure(knowledge_base, queries, args.top_k, mode)
+            print(
+                f"{mode:<7} recall={result['recall']:.3f} "
+                f"p50={result['p50_ms']}ms p95={result['p95_ms']}ms"
+            )
+    finally:
+        await knowledge_base.aclose()
+
+
+def main() -> None:
+    """Parse arguments and run the comparison."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--top-k", type=int, default=4)
+    parser.add_argument("--seed", type=int, default=7)
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,377 @@
+"""Offline load test of ``/ask`` and ``/ask/stream`` against stub LLM and Tavily servers.
+
+Starts ``benchmarks.stub_services`` and the API (``uvicorn app:app``) as
+subprocesses. The API gets the stub's OpenAI-compatible base URL and
+Tavily base URL, and the answer cache, fast router and warm-up are turned off
+so no model download or network access is needed. It then drives the chosen
+endpoints at a fixed concurrency and reports:
+
+* throughput;
+* p50/p95/p99 time to first token and completion latency;
+* the API's event loop lag, read from ``/metrics``.
+
+    uv run python -m benchmarks.load_test --concurrency 32 --requests 400
+    uv run python -m benchmarks.load_test --scenario research --save baseline.json
+    uv run python -m benchmarks.load_test --scenario research --compare baseline.json
+
+Pass ``--api-url`` to load an already running API instead of spawning one.
+"""
+
+import argparse
+import asyncio
+import json
+import math
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import time
+
+import httpx
+
+from benchmarks.stub_services import add_stub_arguments
+
+QUESTION = "Find the critical points of f(x) = x^3 - 3x^2 + 2."
+LAG_METRIC = "agentturing_event_loop_lag_seconds"
+
+
+def free_port() -> int:
+    """Return a TCP port that is currently free on localhost."""
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def percentile(values: list[float], fraction: float) -> float | None:
+    """Nearest-rank percentile of ``values``."""
+    if not values:
+        return None
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, math.ceil(fraction * len(ordered)) - 1))
+    return ordered[index]
+
+
+def summarize(values: list[float]) -> dict[str, float | None]:
+    """Return p50/p95/p99 and mean in milliseconds."""
+    return {
+        "p50_ms": _ms(percentile(values, 0.50)),
+        "p95_ms": _ms(percentile(values, 0.95)),
+        "p99_ms": _ms(percentile(values, 0.99)),
+        "mean_ms": _ms(statistics.fmean(values)) if values else None,
+    }
+
+
+def _ms(seconds: float | None) -> float | None:
+    return None if seconds is None else round(seconds * 1000, 2)
+
+
+def metric_total(metrics_text: str, name: str) -> float:
+    """Sum every labelled sample of counter ``name`` in a Prometheus scrape."""
+    total = 0.0
+    for line in metrics_text.splitlines():
+        if line.startswith(name) and line[len(name)] in " {":
+            total += float(line.rsplit(" ", 1)[1])
+    return total
+
+
+async def scrape_lag(client: httpx.AsyncClient, url: str) -> dict[float, float]:
+    """Read the API's event loop lag histogram from ``/metrics``."""
+    return histogram_buckets((await client.get(f"{url}/metrics")).text, LAG_METRIC)
+
+
+def histogram_buckets(metrics_text: str, name: str) -> dict[float, float]:
+    """Return cumulative bucket counts of an unlabelled Prometheus histogram."""
+    buckets: dict[float, float] = {}
+    for line in metrics_text.splitlines():
+        if line.startswith(f"{name}_bucket"):
+            bound = line.split('le="', 1)[1].split('"', 1)[0]
+            upper = math.inf if bound == "+Inf" else float(bound)
+            buckets[upper] = float(line.split()[-1])
+    return buckets
+
+
+def histogram_quantiles(
+    before: dict[float, float],
+    after: dict[float, float],
+) -> dict[str, float | None]:
+    """Estimate p50/p95/p99 as bucket upper bounds from observations between two scrapes."""
+    buckets = sorted((bound, count - before.get(bound, 0.0)) for bound, count in after.items())
+    total = buckets[-1][1] if buckets else 0
+    result: dict[str, float | None] = {"samples": total}
+    for label, fraction in (("p50_ms", 0.50), ("p95_ms", 0.95), ("p99_ms", 0.99)):
+        bound = next((b for b, count in buckets if total and count >= fraction * total), None)
+        result[label] = None if bound is None else round(bound * 1000, 2)
+    return result
+
+
+async def run_stream_request(client: httpx.AsyncClient, url: str) -> dict:
+    """POST to ``/ask/stream`` as NDJSON; time the first token and the done event.
+
+    The ``done`` event's metadata is returned with the timings.
+    """
+    started = time.perf_counter()
+    first_token = None
+    done = None
+    async with client.stream(
+        "POST",
+        f"{url}/ask/stream",
+        json={"question": QUESTION},
+        headers={"Accept": "application/x-ndjson"},
+    ) as response:
+        response.raise_for_status()
+        async for line in response.aiter_lines():
+            if not line:
+                continue
+            event = json.loads(line)
+            if first_token is None and event["type"] in {"answer", "reason"}:
+                first_token = time.perf_counter() - started
+            if event["type"] == "error":
+                raise RuntimeError(event["text"])
+            if event["type"] == "done":
+                done = event
+    if done is None:
+        raise RuntimeError("stream ended without a done event")
+    return {
+        "ttft": first_token,
+        "latency": time.perf_counter() - started,
+        "metadata": done.get("metadata", {}),
+    }
+
+
+async def run_ask_request(client: httpx.AsyncClient, url: str) -> dict:
+    """POST to ``/ask`` and time the complete response."""
+    started = time.perf_counter()
+    response = await client.post(f"{url}/ask", json={"question": QUESTION})
+    response.raise_for_status()
+    if "error" in response.json():
+        raise RuntimeError(response.json()["error"])
+    return {"ttft": None, "latency": time.perf_counter() - started}
+
+
+async def drive(url: str, endpoint: str, concurrency: int, requests: int, timeout: float) -> dict:
+    """Send ``requests`` calls with at most ``concurrency`` in flight and collect timings."""
+    run_one = run_stream_request if endpoint == "stream" else run_ask_request
+    results: list[dict] = []
+    errors: dict[str, int] = {}
+    remaining = iter(range(requests))
+
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(timeout=timeout, limits=limits) as client:
+        async def worker():
+            for _ in remaining:
+                try:
+                    results.append(await run_one(client, url))
+                except httpx.HTTPStatusError as exc:
+                    kind = f"HTTP {exc.response.status_code}"
+                    errors[kind] = errors.get(kind, 0) + 1
+                except Exception as exc:  # pylint: disable=broad-exception-caught
+                    kind = type(exc).__name__
+                    errors[kind] = errors.get(kind, 0) + 1
+
+        started = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - started
+
+    return {
+        "endpoint": endpoint,
+        "requests": requests,
+        "completed": len(results),
+        "errors": errors,
+        "seconds": round(elapsed, 3),
+        "throughput_rps": round(len(results) / elapsed, 2) if elapsed else None,
+        "ttft": summarize([r["ttft"] for r in results if r["ttft"] is not None]),
+        "latency": summarize([r["latency"] for r in results]),
+    }
+
+
+def wait_until_up(url: str, process: subprocess.Popen | None, timeout: float = 60.0) -> None:
+    """Poll ``/healthz`` until it answers or the process exits."""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process is not None and process.poll() is not None:
+            raise RuntimeError(f"{url} exited with code {process.returncode}")
+        try:
+            if httpx.get(f"{url}/healthz", timeout=1.0).status_code == 200:
+                return
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.2)
+    raise RuntimeError(f"{url} did not come up within {timeout:.0f}s")
+
+
+def start_stub(args: argparse.Namespace, port: int) -> subprocess.Popen:
+    """Launch the stub chat and Tavily server with the harness's latency settings."""
+    command = [
+        sys.executable, "-m", "benchmarks.stub_services",
+        "--port", str(port),
+        "--scenario", args.scenario,
+        "--first-token-ms", str(args.first_token_ms),
+        "--token-interval-ms", str(args.token_interval_ms),
+        "--answer-tokens", str(args.answer_tokens),
+        "--reasoning-tokens", str(args.reasoning_tokens),
+        "--tool-latency-ms", str(args.tool_latency_ms),
+        "--searches", str(args.searches),
+        "--slow-fraction", str(args.slow_fraction),
+        "--slow-ms", str(args.slow_ms),
+        "--fail-rate", str(args.fail_rate),
+    ]
+    if args.kb:
+        command.append("--kb")
+    if args.fail_model:
+        command += ["--fail-model", args.fail_model]
+    if args.fail_agent:
+        command += ["--fail-agent", args.fail_agent]
+    if args.seed is not None:
+        command += ["--seed", str(args.seed)]
+    return subprocess.Popen(command)  # pylint: disable=consider-using-with
+
+
+def stub_env(stub_url: str) -> dict[str, str]:
+    """Return the API environment that points it at the stub services."""
+    return {
+        **os.environ,
+        "DEEPSEEK_API_KEY": "stub",
+        "DEEPSEEK_BASE_URL": f"{stub_url}/v1",
+        "TAVILY_API_KEY": "stub",
+        "TAVILY_BASE_URL": stub_url,
+        "ANSWER_CACHE_ENABLED": "false",
+        "FAST_ROUTER_ENABLED": "false",
+        "WARMUP_ENABLED": "false",
+        "WEB_SEARCH_CACHE_SIZE": "1",
+        "WEB_SEARCH_CACHE_TTL": "0",
+        "KB_PREFETCH_ENABLED": "false",
+    }
+
+
+def start_api(
+    port: int,
+    stub_url: str,
+    extra_env: dict[str, str] | None = None,
+) -> subprocess.Popen:
+    """Launch ``uvicorn app:app`` wired to the stub services, with ``extra_env`` on top."""
+    env = {**stub_env(stub_url), **(extra_env or {})}
+    command = [
+        sys.executable, "-m", "uvicorn", "app:app",
+        "--host", "127.0.0.1",
+        "--port", str(port),
+        "--log-level", "warning",
+        "--no-access-log",
+    ]
+    return subprocess.Popen(command, env=env)  # pylint: disable=consider-using-with
+
+
+def print_report(report: dict) -> None:
+    """Print one line per endpoint plus the event loop lag."""
+    def fmt(stats: dict) -> str:
+        return " ".join(
+            f"{key[:-3]}={value:.1f}" for key, value in stats.items()
+            if value is not None and key != "mean_ms"
+        ) or "-"
+
+    for run in report["runs"]:
+        print(
+            f"{run['endpoint']:<7} {run['completed']}/{run['requests']} ok "
+            f"in {run['seconds']:.1f}s ({run['throughput_rps']} req/s) | "
+            f"TTFT ms {fmt(run['ttft'])} | latency ms {fmt(run['latency'])}"
+            + (f" | errors {run['errors']}" if run["errors"] else "")
+        )
+    lag = report.get("event_loop_lag")
+    if lag and lag["samples"]:
+        bounds = " ".join(
+            f"{key[:-3]}<={'inf' if lag[key] == math.inf else lag[key]}ms"
+            for key in ("p50_ms", "p95_ms", "p99_ms")
+        )
+        print(f"event loop lag ({int(lag['samples'])} samples, bucket upper bounds): {bounds}")
+
+
+def compare(report: dict, baseline: dict) -> None:
+    """Print relative change against a saved baseline report."""
+    previous = {run["endpoint"]: run for run in baseline["runs"]}
+    for run in report["runs"]:
+        old = previous.get(run["endpoint"])
+        if old is None:
+            continue
+        changes = [f"throughput {_change(old['throughput_rps'], run['throughput_rps'])}"]
+        for group in ("ttft", "latency"):
+            for key in ("p50_ms", "p95_ms", "p99_ms"):
+                if old[group].get(key) and run[group].get(key):
+                    change = _change(old[group][key], run[group][key])
+                    changes.append(f"{group} {key[:-3]} {change}")
+        print(f"vs baseline {run['endpoint']}: " + ", ".join(changes))
+
+
+def _change(old: float | None, new: float | None) -> str:
+    if not old or new is None:
+        return "n/a"
+    return f"{(new - old) / old * 100:+.1f}%"
+
+
+async def run_load(args: argparse.Namespace, api_url: str) -> dict:
+    """Warm up, drive every selected endpoint and read the lag histogram."""
+    endpoints = ["stream", "ask"] if args.endpoint == "both" else [args.endpoint]
+    warmup_requests = min(args.requests, 8)
+    await drive(api_url, endpoints[0], min(args.concurrency, 4), warmup_requests, args.timeout)
+
+    async with httpx.AsyncClient(timeout=10.0) as client:
+        lag_before = await scrape_lag(client, api_url)
+        runs = [
+            await drive(api_url, endpoint, args.concurrency, args.requests, args.timeout)
+            for endpoint in endpoints
+        ]
+        lag_after = await scrape_lag(client, api_url)
+
+    return {
+        "config": {
+            key: value for key, value in vars(args).items()
+            if key not in {"save", "compare", "api_url"}
+        },
+        "runs": runs,
+        "event_loop_lag": histogram_quantiles(lag_before, lag_after),
+    }
+
+
+def main() -> None:
+    """Start the stub services and API, run the load and report."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--endpoint", choices=("stream", "ask", "both"), default="both")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--timeout", type=float, default=120.0)
+    parser.add_argument("--api-url", help="Load an already running API instead of spawning one.")
+    parser.add_argument("--save", help="Write the JSON report to this path.")
+    parser.add_argument("--compare", help="Print changes relative to a saved JSON report.")
+    add_stub_arguments(parser)
+    args = parser.parse_args()
+
+    processes: list[subprocess.Popen] = []
+    try:
+        api_url = args.api_url
+        if api_url is None:
+            stub_port, api_port = free_port(), free_port()
+            stub_url = f"http://127.0.0.1:{stub_port}"
+            processes.append(start_stub(args, stub_port))
+            wait_until_up(stub_url, processes[-1])
+            processes.append(start_api(api_port, stub_url))
+            api_url = f"http://127.0.0.1:{api_port}"
+            wait_until_up(api_url, processes[-1])
+
+        report = asyncio.run(run_load(args, api_url.rstrip("/")))
+    finally:
+        for process in processes:
+            process.terminate()
+        for process in processes:
+            process.wait(timeout=10)
+
+    print_report(report)
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as handle:
+            compare(report, json.load(handle))
+    if args.save:
+        with open(args.save, "w", encoding="utf-8") as handle:
+            json.dump(report, handle, indent=2)
+        print(f"Saved report to {args.save}")
+
+
+if __name__ == "__main__":
+    main()
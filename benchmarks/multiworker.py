@@ -0,0 +1,198 @@
+"""Throughput and memory of the API across worker counts with the knowledge base sidecar.
+
+For each ``--workers`` count this starts ``agentturing.serve`` (one knowledge
+base sidecar plus that many uvicorn workers) against the offline stub services
+from ``benchmarks.load_test``, drives ``/ask/stream`` at a fixed concurrency,
+then reads the resident set size of every process from ``/proc``. With
+``--baseline`` it first measures one plain ``uvicorn app:app`` worker that
+loads the embedding model and Qdrant in-process.
+
+Use ``--kb`` so research runs call ``search_knowledge_base`` and the sidecar
+serves real embeddings (needs a built local knowledge base). Throughput only
+scales while there are idle cores, so compare counts up to ``os.cpu_count()``.
+
+    uv run python -m benchmarks.multiworker --workers 1 2 4 --baseline --scenario research --kb
+"""
+
+import argparse
+import asyncio
+import os
+import subprocess
+import sys
+import tempfile
+
+from benchmarks.load_test import (
+    drive,
+    free_port,
+    start_stub,
+    stub_env,
+    wait_until_up,
+)
+from benchmarks.stub_services import add_stub_arguments
+
+
+def _rss_mib(pid: int) -> float | None:
+    try:
+        with open(f"/proc/{pid}/status", encoding="utf-8") as handle:
+            for line in handle:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        return None
+    return None
+
+
+def _cmdline(pid: int) -> str:
+    try:
+        with open(f"/proc/{pid}/cmdline", "rb") as handle:
+            return handle.read().replace(b"\0", b" ").decode("utf-8", "replace")
+    except OSError:
+        return ""
+
+
+def process_tree(root: int) -> list[int]:
+    """Return ``root`` and all of its descendants, read from ``/proc``."""
+    parents: dict[int, int] = {}
+    for entry in os.listdir("/proc"):
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f"/proc/{entry}/stat", encoding="utf-8") as handle:
+                # The parent pid follows the parenthesised command name.
+                parents[int(entry)] = int(handle.read().rsplit(")", 1)[1].split()[1])
+        except (OSError, IndexError, ValueError):
+            continue
+    tree = [root]
+    for pid in tree:
+        tree.extend(child for child, parent in parents.items() if parent == pid)
+    return tree
+
+
+def memory_report(root: int, sidecar_mode: bool) -> dict:
+    """Split the resident memory of a serving process tree by role, in MiB."""
+    workers, sidecar, other = [], 0.0, 0.0
+    for pid in process_tree(root):
+        rss = _rss_mib(pid) or 0.0
+        command = _cmdline(pid)
+        if "agentturing.database.sidecar" in command:
+            sidecar += rss
+        elif "spawn_main" in command:
+            workers.append(rss)
+        elif pid != root:
+            other += rss
+    # With one worker uvicorn serves from the launching process itself.
+    root_rss = _rss_mib(root) or 0.0
+    if workers:
+        other += root_rss
+    else:
+        workers.append(root_rss)
+    return {
+        "worker_rss_mib": round(sum(workers) / len(workers), 1) if workers else None,
+        "sidecar_rss_mib": round(sidecar, 1) if sidecar_mode else None,
+        "total_rss_mib": round(sum(workers) + sidecar + other, 1),
+    }
+
+
+def start_server(args, port: int, stub_url: str, workers: int | None, socket_path: str):
+    """Launch the sidecar deployment, or one in-process worker when ``workers`` is None."""
+    env = {**stub_env(stub_url), "WARMUP_ENABLED": "true"}
+    if workers is None:
+        env.pop("KB_SIDECAR_SOCKET", None)
+        command = [
+            sys.executable, "-m", "uvicorn", "app:app",
+            "--host", "127.0.0.1", "--port", str(port),
+            "--log-level", "warning", "--no-access-log",
+        ]
+    else:
+        command = [
+            sys.executable, "-m", "agentturing.serve",
+            "--host", "127.0.0.1", "--port", str(port),
+            "--workers", str(workers),
+            "--socket", socket_path,
+            "--log-level", "warning",
+            "--startup-timeout", str(args.startup_timeout),
+        ]
+    return subprocess.Popen(command, env=env)  # pylint: disable=consider-using-with
+
+
+def measure(args, stub_url: str, workers: int | None, socket_path: str) -> dict:
+    """Run the load against one deployment and return throughput, latency and memory."""
+    port = free_port()
+    url = f"http://127.0.0.1:{port}"
+    server = start_server(args, port, stub_url, workers, socket_path)
+    try:
+        wait_until_up(url, server, timeout=args.startup_timeout)
+        asyncio.run(drive(url, "stream", min(args.concurrency, 4), 8, args.timeout))
+        run = asyncio.run(drive(url, "stream", args.concurrency, args.requests, args.timeout))
+        memory = memory_report(server.pid, sidecar_mode=workers is not None)
+    finally:
+        server.terminate()
+        server.wait(timeout=60)
+    return {
+        "mode": "in-process" if workers is None else "sidecar",
+        "workers": workers or 1,
+        "completed": run["completed"],
+        "errors": run["errors"],
+        "throughput_rps": run["throughput_rps"],
+        "latency_p50_ms": run["latency"]["p50_ms"],
+        "latency_p95_ms": run["latency"]["p95_ms"],
+        **memory,
+    }
+
+
+def print_table(rows: list[dict]) -> None:
+    """Print one line per deployment."""
+    def fmt(value) -> str:
+        return "-" if value is None else str(value)
+
+    print(
+        f"{'mode':<11} {'workers':>7} {'req/s':>8} {'p50 ms':>9} {'p95 ms':>9} "
+        f"{'worker MiB':>11} {'sidecar MiB':>12} {'total MiB':>10}"
+    )
+    for row in rows:
+        print(
+            f"{row['mode']:<11} {row['workers']:>7} {fmt(row['throughput_rps']):>8} "
+            f"{fmt(row['latency_p50_ms']):>9} {fmt(row['latency_p95_ms']):>9} "
+            f"{fmt(row['worker_rss_mib']):>11} {fmt(row['sidecar_rss_mib']):>12} "
+            f"{fmt(row['total_rss_mib']):>10}"
+            + (f"  errors {row['errors']}" if row["errors"] else "")
+        )
+
+
+def main() -> None:
+    """Measure each worker count against shared stub services and print a table."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument(
+        "--baseline",
+        action="store_true",
+        help="Also measure one worker that loads the model in-process.",
+    )
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--timeout", type=float, default=120.0)
+    parser.add_argument("--startup-timeout", type=float, default=300.0)
+    add_stub_arguments(parser)
+    args = parser.parse_args()
+
+    stub_port = free_port()
+    stub_url = f"http://127.0.0.1:{stub_port}"
+    stub = start_stub(args, stub_port)
+    rows = []
+    try:
+        wait_until_up(stub_url, stub)
+        with tempfile.TemporaryDirectory() as directory:
+            socket_path = os.path.join(directory, "kb.sock")
+            counts = ([None] if args.baseline else []) + args.workers
+            for workers in counts:
+                rows.append(measure(args, stub_url, workers, socket_path))
+    finally:
+        stub.terminate()
+        stub.wait(timeout=10)
+
+    print(f"{os.cpu_count()} CPUs, concurrency {args.concurrency}, scenario {args.scenario}")
+    print_table(rows)
+
+
+if __name__ == "__main__":
+    main()
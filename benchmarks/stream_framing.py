@@ -0,0 +1,109 @@
+"""Compare per-delta SSE framing with coalesced framing under concurrent streams.
+
+Each simulated stream emits token-sized ``answer`` deltas at a fixed interval,
+the way a reasoning model streams a long answer. Every yielded chunk becomes one
+body write (one ``send`` syscall under uvicorn), so writes per stream is the
+syscall count the proxy and server pay:
+
+    uv run python -m benchmarks.stream_framing --streams 50 --tokens 2000
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import time
+
+from agentturing.utils.streaming import (
+    NDJSON_MEDIA_TYPE,
+    SSE_MEDIA_TYPE,
+    coalesce_events,
+    frame_events,
+)
+
+
+async def fake_stream(tokens: int, interval: float, seed: int):
+    """Yield meta, ``tokens`` answer deltas and a done event."""
+    rng = random.Random(seed)
+    words = ["x", "^2", " + ", "3", "\\frac{1}{2}", " derivative", " so", " we", " get", "."]
+    yield {"type": "meta", "backend": "agentic", "model": "stub", "cache_hit": False}
+    for _ in range(tokens):
+        yield {"type": "answer", "text": rng.choice(words)}
+        await asyncio.sleep(interval)
+    yield {"type": "done", "answer": "", "reasoning": "", "metadata": {}}
+
+
+async def baseline_writer(events):
+    """The original framing: one ``json.dumps`` SSE frame per event."""
+    async for event in events:
+        yield f"data: {json.dumps(event)}\n\n"
+
+
+async def coalesced_writer(events, media_type, max_bytes, max_delay):
+    """Coalesced framing as served by ``/ask/stream``."""
+    async for batch in coalesce_events(events, max_bytes=max_bytes, max_delay=max_delay):
+        yield frame_events(batch, media_type)
+
+
+async def drain(writer) -> tuple[int, int]:
+    """Consume a writer and return (writes, bytes)."""
+    writes = 0
+    size = 0
+    async for chunk in writer:
+        writes += 1
+        size += len(chunk.encode("utf-8"))
+    return writes, size
+
+
+async def run_mode(name, make_writer, args) -> None:
+    """Run every stream concurrently under one framing mode and print totals."""
+    cpu_started = time.process_time()
+    wall_started = time.perf_counter()
+    results = await asyncio.gather(*(
+        drain(make_writer(fake_stream(args.tokens, args.interval, seed)))
+        for seed in range(args.streams)
+    ))
+    cpu = time.process_time() - cpu_started
+    wall = time.perf_counter() - wall_started
+    writes = sum(result[0] for result in results)
+    size = sum(result[1] for result in results)
+    print(
+        f"{name:<18} writes/stream={writes / args.streams:>8.1f} "
+        f"bytes/stream={size / args.streams:>9.0f} "
+        f"cpu ms/stream={cpu * 1000 / args.streams:>7.2f} wall s={wall:>6.2f}"
+    )
+
+
+def main() -> None:
+    """Parse options and benchmark baseline, SSE and NDJSON framing."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--streams", type=int, default=50)
+    parser.add_argument("--tokens", type=int, default=2000)
+    parser.add_argument("--interval", type=float, default=0.002,
+                        help="Seconds between token deltas in each stream.")
+    parser.add_argument("--coalesce-ms", type=float, default=30.0)
+    parser.add_argument("--coalesce-bytes", type=int, default=2048)
+    args = parser.parse_args()
+
+    max_delay = args.coalesce_ms / 1000
+
+    async def run_all():
+        await run_mode("baseline sse", baseline_writer, args)
+        await run_mode(
+            "coalesced sse",
+            lambda events: coalesced_writer(events, SSE_MEDIA_TYPE, args.coalesce_bytes, max_delay),
+            args,
+        )
+        await run_mode(
+            "coalesced ndjson",
+            lambda events: coalesced_writer(
+                events, NDJSON_MEDIA_TYPE, args.coalesce_bytes, max_delay
+            ),
+            args,
+        )
+
+    asyncio.run(run_all())
+
+
+if __name__ == "__main__":
+    main()
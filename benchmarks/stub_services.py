@@ -0,0 +1,394 @@
+"""Offline stand-ins for the OpenAI-compatible chat API and Tavily search.
+
+The chat stub streams scripted chat-completions chunks. It looks at the tools
+each request offers to tell which agent is calling, then replies the way a
+live model would on the happy path:
+
+* RouterAgent hands off to SolverAgent, or to WebResearchAgent for
+  ``--scenario web``.
+* SolverAgent answers directly for ``--scenario solver``. For ``--scenario
+  research`` it first hands off to MathResearchAgent.
+* MathResearchAgent makes ``--searches`` web searches (plus one knowledge
+  base search with ``--kb``), then hands back.
+* WebResearchAgent makes ``--searches`` web searches, then answers.
+
+Searches are requested together in one turn when the request allows parallel
+tool calls.
+
+Every response waits ``--first-token-ms`` before its first chunk, and a random
+``--slow-fraction`` of them another ``--slow-ms``, like a provider's latency
+tail. Answer and reasoning text then arrive one token every
+``--token-interval-ms``. Requests for ``--fail-model`` (only those from
+``--fail-agent``, if given) fail with a 503 at ``--fail-rate``. The Tavily
+stub answers ``POST /search`` after ``--tool-latency-ms``.
+
+``GET /stats`` counts chat streams and searches that are open, completed, or
+were closed by the caller before the stub finished them.
+
+    uv run python -m benchmarks.stub_services --port 8900
+"""
+
+import argparse
+import asyncio
+import contextlib
+import itertools
+import json
+import random
+import time
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, Response, StreamingResponse
+
+ANSWER_WORDS = (
+    "We", " differentiate", " f(x)", " to", " get", " f'(x)", " =", " 3x^2", " -", " 6x",
+    ",", " so", " the", " critical", " points", " are", " x", " =", " 0", " and", " x",
+    " =", " 2", ".",
+)
+REASONING_WORDS = (
+    "Set", " the", " derivative", " to", " zero", " and", " check", " the", " sign", ".",
+)
+
+
+def _tool_names(body: dict) -> set[str]:
+    return {
+        tool.get("function", {}).get("name", "")
+        for tool in body.get("tools") or []
+    }
+
+
+def _called_tools(body: dict) -> list[str]:
+    """Return the names of tools already called earlier in the conversation."""
+    names = []
+    for message in body.get("messages") or []:
+        for call in message.get("tool_calls") or []:
+            names.append(call.get("function", {}).get("name", ""))
+    return names
+
+
+def calling_agent(body: dict) -> str:
+    """Return the name of the agent that sent ``body``, told apart by its tools."""
+    tools = _tool_names(body)
+    if "transfer_to_webresearchagent" in tools:
+        return "RouterAgent"
+    if "web_search" in tools:
+        return "WebResearchAgent"
+    if "math_web_search" in tools:
+        return "MathResearchAgent"
+    return "SolverAgent"
+
+
+def _remaining(wanted: list[str], called: list[str]) -> list[str]:
+    """Return the wanted calls not yet made, counting repeated tool names."""
+    left = list(called)
+    remaining = []
+    for name in wanted:
+        if name in left:
+            left.remove(name)
+        else:
+            remaining.append(name)
+    return remaining
+
+
+def plan_reply(body: dict, args: argparse.Namespace) -> tuple[list[str], bool]:
+    """Decide which tools to call next, or that the agent should answer.
+
+    Returns ``(tool_names, answer)``; exactly one of them is meaningful. Research
+    agents request all outstanding searches in one turn when the request allows
+    parallel tool calls, and one per turn otherwise.
+    """
+    tools = _tool_names(body)
+    called = _called_tools(body)
+    parallel = body.get("parallel_tool_calls") is True
+
+    if "transfer_to_webresearchagent" in tools:  # RouterAgent
+        target = "webresearchagent" if args.scenario == "web" else "solveragent"
+        return [f"transfer_to_{target}"], False
+
+    if "web_search" in tools:  # WebResearchAgent
+        remaining = _remaining(["web_search"] * args.searches, called)
+        if not remaining:
+            return [], True
+        return (remaining if parallel else remaining[:1]), False
+
+    if "math_web_search" in tools:  # MathResearchAgent
+        wanted = ["search_knowledge_base"] if args.kb else []
+        wanted += ["math_web_search"] * args.searches
+        remaining = _remaining(wanted, called)
+        if not remaining:
+            return ["transfer_to_solveragent"], False
+        return (remaining if parallel else remaining[:1]), False
+
+    if "transfer_to_mathresearchagent" in tools:  # SolverAgent
+        if args.scenario == "research" and "transfer_to_mathresearchagent" not in called:
+            return ["transfer_to_mathresearchagent"], False
+    return [], True
+
+
+def _chunk(completion_id: str, model: str, delta: dict, finish_reason=None) -> str:
+    payload = {
+        "id": completion_id,
+        "object": "chat.completion.chunk",
+        "created": int(time.time()),
+        "model": model,
+        "choices": [{"index": 0, "delta": delta, "finish_reason": finish_reason}],
+    }
+    return f"data: {json.dumps(payload)}\n\n"
+
+
+def _usage_chunk(completion_id: str, model: str, completion_tokens: int) -> str:
+    payload = {
+        "id": completion_id,
+        "object": "chat.completion.chunk",
+        "created": int(time.time()),
+        "model": model,
+        "choices": [],
+        "usage": {
+            "prompt_tokens": 200,
+            "completion_tokens": completion_tokens,
+            "total_tokens": 200 + completion_tokens,
+        },
+    }
+    return f"data: {json.dumps(payload)}\n\n"
+
+
+class ClientDisconnected(Exception):
+    """Raised inside a handler once its caller has hung up."""
+
+
+class RequestStats:
+    """Open, completed and caller-aborted requests of one kind."""
+
+    def __init__(self) -> None:
+        self.open = 0
+        self.completed = 0
+        self.aborted = 0
+
+    @contextlib.contextmanager
+    def track(self):
+        """Count the enclosed block as one request; cancellation counts as an abort."""
+        self.open += 1
+        try:
+            yield
+        except (asyncio.CancelledError, GeneratorExit, ClientDisconnected):
+            self.aborted += 1
+            raise
+        else:
+            self.completed += 1
+        finally:
+            self.open -= 1
+
+    def summary(self) -> dict[str, int]:
+        """Return the counts as a JSON-serializable dict."""
+        return {"open": self.open, "completed": self.completed, "aborted": self.aborted}
+
+
+async def _sleep_unless_disconnected(request: Request, seconds: float) -> None:
+    """Sleep ``seconds``, raising ``ClientDisconnected`` early if the caller hangs up."""
+    deadline = time.monotonic() + seconds
+    while (remaining := deadline - time.monotonic()) > 0:
+        await asyncio.sleep(min(remaining, 0.02))
+        if await request.is_disconnected():
+            raise ClientDisconnected
+
+
+def create_app(args: argparse.Namespace) -> FastAPI:
+    """Build the stub app for the given latency and scenario settings."""
+    app = FastAPI(title="Benchmark stub services")
+    ids = itertools.count(1)
+    interval = args.token_interval_ms / 1000
+    stats = {"chat": RequestStats(), "search": RequestStats()}
+    failed = {"chat": 0}
+    rng = random.Random(args.seed)
+
+    async def stream_reply(body: dict):
+        with stats["chat"].track():
+            async for frame in _reply_frames(body):
+                yield frame
+
+    async def _reply_frames(body: dict):
+        completion_id = f"chatcmpl-stub-{next(ids)}"
+        model = body.get("model", "stub")
+        tool_calls, answer = plan_reply(body, args)
+        delay = args.first_token_ms
+        if rng.random() < args.slow_fraction:
+            delay += args.slow_ms
+        await asyncio.sleep(delay / 1000)
+        yield _chunk(completion_id, model, {"role": "assistant", "content": ""})
+
+        if answer:
+            for index in range(args.reasoning_tokens):
+                word = REASONING_WORDS[index % len(REASONING_WORDS)]
+                yield _chunk(completion_id, model, {"reasoning_content": word})
+                await asyncio.sleep(interval)
+            for index in range(args.answer_tokens):
+                word = ANSWER_WORDS[index % len(ANSWER_WORDS)]
+                yield _chunk(completion_id, model, {"content": word})
+                await asyncio.sleep(interval)
+            yield _chunk(completion_id, model, {}, finish_reason="stop")
+            tokens = args.answer_tokens + args.reasoning_tokens
+        else:
+            earlier = len(_called_tools(body))
+            for index, name in enumerate(tool_calls):
+                arguments = json.dumps(
+                    {"query": f"critical points of x^3 - 3x^2 + {earlier + index}"}
+                )
+                if name.startswith("transfer_to_"):
+                    arguments = "{}"
+                yield _chunk(
+                    completion_id,
+                    model,
+                    {
+                        "tool_calls": [
+                            {
+                                "index": index,
+                                "id": f"call_{completion_id}_{index}",
+                                "type": "function",
+                                "function": {"name": name, "arguments": arguments},
+                            }
+                        ]
+                    },
+                )
+            yield _chunk(completion_id, model, {}, finish_reason="tool_calls")
+            tokens = 20 * len(tool_calls)
+
+        yield _usage_chunk(completion_id, model, tokens)
+        yield "data: [DONE]\n\n"
+
+    @app.post("/v1/chat/completions")
+    async def chat_completions(request: Request):
+        body = await request.json()
+        if (
+            body.get("model") == args.fail_model
+            and args.fail_agent in (None, calling_agent(body))
+            and rng.random() < args.fail_rate
+        ):
+            failed["chat"] += 1
+            return JSONResponse(
+                {"error": {"message": "Stub provider failure.", "type": "server_error"}},
+                status_code=503,
+            )
+        if body.get("stream"):
+            return StreamingResponse(stream_reply(body), media_type="text/event-stream")
+
+        content = ""
+        async for frame in stream_reply(body):
+            if frame.startswith("data: {"):
+                for choice in json.loads(frame[6:]).get("choices", []):
+                    content += choice["delta"].get("content") or ""
+        return JSONResponse(
+            {
+                "id": "chatcmpl-stub",
+                "object": "chat.completion",
+                "created": int(time.time()),
+                "model": body.get("model", "stub"),
+                "choices": [
+                    {
+                        "index": 0,
+                        "message": {"role": "assistant", "content": content},
+                        "finish_reason": "stop",
+                    }
+                ],
+                "usage": {"prompt_tokens": 200, "completion_tokens": 1, "total_tokens": 201},
+            }
+        )
+
+    @app.post("/search")
+    async def tavily_search(request: Request):
+        body = await request.json()
+        try:
+            with stats["search"].track():
+                await _sleep_unless_disconnected(request, args.tool_latency_ms / 1000)
+        except ClientDisconnected:
+            return Response(status_code=499)
+        query = body.get("query", "")
+        return {
+            "query": query,
+            "results": [
+                {
+                    "title": f"Stub result {index} for {query}",
+                    "url": f"https://example.org/stub/{index}",
+                    "content": "Critical points occur where the derivative is zero. " * 8,
+                    "score": 0.9 - index * 0.05,
+                }
+                for index in range(body.get("max_results", 5))
+            ],
+        }
+
+    @app.get("/stats")
+    async def request_stats():
+        summary = {kind: tracked.summary() for kind, tracked in stats.items()}
+        summary["chat"]["failed"] = failed["chat"]
+        return summary
+
+    @app.get("/healthz")
+    async def healthz():
+        return {"status": "ok"}
+
+    return app
+
+
+def add_stub_arguments(parser: argparse.ArgumentParser) -> None:
+    """Register the stub's latency and scenario options on ``parser``."""
+    parser.add_argument(
+        "--scenario",
+        choices=("solver", "research", "web"),
+        default="solver",
+        help="Agent path the stub model steers each run down.",
+    )
+    parser.add_argument(
+        "--kb",
+        action="store_true",
+        help="Also call search_knowledge_base (needs a built local knowledge base).",
+    )
+    parser.add_argument(
+        "--searches",
+        type=int,
+        default=1,
+        help="Web searches each research agent makes before moving on.",
+    )
+    parser.add_argument("--first-token-ms", type=float, default=150.0)
+    parser.add_argument("--token-interval-ms", type=float, default=5.0)
+    parser.add_argument("--answer-tokens", type=int, default=200)
+    parser.add_argument("--reasoning-tokens", type=int, default=0)
+    parser.add_argument("--tool-latency-ms", type=float, default=300.0)
+    parser.add_argument(
+        "--slow-fraction",
+        type=float,
+        default=0.0,
+        help="Share of chat responses whose first chunk is delayed by --slow-ms more.",
+    )
+    parser.add_argument("--slow-ms", type=float, default=2000.0)
+    parser.add_argument("--fail-model", default=None, help="Model whose requests fail with 503.")
+    parser.add_argument(
+        "--fail-agent", default=None, help="Only fail --fail-model requests from this agent."
+    )
+    parser.add_argument("--fail-rate", type=float, default=1.0)
+    parser.add_argument("--seed", type=int, default=None)
+
+
+def main() -> None:
+    """Serve the stub chat and search APIs."""
+    import uvicorn  # pylint: disable=import-outside-toplevel
+
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8900)
+    parser.add_argument(
+        "--keep-alive-seconds",
+        type=float,
+        default=75.0,
+        help="Idle time before the stub closes a keep-alive connection, like a provider's edge.",
+    )
+    add_stub_arguments(parser)
+    args = parser.parse_args()
+    uvicorn.run(
+        create_app(args),
+        host=args.host,
+        port=args.port,
+        log_level="warning",
+        timeout_keep_alive=args.keep_alive_seconds,
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,122 @@
+"""A client disconnect stops the agent run and closes its upstream calls in bounded time.
+
+Runs the API against ``benchmarks.stub_services`` on the research path with
+slow searches and a long answer, hangs up after the first ``tool_call`` event
+(a web search is in flight) or the first ``answer`` event (the model is
+streaming), and polls the stub's ``/stats`` until no chat stream or search is
+open.
+"""
+
+import argparse
+import asyncio
+import time
+
+import httpx
+import pytest
+
+from benchmarks.load_test import free_port, metric_total, start_api, start_stub, wait_until_up
+from benchmarks.stub_services import add_stub_arguments
+
+QUESTION = "Find the critical points of x^3 - 3x^2."
+# Longest allowed delay between hanging up and the upstream calls closing.
+MAX_CLOSE_SECONDS = 1.0
+# Seconds to keep reading after the trigger event before hanging up.
+HANG_UP_DELAY = 0.2
+TIMEOUT = 120.0
+
+
+@pytest.fixture(scope="module", name="services")
+def services_fixture():
+    """Start the stub services and the API; yield their URLs."""
+    parser = argparse.ArgumentParser()
+    add_stub_arguments(parser)
+    parser.set_defaults(
+        scenario="research",
+        token_interval_ms=10.0,
+        answer_tokens=500,
+        tool_latency_ms=3000.0,
+    )
+    stub_port, api_port = free_port(), free_port()
+    stub_url = f"http://127.0.0.1:{stub_port}"
+    api_url = f"http://127.0.0.1:{api_port}"
+    stub = start_stub(parser.parse_args([]), stub_port)
+    api = start_api(api_port, stub_url)
+    try:
+        wait_until_up(stub_url, stub)
+        wait_until_up(api_url, api)
+        yield api_url, stub_url
+    finally:
+        api.terminate()
+        stub.terminate()
+        api.wait(timeout=30)
+        stub.wait(timeout=10)
+
+
+async def read_stats(client: httpx.AsyncClient, stub_url: str) -> dict:
+    """Return the stub's open, completed and aborted request counts."""
+    response = await client.get(f"{stub_url}/stats")
+    response.raise_for_status()
+    return response.json()
+
+
+def requests_seen(stats: dict) -> int:
+    """Return how many chat streams and searches the stub has ever received."""
+    return sum(sum(counts.values()) for counts in stats.values())
+
+
+async def hang_up_at(api_url: str, event_type: str) -> float:
+    """Stream one question, drop the connection shortly after ``event_type``, return when."""
+    async with httpx.AsyncClient(timeout=TIMEOUT) as client:
+        request = client.build_request(
+            "POST", f"{api_url}/ask/stream", json={"question": QUESTION}
+        )
+        response = await client.send(request, stream=True)
+        try:
+            response.raise_for_status()
+            async for line in response.aiter_lines():
+                if f'"type":"{event_type}"' in line:
+                    await asyncio.sleep(HANG_UP_DELAY)
+                    break
+            else:
+                raise AssertionError(f"The stream ended before a {event_type!r} event.")
+        finally:
+            # Closing the response before the body is read drops the connection.
+            await response.aclose()
+    return time.perf_counter()
+
+
+async def seconds_until_closed(client: httpx.AsyncClient, stub_url: str, hung_up: float) -> float:
+    """Poll the stub until nothing is open; return the delay, giving up well past the bound."""
+    while True:
+        stats = await read_stats(client, stub_url)
+        elapsed = time.perf_counter() - hung_up
+        if not stats["chat"]["open"] and not stats["search"]["open"]:
+            return elapsed
+        if elapsed > MAX_CLOSE_SECONDS * 5:
+            return elapsed
+        await asyncio.sleep(0.01)
+
+
+@pytest.mark.parametrize("event_type", ["tool_call", "answer"])
+def test_hang_up_closes_upstream_calls(services, event_type):
+    """Upstream calls close within the bound and the run starts no new ones."""
+    api_url, stub_url = services
+
+    async def run() -> tuple[float, int, int, float]:
+        async with httpx.AsyncClient(timeout=TIMEOUT) as client:
+            before = await read_stats(client, stub_url)
+            hung_up = await hang_up_at(api_url, event_type)
+            closed = await seconds_until_closed(client, stub_url, hung_up)
+            settled = await read_stats(client, stub_url)
+            await asyncio.sleep(MAX_CLOSE_SECONDS)
+            after = await read_stats(client, stub_url)
+            metrics = (await client.get(f"{api_url}/metrics")).text
+        aborted = sum(settled[kind]["aborted"] - before[kind]["aborted"] for kind in settled)
+        late = requests_seen(after) - requests_seen(settled)
+        return closed, aborted, late, metric_total(metrics, "agentturing_runs_cancelled_total")
+
+    closed, aborted, late, cancelled = asyncio.run(run())
+    assert closed <= MAX_CLOSE_SECONDS, f"upstream calls still open {closed:.2f}s after hang-up"
+    assert aborted >= 1
+    assert late == 0
+    assert cancelled >= 1
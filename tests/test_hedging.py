@@ -0,0 +1,88 @@
+"""Hedged model calls stop the losing request early and only hedge the listed agents."""
+
+import asyncio
+import dataclasses
+
+from agentturing.config import get_settings
+from agentturing.services.resilience import (
+    HedgedModel,
+    LatencyWindow,
+    ResilientModelProvider,
+    note_model_agent,
+    track_model_agents,
+)
+
+
+class SlowThenFastModel:  # pylint: disable=too-few-public-methods
+    """Model whose first stream stalls and whose later streams answer at once."""
+
+    def __init__(self, stall: float = 10) -> None:
+        self.stall = stall
+        self.calls = 0
+        self.closed: list[int] = []
+        self.finished: list[int] = []
+
+    async def stream_response(self, *_args, **_kwargs):
+        """Yield three events, after a long stall on the first call only."""
+        self.calls += 1
+        call = self.calls
+        try:
+            if call == 1:
+                await asyncio.sleep(self.stall)
+            for index in range(3):
+                yield f"event {index}"
+                await asyncio.sleep(0.05)
+            self.finished.append(call)
+        finally:
+            self.closed.append(call)
+
+
+def test_losing_request_is_closed_before_the_winner_finishes():
+    """The stalled primary is closed before the hedge's stream is read to the end."""
+
+    async def run() -> tuple[list[str], list[int], list[int]]:
+        model = SlowThenFastModel()
+        hedged = HedgedModel(model, "stub", LatencyWindow(), lambda: 0.05)
+        events, closed_on_first_event = [], None
+        async for event in hedged.stream_response():
+            events.append(event)
+            if closed_on_first_event is None:
+                closed_on_first_event = list(model.closed)
+        return events, closed_on_first_event, model.finished
+
+    events, closed_on_first_event, finished = asyncio.run(run())
+    assert events == ["event 0", "event 1", "event 2"]
+    assert closed_on_first_event == [1]
+    assert finished == [2]
+
+
+class StubProvider:  # pylint: disable=too-few-public-methods
+    """Provider returning the same stub model for every name."""
+
+    def __init__(self, model: SlowThenFastModel) -> None:
+        self.model = model
+
+    def get_model(self, _name):
+        """Return the stub model."""
+        return self.model
+
+
+def test_only_listed_agents_are_hedged():
+    """A stalled call is duplicated for a hedged agent and left alone for the solver."""
+    settings = dataclasses.replace(
+        get_settings(), model_hedge_initial_delay=0.05, model_hedge_min_delay=0.0
+    )
+
+    async def calls_made(agent: str) -> int:
+        model = SlowThenFastModel(stall=0.3)
+        provider = ResilientModelProvider(
+            StubProvider(model), settings, hedged={"RouterAgent"}, fallbacks={}
+        )
+        track_model_agents()
+        note_model_agent(agent)
+        async for _ in provider.get_model("stub").stream_response():
+            pass
+        return model.calls
+
+    assert asyncio.run(calls_made("RouterAgent")) == 2
+    assert asyncio.run(calls_made("SolverAgent")) == 1
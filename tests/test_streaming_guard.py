@@ -0,0 +1,63 @@
+"""Streaming output guard gives the same redaction as guarding the whole text."""
+
+import pytest
+
+from agentturing.guardrails.setup import (
+    UNSAFE_OUTPUT_MESSAGE,
+    _filter_pii,
+    make_output_guard,
+    make_streaming_output_guard,
+)
+
+SAMPLES = [
+    "Reach me at 555 123 4567ext 12 for help.",
+    "Mail john.doe+math@mail.example.com or call +1 (555) 123-4567 today.",
+    "So x = 3 and y = 12345678, while 2 3 4 5 6 7 8 9 is a sequence.",
+    "Write to a@b.com5551234567 for the proof.",
+    "Call 555.123.4567. The integral is 42.",
+    "IDs 12 34 56 78 90ab@c.de and (555) 123-4567x 99 then foo@bar.org, 12345",
+]
+
+
+def stream(text: str, size: int) -> tuple[str, str]:
+    """Feed ``text`` in ``size``-character chunks; return the streamed and final text."""
+    guard = make_streaming_output_guard()
+    pieces = [guard.feed(text[start:start + size]) for start in range(0, len(text), size)]
+    pieces.append(guard.finish())
+    return "".join(pieces), guard.final_text()
+
+
+@pytest.mark.parametrize("text", SAMPLES)
+def test_every_chunk_size_matches_whole_text_redaction(text):
+    """Streamed and final text match whole-text redaction for every chunk size."""
+    for size in range(1, len(text) + 1):
+        streamed, final = stream(text, size)
+        assert streamed == _filter_pii(text), size
+        assert final == make_output_guard()(text), size
+
+
+def test_final_text_reuses_the_streamed_text():
+    """A final answer equal to the streamed text comes from the released pieces."""
+    guard = make_streaming_output_guard()
+    guard.feed("Reach me at 555 123 4567ext 12 for help.")
+    assert guard.final_text("Reach me at 555 123 4567ext 12 for help.") == (
+        "Reach me at [phone redacted]ext 12 for help."
+    )
+
+
+def test_final_text_guards_a_different_final_output():
+    """A final answer that differs from the stream is guarded in full."""
+    guard = make_streaming_output_guard()
+    guard.feed("Working on it")
+    assert guard.final_text(" Call 555 123 4567 now. ") == "Call [phone redacted] now."
+    guard = make_streaming_output_guard()
+    guard.feed("Working on it")
+    assert guard.final_text("I will kill the process.") == UNSAFE_OUTPUT_MESSAGE
+
+
+def test_toxic_stream_is_blocked():
+    """A toxic marker split across deltas stops the stream."""
+    guard = make_streaming_output_guard()
+    released = guard.feed("Solve it or I will k") + guard.feed("ill the process.")
+    assert "kill" not in released
+    assert guard.final_text() == UNSAFE_OUTPUT_MESSAGE